@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+"""
+أرشيف صوت الجمل المنطوقة لإعادة المعالجة وضبط الجودة
+
+كل جملة تُضغط (FLAC إن توفر، وإلا PCM بترميز الفروق + zlib) وتُلحق بملف
+مقطع (segment) إلحاقاً فقط، وفهرس SQLite يربطها بسجل التاريخ والمحرك والتوقيتات.
+الكتابة كلها في خيط خلفي، فالخيط الذي يسلّم الجملة لا ينتظر القرص أبداً.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+import wave
+import zlib
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+
+try:
+    # SpeechRecognition اختيارية: ترميز FLAC عبر أداة flac المرفقة بها
+    import speech_recognition as sr
+    FLAC_AVAILABLE = True
+except ImportError:
+    FLAC_AVAILABLE = False
+
+try:
+    import config
+    CONFIG_AVAILABLE = True
+except ImportError:
+    CONFIG_AVAILABLE = False
+
+
+def encode_pcm(pcm: bytes, sample_rate: int, codec: str) -> bytes:
+    """
+    ضغط صوت PCM أحادي 16-bit
+
+    Args:
+        pcm: بايتات int16
+        sample_rate: معدل العينات
+        codec: "flac" أو "zdelta" (فروق العينات المتتالية مضغوطة بـ zlib - بلا فقد)
+    """
+    if codec == 'flac':
+        audio = sr.AudioData(pcm, sample_rate, 2)
+        return audio.get_flac_data()
+    if codec == 'zdelta':
+        samples = np.frombuffer(pcm, dtype=np.int16)
+        # فروق الكلام صغيرة القيمة فتنضغط أفضل من العينات نفسها (الالتفاف في int16 قابل للعكس)
+        delta = np.diff(samples, prepend=np.int16(0))
+        return zlib.compress(delta.tobytes(), 6)
+    raise ValueError(f"ترميز غير مدعوم: {codec}")
+
+
+def decode_pcm(blob: bytes, codec: str) -> bytes:
+    """فك ضغط جملة مؤرشفة إلى بايتات PCM int16"""
+    if codec == 'zdelta':
+        delta = np.frombuffer(zlib.decompress(blob), dtype=np.int16)
+        return np.cumsum(delta, dtype=np.int16).tobytes()
+    if codec == 'flac':
+        import io
+        # FLAC -> WAV عبر SpeechRecognition ثم استخراج العينات
+        with sr.AudioFile(io.BytesIO(blob)) as source:
+            return sr.Recognizer().record(source).get_raw_data(convert_width=2)
+    raise ValueError(f"ترميز غير مدعوم: {codec}")
+
+
+class AudioArchive:
+    """
+    أرشيف جمل بملفات مقاطع إلحاقية وفهرس SQLite
+
+    submit() يعيد رقم الجملة فوراً ويضعها في طابور الكاتب الخلفي،
+    و link_history() يربطها لاحقاً بصف جدول history بعد حفظه.
+    عند تجاوز المقطع الحالي حجمه الأقصى يبدأ مقطع جديد، وعند تجاوز الأرشيف
+    حجمه الكلي تُحذف أقدم المقاطع مع صفوف فهرسها.
+    """
+
+    SEGMENT_NAME = "segment-{:06d}.bin"
+    CONTROL_TIMEOUT = 1.0  # أقصى انتظار لمكان في الطابور لأوامر الربط والتعليم (بالثواني)
+
+    def __init__(self, directory, max_segment_bytes=64 * 1024 * 1024,
+                 max_total_bytes=1024 * 1024 * 1024, codec=None, max_queue=256):
+        """
+        Args:
+            directory: مجلد الأرشيف (المقاطع و index.db)
+            max_segment_bytes: حجم المقطع قبل الانتقال لمقطع جديد
+            max_total_bytes: الحجم الكلي قبل حذف أقدم المقاطع (None = بلا حد)
+            codec: "flac" أو "zdelta" (None = FLAC إن توفر)
+            max_queue: أقصى عدد جمل منتظرة (الزائد يُسقط بدلاً من حجب الالتقاط)
+        """
+        self.directory = str(directory)
+        self.max_segment_bytes = max_segment_bytes
+        self.max_total_bytes = max_total_bytes
+        self.codec = codec or ('flac' if FLAC_AVAILABLE else 'zdelta')
+        if self.codec == 'flac' and not FLAC_AVAILABLE:
+            raise ImportError("ترميز FLAC يتطلب SpeechRecognition: pip install SpeechRecognition")
+        os.makedirs(self.directory, exist_ok=True)
+        self.index_path = os.path.join(self.directory, "index.db")
+
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS utterances (
+                id INTEGER PRIMARY KEY,
+                history_id INTEGER,
+                segment INTEGER NOT NULL,
+                offset INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                codec TEXT NOT NULL,
+                sample_rate INTEGER NOT NULL,
+                samples INTEGER NOT NULL,
+                created DATETIME NOT NULL,
+                text TEXT,
+                engine TEXT,
+                language TEXT,
+                channel TEXT,
+                confidence REAL,
+                processing_time REAL
+            )
+        """)
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(utterances)")}
+        if 'retranscribed' not in existing:
+            # النموذج الذي أُعيد به تعرف الجملة (retranscriber.py)
+            conn.execute("ALTER TABLE utterances ADD COLUMN retranscribed TEXT")
+        conn.execute("CREATE INDEX IF NOT EXISTS utterances_history ON utterances(history_id)")
+        conn.commit()
+        last_id = conn.execute("SELECT MAX(id) FROM utterances").fetchone()[0] or 0
+        conn.close()
+
+        # الأرقام تُحجز عند التسليم حتى يمكن ربط السجل قبل أن تُكتب الجملة
+        self._next_id = last_id + 1
+        self._id_lock = threading.Lock()
+        self._segment, self._segment_size = self._last_segment()
+
+        self.stats = {'archived': 0, 'dropped': 0, 'dropped_links': 0, 'dropped_marks': 0,
+                      'raw_bytes': 0, 'stored_bytes': 0, 'rotated': 0, 'write_ms': 0.0}
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._writer = threading.Thread(target=self._write_loop, name='audio-archive', daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        return sqlite3.connect(self.index_path)
+
+    def _segment_path(self, segment):
+        return os.path.join(self.directory, self.SEGMENT_NAME.format(segment))
+
+    def _segments(self):
+        """أرقام المقاطع الموجودة على القرص بالترتيب"""
+        segments = []
+        for name in os.listdir(self.directory):
+            if name.startswith("segment-") and name.endswith(".bin"):
+                try:
+                    segments.append(int(name[8:-4]))
+                except ValueError:
+                    pass
+        return sorted(segments)
+
+    def _last_segment(self):
+        segments = self._segments()
+        if not segments:
+            return 1, 0
+        return segments[-1], os.path.getsize(self._segment_path(segments[-1]))
+
+    def submit(self, pcm: bytes, sample_rate: int = 16000, result=None) -> Optional[int]:
+        """
+        تسليم جملة للأرشفة (لا يحجب)
+
+        Args:
+            pcm: صوت الجملة (int16 أحادي)
+            sample_rate: معدل العينات
+            result: RecognitionResult لتخزين النص والمحرك والتوقيتات معها
+
+        Returns:
+            رقم الجملة في الأرشيف، أو None إذا كان الطابور ممتلئاً
+        """
+        if not pcm:
+            return None
+        with self._id_lock:
+            utterance_id = self._next_id
+            self._next_id += 1
+        try:
+            self._queue.put_nowait(('audio', utterance_id, pcm, sample_rate, result, datetime.now()))
+        except queue.Full:
+            self.stats['dropped'] += 1
+            return None
+        return utterance_id
+
+    def link_history(self, utterance_id: Optional[int], history_id: Optional[int]):
+        """ربط جملة مؤرشفة بصف جدول history (يُنفذ في خيط الكتابة بعد كتابتها)"""
+        if utterance_id is None or history_id is None:
+            return False
+        return self._put_control(('link', utterance_id, history_id), 'dropped_links')
+    
+    def mark_retranscribed(self, utterance_id: int, model: str):
+        """تسجيل أن الجملة أُعيد تعرفها بالنموذج المحدد (عبر خيط الكتابة)"""
+        return self._put_control(('retranscribed', utterance_id, model), 'dropped_marks')
+    
+    def _put_control(self, item, counter):
+        """
+        وضع أمر تحديث للفهرس في طابور الكاتب بانتظار محدود
+        
+        الربط الضائع يحرم الجملة من إعادة التعرف إلى الأبد، فيُنتظر مكان قليلاً
+        بدل الإسقاط الفوري؛ ومع كاتب متوقف لا يُنتظر أبداً. الأمر المُسقط يُعدّ في stats.
+        
+        Returns:
+            True إذا وُضع الأمر في الطابور
+        """
+        if self._writer.is_alive():
+            try:
+                self._queue.put(item, timeout=self.CONTROL_TIMEOUT)
+                return True
+            except queue.Full:
+                pass
+        self.stats[counter] += 1
+        return False
+    
+    def pending_retranscription(self, model: str, limit: int = 20):
+        """
+        الجمل المرتبطة بالسجل التي لم يُعد تعرفها بهذا النموذج (الأحدث أولاً)
+        
+        Returns:
+            [(رقم الجملة, رقم صف history, اللغة), ...]
+        """
+        conn = self._connect()
+        try:
+            return conn.execute(
+                "SELECT id, history_id, language FROM utterances "
+                "WHERE history_id IS NOT NULL AND (retranscribed IS NULL OR retranscribed != ?) "
+                "ORDER BY id DESC LIMIT ?",
+                (model, limit)
+            ).fetchall()
+        finally:
+            conn.close()
+
+    def _write_loop(self):
+        # اتصال SQLite ومقبض المقطع يملكهما هذا الخيط وحده
+        conn = self._connect()
+        handle = open(self._segment_path(self._segment), 'ab')
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    self._queue.task_done()
+                    break
+                try:
+                    if item[0] == 'link':
+                        conn.execute("UPDATE utterances SET history_id = ? WHERE id = ?",
+                                     (item[2], item[1]))
+                    elif item[0] == 'retranscribed':
+                        conn.execute("UPDATE utterances SET retranscribed = ? WHERE id = ?",
+                                     (item[2], item[1]))
+                    else:
+                        handle = self._write_utterance(conn, handle, *item[1:])
+                    # تجميع ما تراكم في الطابور في معاملة واحدة
+                    if self._queue.empty():
+                        conn.commit()
+                except Exception as e:
+                    print(f"⚠️ خطأ في أرشفة الصوت: {e}")
+                finally:
+                    self._queue.task_done()
+        finally:
+            handle.close()
+            conn.commit()
+            conn.close()
+
+    def _write_utterance(self, conn, handle, utterance_id, pcm, sample_rate, result, created):
+        started = time.perf_counter()
+        blob = encode_pcm(pcm, sample_rate, self.codec)
+
+        if self._segment_size and self._segment_size + len(blob) > self.max_segment_bytes:
+            handle.close()
+            self._segment += 1
+            self._segment_size = 0
+            handle = open(self._segment_path(self._segment), 'ab')
+            self.stats['rotated'] += 1
+            conn.commit()
+            self._enforce_total_size(conn)
+
+        offset = self._segment_size
+        handle.write(blob)
+        handle.flush()
+        self._segment_size += len(blob)
+
+        conn.execute(
+            "INSERT INTO utterances (id, segment, offset, size, codec, sample_rate, samples, "
+            "created, text, engine, language, channel, confidence, processing_time) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (utterance_id, self._segment, offset, len(blob), self.codec, sample_rate,
+             len(pcm) // 2, created.isoformat(),
+             getattr(result, 'text', None), getattr(result, 'engine', None),
+             getattr(result, 'language', None), getattr(result, 'channel', None),
+             getattr(result, 'confidence', None), getattr(result, 'processing_time', None))
+        )
+
+        self.stats['archived'] += 1
+        self.stats['raw_bytes'] += len(pcm)
+        self.stats['stored_bytes'] += len(blob)
+        self.stats['write_ms'] += (time.perf_counter() - started) * 1000
+        return handle
+
+    def _enforce_total_size(self, conn):
+        """حذف أقدم المقاطع (عدا الحالي) حتى يعود الأرشيف تحت حده الكلي"""
+        if not self.max_total_bytes:
+            return
+        segments = self._segments()
+        total = sum(os.path.getsize(self._segment_path(s)) for s in segments)
+        for segment in segments:
+            if total <= self.max_total_bytes or segment == self._segment:
+                break
+            path = self._segment_path(segment)
+            total -= os.path.getsize(path)
+            conn.execute("DELETE FROM utterances WHERE segment = ?", (segment,))
+            conn.commit()
+            os.remove(path)
+
+    def read(self, utterance_id: int):
+        """
+        قراءة جملة مؤرشفة
+
+        Returns:
+            (بايتات PCM, معدل العينات) أو None إذا لم تُكتب بعد أو حُذفت بالتدوير
+        """
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT segment, offset, size, codec, sample_rate FROM utterances WHERE id = ?",
+                (utterance_id,)
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        segment, offset, size, codec, sample_rate = row
+        try:
+            with open(self._segment_path(segment), 'rb') as f:
+                f.seek(offset)
+                blob = f.read(size)
+        except FileNotFoundError:
+            return None
+        return decode_pcm(blob, codec), sample_rate
+
+    def find_by_history(self, history_id: int) -> Optional[int]:
+        """رقم الجملة المؤرشفة المرتبطة بصف history"""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT id FROM utterances WHERE history_id = ?",
+                               (history_id,)).fetchone()
+        finally:
+            conn.close()
+        return row[0] if row else None
+
+    def export_wav(self, utterance_id: int, path) -> bool:
+        """تصدير جملة مؤرشفة إلى ملف WAV"""
+        audio = self.read(utterance_id)
+        if audio is None:
+            return False
+        pcm, sample_rate = audio
+        with wave.open(str(path), 'wb') as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(sample_rate)
+            wf.writeframes(pcm)
+        return True
+
+    def flush(self, timeout=5.0):
+        """انتظار كتابة كل ما في الطابور"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def close(self, timeout=5.0):
+        """كتابة المتبقي وإيقاف خيط الكتابة"""
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join(timeout)
+
+    def get_stats(self):
+        """إحصائيات الأرشفة: العدد والحجم قبل وبعد الضغط وزمن الكتابة"""
+        stats = dict(self.stats)
+        stats['pending'] = self._queue.qsize()
+        stats['codec'] = self.codec
+        stats['ratio'] = stats['raw_bytes'] / stats['stored_bytes'] if stats['stored_bytes'] else 0.0
+        stats['mean_write_ms'] = stats['write_ms'] / stats['archived'] if stats['archived'] else 0.0
+        return stats
+
+
+_shared_archive = None
+_shared_archive_lock = threading.Lock()
+
+
+def create_archive_from_config() -> Optional[AudioArchive]:
+    """
+    الأرشيف المشترك من إعدادات config.py (None إذا كان معطلاً)
+
+    نسخة واحدة لكل عملية: أرشيفان على المجلد نفسه يشغّلان كاتبين على الفهرس
+    نفسه فتتصادم معرفات الجمل. يُنشأ من جديد فقط بعد close().
+    """
+    global _shared_archive
+    if not CONFIG_AVAILABLE or not getattr(config, 'AUDIO_ARCHIVE_ENABLED', False):
+        return None
+    with _shared_archive_lock:
+        if _shared_archive is None or not _shared_archive._writer.is_alive():
+            max_total_mb = getattr(config, 'AUDIO_ARCHIVE_MAX_MB', 1024)
+            _shared_archive = AudioArchive(
+                getattr(config, 'AUDIO_ARCHIVE_DIR'),
+                max_segment_bytes=getattr(config, 'AUDIO_ARCHIVE_SEGMENT_MB', 64) * 1024 * 1024,
+                max_total_bytes=max_total_mb * 1024 * 1024 if max_total_mb else None,
+                codec=getattr(config, 'AUDIO_ARCHIVE_CODEC', None)
+            )
+        return _shared_archive
+
+
+def test_audio_archive():
+    """اختبار الأرشفة والقراءة والتدوير بصوت اصطناعي في مجلد مؤقت"""
+    import tempfile
+
+    print("🧪 اختبار أرشيف الصوت")
+    print("=" * 50)
+
+    rng = np.random.default_rng(0)
+    t = np.arange(16000 * 2) / 16000
+    utterances = []
+    for i in range(12):
+        tone = 4000 * np.sin(2 * np.pi * (180 + 20 * i) * t) * np.hanning(len(t))
+        noise = rng.normal(0, 60, len(t))
+        utterances.append(np.clip(tone + noise, -32768, 32767).astype(np.int16).tobytes())
+
+    with tempfile.TemporaryDirectory() as directory:
+        archive = AudioArchive(directory, max_segment_bytes=128 * 1024,
+                               max_total_bytes=320 * 1024, codec='zdelta')
+
+        started = time.perf_counter()
+        ids = [archive.submit(pcm, 16000) for pcm in utterances]
+        submit_ms = (time.perf_counter() - started) * 1000 / len(ids)
+        for history_id, utterance_id in enumerate(ids, start=100):
+            archive.link_history(utterance_id, history_id)
+        archive.flush()
+
+        stats = archive.get_stats()
+        print(f"⏱️ زمن التسليم: {submit_ms:.3f} ms/جملة (الكتابة {stats['mean_write_ms']:.1f} ms في الخلفية)")
+        print(f"📦 {stats['archived']} جملة، ضغط {stats['ratio']:.2f}x، {stats['rotated']} تدوير")
+
+        assert archive.read(ids[-1])[0] == utterances[-1], "فك الضغط غير مطابق"
+        assert archive.find_by_history(100 + len(ids) - 1) == ids[-1]
+        assert archive.read(ids[0]) is None, "أقدم مقطع لم يُحذف بالتدوير"
+        archive.close()
+        print("✅ القراءة مطابقة والتدوير يحذف أقدم المقاطع")
+
+
+if __name__ == "__main__":
+    test_audio_archive()
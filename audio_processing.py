@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+"""
+أدوات معالجة الصوت قبل التعرف - عمليات متجهة بـ NumPy على عينات int16
+"""
+
+import time
+
+import numpy as np
+
+# عتبة الصمت (أقصى سعة int16) - نفس العتبة المستخدمة في حلقة الاستماع
+SILENCE_THRESHOLD = 500
+
+
+def trim_silence(samples, threshold=SILENCE_THRESHOLD, sample_rate=16000,
+                 block_ms=20, margin_ms=200):
+    """
+    قص الصمت من بداية ونهاية المقطع باستخدام قناع الطاقة
+
+    Args:
+        samples: مصفوفة عينات int16
+        threshold: عتبة السعة التي يُعتبر تحتها المقطع صامتاً
+        sample_rate: معدل العينات
+        block_ms: طول الكتلة التي تُقاس طاقتها (بالميلي ثانية)
+        margin_ms: هامش يُترك قبل وبعد الكلام حتى لا تُقص أطراف الكلمات
+
+    Returns:
+        العينات بعد القص (مصفوفة فارغة إذا كان المقطع كله صمتاً)
+    """
+    block = sample_rate * block_ms // 1000
+    n_blocks = len(samples) // block
+    if n_blocks == 0:
+        return samples
+
+    # int32 لتجنب فيضان abs(-32768) في int16
+    blocks = samples[:n_blocks * block].reshape(n_blocks, block).astype(np.int32)
+    voiced = np.flatnonzero(np.abs(blocks).max(axis=1) >= threshold)
+    if len(voiced) == 0:
+        return samples[:0]
+
+    margin = sample_rate * margin_ms // 1000
+    start = max(0, voiced[0] * block - margin)
+    end = min(len(samples), (voiced[-1] + 1) * block + margin)
+    return samples[start:end]
+
+
+def split_at_silences(samples, max_samples, threshold=SILENCE_THRESHOLD,
+                      sample_rate=16000, block_ms=20):
+    """
+    تقسيم مقطع طويل إلى أجزاء لا يتجاوز كل منها max_samples
+
+    يُقطع كل جزء عند أهدأ كتلة في نصفه الثاني (غالباً وقفة بين كلمتين)
+    حتى لا تنقسم كلمة بين طلبين، وتُحذف الأجزاء الصامتة تماماً.
+
+    Args:
+        samples: مصفوفة عينات int16
+        max_samples: أقصى طول للجزء (بالعينات)
+        threshold: عتبة السعة التي يُعتبر تحتها الجزء صامتاً
+        sample_rate: معدل العينات
+        block_ms: دقة البحث عن نقطة القطع (بالميلي ثانية)
+
+    Returns:
+        قائمة مصفوفات int16 متتالية
+    """
+    block = sample_rate * block_ms // 1000
+    if len(samples) <= max_samples or max_samples < 2 * block:
+        return [samples] if len(samples) else []
+
+    n_blocks = len(samples) // block
+    energy = np.abs(samples[:n_blocks * block].reshape(n_blocks, block).astype(np.int32)).max(axis=1)
+
+    chunks = []
+    start = 0
+    while len(samples) - start > max_samples:
+        low = (start + max_samples // 2) // block
+        high = min((start + max_samples) // block, n_blocks)
+        cut = (low + int(np.argmin(energy[low:high]))) * block + block // 2
+        chunks.append(samples[start:cut])
+        start = cut
+    chunks.append(samples[start:])
+
+    return [chunk for chunk in chunks if np.abs(chunk.astype(np.int32)).max() >= threshold]
+
+
+def int16_to_float32(samples):
+    """تحويل عينات int16 إلى float32 في المجال [-1, 1] (الصيغة التي يتوقعها Whisper)"""
+    return samples.astype(np.float32) / 32768.0
+
+
+class AudioFrontEnd:
+    """
+    معالجة أولية للصوت الملتقط كتلة بكتلة قبل التعرف
+
+    - مرشح تمرير عالٍ: إزالة DC والطنين (50/60 Hz) بتصفير الترددات المنخفضة
+    - طرح طيفي للضوضاء بملف ضوضاء متجدد من الإطارات الهادئة
+    - تحكم تلقائي في الكسب (AGC) يتكيف أثناء الكلام فقط
+
+    STFT بنافذة sqrt-Hann وتداخل 50% يُحسب لكل إطارات الكتلة دفعة واحدة،
+    والمخرج بنفس طول المدخل مع تأخير ثابت بطول إطار واحد. المخازن محجوزة
+    مسبقاً، وزمن كل كتلة يُقاس مقابل ميزانية من مدتها: إذا تجاوزها باستمرار
+    تتوقف المعالجة ويمر الصوت كما هو بدلاً من تأخير الالتقاط.
+    """
+
+    def __init__(self, sample_rate=16000, block_size=2000, frame_size=512,
+                 highpass_hz=90, noise_reduction=True, agc=True,
+                 over_subtraction=1.5, spectral_floor=0.1, noise_adapt=0.95,
+                 agc_target=3000, agc_max_gain=8.0, cpu_budget=0.15, max_over_budget=10):
+        """
+        Args:
+            sample_rate: معدل العينات
+            block_size: طول الكتلة المتوقع من حلقة الالتقاط (لحجز المخازن)
+            frame_size: طول إطار FFT (زوجي)
+            highpass_hz: تردد القطع للمرشح العالي (0 للتعطيل)
+            noise_reduction: تفعيل الطرح الطيفي
+            agc: تفعيل التحكم التلقائي في الكسب
+            over_subtraction: معامل المبالغة في طرح الضوضاء
+            spectral_floor: أدنى كسب لكل تردد (يحد من "الضوضاء الموسيقية")
+            noise_adapt: معامل تنعيم ملف الضوضاء (أقرب إلى 1 = تكيف أبطأ)
+            agc_target: مستوى RMS المستهدف للكلام (int16)
+            agc_max_gain: أقصى تضخيم
+            cpu_budget: أقصى نسبة من مدة الكتلة يُسمح أن تستغرقها معالجتها
+            max_over_budget: عدد الكتل المتتالية فوق الميزانية قبل إيقاف المعالجة
+        """
+        self.sample_rate = sample_rate
+        self.frame_size = frame_size
+        self.hop = frame_size // 2
+        self.noise_reduction = noise_reduction
+        self.agc = agc
+        self.over_subtraction = over_subtraction
+        self.spectral_floor = spectral_floor
+        self.noise_adapt = noise_adapt
+        self.agc_target = agc_target
+        self.agc_max_gain = agc_max_gain
+        self.cpu_budget = cpu_budget
+        self.max_over_budget = max_over_budget
+
+        # sqrt-Hann دورية للتحليل والتركيب: مربعها (Hann) مجموعه 1 عند تداخل 50%
+        self._window = np.sqrt(0.5 - 0.5 * np.cos(2 * np.pi * np.arange(frame_size) / frame_size))
+        self._window = self._window.astype(np.float32)
+        self._highpass_bins = int(np.ceil(highpass_hz * frame_size / sample_rate)) if highpass_hz else 0
+
+        self._allocate(block_size)
+        self.reset()
+
+    def _allocate(self, block_size):
+        """حجز المخازن لأكبر كتلة متوقعة"""
+        self._block_size = block_size
+        self._pending = np.zeros(block_size + self.frame_size, dtype=np.float32)
+        self._output = np.zeros(block_size + 2 * self.frame_size, dtype=np.float32)
+        self._tail = np.zeros(self.hop, dtype=np.float32)
+
+    def reset(self):
+        """مسح الحالة بين جلسات الاستماع (ملف الضوضاء والكسب والمخازن)"""
+        self._pending_len = 0
+        # المخرج يبدأ بإطار صامت واحد: التأخير الثابت الذي يضمن مخرجاً بطول كل مدخل
+        self._output[:self.frame_size] = 0.0
+        self._output_len = self.frame_size
+        self._tail[:] = 0.0
+        self._noise = None
+        self._gain = 1.0
+        self._over_budget_count = 0
+        self.bypassed = False
+        self.stats = {'blocks': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'over_budget': 0}
+
+    def process(self, data):
+        """
+        معالجة كتلة واحدة
+
+        Args:
+            data: بايتات int16 mono
+
+        Returns:
+            بايتات int16 بنفس الطول
+        """
+        if self.bypassed:
+            return data
+
+        started = time.perf_counter()
+        samples = np.frombuffer(data, dtype=np.int16)
+        n = len(samples)
+        if n > self._block_size:
+            self._allocate(n)
+            self.reset()
+
+        self._pending[self._pending_len:self._pending_len + n] = samples
+        self._pending_len += n
+
+        n_frames = (self._pending_len - self.frame_size) // self.hop + 1
+        if n_frames > 0:
+            produced = self._process_frames(n_frames)
+            self._output[self._output_len:self._output_len + len(produced)] = produced
+            self._output_len += len(produced)
+
+            consumed = n_frames * self.hop
+            self._pending[:self._pending_len - consumed] = self._pending[consumed:self._pending_len]
+            self._pending_len -= consumed
+
+        out = self._output[:n].copy()
+        self._output[:self._output_len - n] = self._output[n:self._output_len]
+        self._output_len -= n
+
+        if self.agc:
+            out = self._apply_agc(out)
+
+        result = np.clip(out, -32768, 32767).astype(np.int16).tobytes()
+        self._account(started, n)
+        return result
+
+    def _process_frames(self, n_frames):
+        """STFT لكل الإطارات الجاهزة دفعة واحدة ثم إعادة التركيب بالجمع المتداخل"""
+        frames = np.lib.stride_tricks.sliding_window_view(
+            self._pending[:self._pending_len], self.frame_size
+        )[::self.hop][:n_frames]
+        spectra = np.fft.rfft(frames * self._window, axis=1)
+
+        spectra[:, :self._highpass_bins] = 0
+        if self.noise_reduction:
+            spectra *= self._noise_gain(np.abs(spectra))
+
+        frames_out = np.fft.irfft(spectra, n=self.frame_size, axis=1).astype(np.float32)
+        frames_out *= self._window
+
+        # النصف الأول من كل إطار + النصف الثاني من الإطار السابق
+        produced = frames_out[:, :self.hop].copy()
+        produced[0] += self._tail
+        produced[1:] += frames_out[:-1, self.hop:]
+        self._tail[:] = frames_out[-1, self.hop:]
+        return produced.ravel()
+
+    def _noise_gain(self, magnitude):
+        """كسب الطرح الطيفي لكل إطار وتردد، مع تحديث ملف الضوضاء من الإطارات الهادئة"""
+        if self._noise is None:
+            # أول كتلة تُعتبر ضوضاء خلفية، ثم يتصحح الملف من الإطارات الهادئة
+            self._noise = magnitude.mean(axis=0)
+        else:
+            quiet = magnitude.sum(axis=1) < 2.0 * self._noise.sum()
+            if quiet.any():
+                self._noise = (self.noise_adapt * self._noise
+                               + (1.0 - self.noise_adapt) * magnitude[quiet].mean(axis=0))
+
+        gain = 1.0 - self.over_subtraction * self._noise / np.maximum(magnitude, 1e-6)
+        return np.maximum(gain, self.spectral_floor)
+
+    def _apply_agc(self, out):
+        """تكبير الكلام نحو المستوى المستهدف: هجوم سريع عند الارتفاع وتحرير بطيء"""
+        previous = self._gain
+        rms = float(np.sqrt(np.mean(out * out))) if len(out) else 0.0
+        # التكيف أثناء الكلام فقط حتى لا يُضخَّم الصمت فيُفسد كشف نهاية الجملة
+        if rms * previous > SILENCE_THRESHOLD / 2:
+            desired = min(max(self.agc_target / rms, 0.25), self.agc_max_gain)
+            rate = 0.5 if desired < previous else 0.05
+            self._gain = previous + rate * (desired - previous)
+        # تدرّج الكسب عبر الكتلة بدلاً من قفزة مسموعة
+        return out * np.linspace(previous, self._gain, len(out), dtype=np.float32)
+
+    def _account(self, started, n):
+        """قياس زمن الكتلة مقابل الميزانية وإيقاف المعالجة إذا تجاوزتها باستمرار"""
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        budget_ms = n / self.sample_rate * 1000 * self.cpu_budget
+
+        self.stats['blocks'] += 1
+        self.stats['total_ms'] += elapsed_ms
+        self.stats['max_ms'] = max(self.stats['max_ms'], elapsed_ms)
+        if elapsed_ms > budget_ms:
+            self.stats['over_budget'] += 1
+            self._over_budget_count += 1
+            if self._over_budget_count >= self.max_over_budget:
+                self.bypassed = True
+                print(f"⚠️ المعالجة الأولية تجاوزت ميزانيتها ({elapsed_ms:.1f}/{budget_ms:.1f} ms) "
+                      f"- تم إيقافها")
+        else:
+            self._over_budget_count = 0
+
+    def get_stats(self):
+        """إحصائيات زمن المعالجة لكل كتلة"""
+        blocks = self.stats['blocks']
+        return {
+            **self.stats,
+            'mean_ms': self.stats['total_ms'] / blocks if blocks else 0.0,
+            'budget_ms': self._block_size / self.sample_rate * 1000 * self.cpu_budget,
+            'bypassed': self.bypassed,
+        }
+
+
+class StreamingResampler:
+    """
+    تحويل معدل العينات أثناء البث (مثل 48000 أو 44100 → 16000)
+
+    مرشح polyphase بنافذة Kaiser لنسبة كسرية مختصرة (up/down): كل عينة خرج
+    هي حاصل ضرب نافذة من المدخل في طور واحد من المرشح، وتُحسب كل عينات
+    الكتلة دفعة واحدة. حالة المدخل السابق تُحفظ بين الكتل فلا تظهر حدود الكتل.
+    """
+
+    def __init__(self, in_rate, out_rate=16000, zero_crossings=32, rolloff=0.9, block_size=6000):
+        """
+        Args:
+            in_rate: معدل الجهاز الأصلي
+            out_rate: المعدل المطلوب
+            zero_crossings: طول المرشح بأطوال موجة القطع (أكثر = انتقال أحدّ وحساب أكثر)
+            rolloff: تردد القطع كنسبة من نصف المعدل الأصغر
+            block_size: أكبر كتلة مدخل متوقعة (لحجز المخزن)
+        """
+        divisor = int(np.gcd(int(in_rate), int(out_rate)))
+        self.in_rate = int(in_rate)
+        self.out_rate = int(out_rate)
+        self.up = self.out_rate // divisor
+        self.down = self.in_rate // divisor
+        # عدد معاملات كل طور بعينات المدخل: يكبر مع نسبة التخفيض ليبقى عرض الانتقال ثابتاً
+        self.taps = taps = 2 * zero_crossings * int(np.ceil(self.in_rate / self.out_rate))
+
+        # المرشح الأولي بمعدل up × in_rate، وكسبه up لتعويض الحشو بالأصفار
+        length = taps * self.up
+        cutoff = rolloff * min(self.in_rate, self.out_rate) / 2 / (self.in_rate * self.up)
+        m = np.arange(length) - (length - 1) / 2
+        prototype = 2 * cutoff * np.sinc(2 * cutoff * m) * np.kaiser(length, 8.6) * self.up
+        # bank[p] = معاملات الطور p معكوسة لتطابق نافذة المدخل المتصاعدة
+        self._bank = prototype.reshape(taps, self.up).T[:, ::-1].astype(np.float32).copy()
+
+        self._buffer = np.zeros(block_size + taps, dtype=np.float32)
+        self.reset()
+
+    def reset(self):
+        """مسح حالة البث"""
+        # المخزن يبدأ بـ taps-1 أصفار كتاريخ للمدخل (الفهرس المطلق لأول عنصر سالب)
+        self._buffer[:self.taps - 1] = 0.0
+        self._length = self.taps - 1
+        self._offset = -(self.taps - 1)
+        self._produced = 0
+        self.stats = {'blocks': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'audio_ms': 0.0}
+
+    def process(self, data):
+        """
+        تحويل كتلة واحدة
+
+        Args:
+            data: بايتات int16 mono بمعدل in_rate
+
+        Returns:
+            بايتات int16 بمعدل out_rate (قد يختلف طولها بعينة بين الكتل)
+        """
+        started = time.perf_counter()
+        samples = np.frombuffer(data, dtype=np.int16)
+        n = len(samples)
+        if self._length + n > len(self._buffer):
+            grown = np.zeros(self._length + n + self.taps, dtype=np.float32)
+            grown[:self._length] = self._buffer[:self._length]
+            self._buffer = grown
+        self._buffer[self._length:self._length + n] = samples
+        self._length += n
+
+        # كل عينات الخرج التي توفرت مدخلاتها: floor(k × down / up) ≤ آخر فهرس مدخل
+        last_input = self._offset + self._length - 1
+        last_output = (last_input * self.up + self.up - 1) // self.down
+        outputs = np.arange(self._produced, last_output + 1)
+        positions = outputs * self.down
+        bases = positions // self.up
+
+        windows = np.lib.stride_tricks.sliding_window_view(self._buffer[:self._length], self.taps)
+        rows = bases - self._offset - (self.taps - 1)
+        out = np.einsum('ij,ij->i', windows[rows], self._bank[positions % self.up])
+        self._produced = last_output + 1
+
+        # الإبقاء على آخر taps-1 عينة قبل أول مدخل تحتاجه العينة التالية
+        next_base = (self._produced * self.down) // self.up
+        keep_from = next_base - (self.taps - 1) - self._offset
+        remaining = self._length - keep_from
+        self._buffer[:remaining] = self._buffer[keep_from:self._length]
+        self._length = remaining
+        self._offset += keep_from
+
+        result = np.clip(np.round(out), -32768, 32767).astype(np.int16).tobytes()
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.stats['blocks'] += 1
+        self.stats['total_ms'] += elapsed_ms
+        self.stats['max_ms'] = max(self.stats['max_ms'], elapsed_ms)
+        self.stats['audio_ms'] += n / self.in_rate * 1000
+        return result
+
+    def get_stats(self):
+        """زمن التحويل لكل كتلة ونسبته من مدة الصوت"""
+        blocks = self.stats['blocks']
+        return {
+            **self.stats,
+            'mean_ms': self.stats['total_ms'] / blocks if blocks else 0.0,
+            'load': self.stats['total_ms'] / self.stats['audio_ms'] if self.stats['audio_ms'] else 0.0,
+        }
+
+
+def test_front_end(seconds=10, sample_rate=16000, block_size=2000):
+    """قياس المعالجة الأولية على إشارة اصطناعية: نغمة + طنين 50Hz + ضوضاء بيضاء"""
+    print("🧪 اختبار المعالجة الأولية للصوت")
+    print("=" * 50)
+
+    rng = np.random.default_rng(0)
+    t = np.arange(seconds * sample_rate) / sample_rate
+    speech = 2000 * np.sin(2 * np.pi * 440 * t) * (np.sin(2 * np.pi * 0.25 * t) > 0)
+    noise = 800 * np.sin(2 * np.pi * 50 * t) + 300 * rng.standard_normal(len(t)) + 400
+    signal = np.clip(speech + noise, -32768, 32767).astype(np.int16)
+
+    front_end = AudioFrontEnd(sample_rate=sample_rate, block_size=block_size)
+    output = b''.join(
+        front_end.process(signal[i:i + block_size].tobytes())
+        for i in range(0, len(signal), block_size)
+    )
+    processed = np.frombuffer(output, dtype=np.int16).astype(np.float64)
+
+    # مقارنة الأجزاء الصامتة (بعد تعويض التأخير الثابت)
+    delay = front_end.frame_size
+    silent = speech[:len(processed) - delay] == 0
+    before = np.sqrt(np.mean(signal[:len(processed) - delay][silent].astype(np.float64) ** 2))
+    after = np.sqrt(np.mean(processed[delay:][silent] ** 2))
+
+    stats = front_end.get_stats()
+    print(f"✅ {stats['blocks']} كتلة: متوسط {stats['mean_ms']:.2f} ms، أقصى {stats['max_ms']:.2f} ms "
+          f"(الميزانية {stats['budget_ms']:.1f} ms، تجاوزات: {stats['over_budget']})")
+    print(f"✅ الضوضاء في الصمت: RMS {before:.0f} → {after:.0f}")
+
+
+def test_resampler(seconds=5):
+    """قياس التحويل من 48000 و 44100 إلى 16000: زمن الكتلة ودقة التردد وكبح التداخل"""
+    print("\n🧪 اختبار تحويل معدل العينات")
+    print("=" * 50)
+
+    for in_rate in (48000, 44100):
+        t = np.arange(seconds * in_rate) / in_rate
+        block = int(round(2000 * in_rate / 16000))
+
+        def resample(frequency):
+            resampler = StreamingResampler(in_rate, 16000)
+            signal = (16000 * np.sin(2 * np.pi * frequency * t)).astype(np.int16)
+            output = np.frombuffer(b''.join(
+                resampler.process(signal[i:i + block].tobytes())
+                for i in range(0, len(signal), block)
+            ), dtype=np.int16).astype(np.float64)
+            return resampler, output
+
+        # 1 kHz يجب أن يبقى، و 10 kHz (فوق 8 kHz) يجب أن يُكبح بدل أن ينعكس إلى 6 kHz
+        resampler, output = resample(1000)
+        _, aliased = resample(10000)
+        tone = np.sqrt(np.mean(output[16000:] ** 2))
+        alias = max(np.sqrt(np.mean(aliased[16000:] ** 2)), 0.5)  # حد دقة int16
+
+        stats = resampler.get_stats()
+        print(f"✅ {in_rate} → 16000 ({resampler.up}/{resampler.down}): {len(output)} عينة، "
+              f"{stats['mean_ms']:.2f} ms/كتلة (أقصى {stats['max_ms']:.2f})، "
+              f"الحمل {stats['load'] * 100:.2f}%، كبح التداخل {20 * np.log10(tone / alias):.0f} dB")
+
+
+if __name__ == "__main__":
+    test_front_end()
+    test_resampler()
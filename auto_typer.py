@@ -4,54 +4,64 @@
 """
 
 import time
+import queue
 import threading
 import platform
+import unicodedata
 
-try:
-    import keyboard
-    KEYBOARD_AVAILABLE = True
-except ImportError:
-    KEYBOARD_AVAILABLE = False
+from text_replacer import AhoCorasickReplacer
+from typing_backends import create_backend
 
 try:
-    import pyautogui
-    PYAUTOGUI_AVAILABLE = True
+    import config
+    CONFIG_AVAILABLE = True
 except ImportError:
-    PYAUTOGUI_AVAILABLE = False
+    CONFIG_AVAILABLE = False
+
+
+def _config_value(name, default=None):
+    """قراءة قيمة من config.py مع قيمة افتراضية إذا لم يكن متاحاً"""
+    if CONFIG_AVAILABLE:
+        return getattr(config, name, default)
+    return default
 
 
 class AutoTyper:
     """نظام الكتابة التلقائية في أي تطبيق"""
     
-    def __init__(self, method='keyboard', delay=0.001):
+    def __init__(self, method='keyboard', delay=0.001, paste_threshold=None, paste_settle=None,
+                 backend=None):
         """
         تهيئة نظام الكتابة
         
         Args:
-            method: طريقة الكتابة ('keyboard' أو 'pyautogui')
+            method: طريقة الكتابة ('keyboard' أو 'pyautogui' أو 'recording' للاختبار بدون شاشة)
             delay: التأخير بين الأحرف (بالثواني) - محسّن للسرعة (افتراضي: 0.003)
+            paste_threshold: طول النص الذي يُلصق عنده عبر الحافظة دفعة واحدة
+                بدلاً من ضغطات المفاتيح (None = من الإعدادات، 0 = اللصق دائماً)
+            paste_settle: انتظار بعد اللصق حتى يقرأ التطبيق الحافظة قبل استعادتها (بالثواني)
+            backend: كائن TypingBackend جاهز (يتجاوز method)، مثل RecordingBackend للقياس
         """
-        self.method = method.lower()
+        # واجهة الحقن (typing_backends.py)، مع الرجوع للمكتبة الأخرى إذا لم تكن مثبتة
+        self.backend = backend if backend is not None else create_backend(method)
+        self.method = self.backend.name
         self.delay = delay
         self.is_enabled = True
+        self.paste_threshold = (paste_threshold if paste_threshold is not None
+                                else _config_value('TYPING_PASTE_THRESHOLD', 20))
+        self.paste_settle = (paste_settle if paste_settle is not None
+                             else _config_value('TYPING_PASTE_SETTLE', 0.03))
+        self.last_strategy = None  # 'paste' أو 'keys' لآخر نص
+        self.last_type_time = 0.0  # زمن كتابة آخر نص (بالثواني)
         
-        # اختيار الطريقة المتاحة
-        if self.method == 'keyboard' and not KEYBOARD_AVAILABLE:
-            if PYAUTOGUI_AVAILABLE:
-                print("⚠️ keyboard غير متاح، استخدام pyautogui")
-                self.method = 'pyautogui'
-            else:
-                raise ImportError("يجب تثبيت keyboard أو pyautogui")
-        elif self.method == 'pyautogui' and not PYAUTOGUI_AVAILABLE:
-            if KEYBOARD_AVAILABLE:
-                print("⚠️ pyautogui غير متاح، استخدام keyboard")
-                self.method = 'keyboard'
-            else:
-                raise ImportError("يجب تثبيت keyboard أو pyautogui")
+        # الكتابة التزايدية للفرضيات الجزئية: ما كُتب فعلاً من الجملة الجارية في الحقل
+        self.live_text = ""
+        self.revision_stats = {'revisions': 0, 'backspaces': 0, 'typed': 0, 'naive': 0}
         
-        # إعداد Failsafe للـ pyautogui
-        if self.method == 'pyautogui':
-            pyautogui.FAILSAFE = True
+        # محلل الأوامر الصوتية (يُبنى عند أول استخدام): من ملف VOICE_COMMANDS_FILE
+        # المراقب إن حُدد، وإلا من config.VOICE_COMMANDS
+        self.command_tokenizer = None
+        self.command_watcher = None
     
     def type_text(self, text):
         """
@@ -69,97 +79,212 @@ class AutoTyper:
         # إزالة التأخير تماماً لأقصى سرعة
         # time.sleep(0.005)  # تأخير أدنى إن لزم فقط
         
+        self._inject(text)
+    
+    def type_raw(self, text):
+        """كتابة النص كما هو، حتى لو كان مسافات أو سطراً جديداً فقط"""
+        if self.is_enabled and text:
+            self._inject(text)
+    
+    def _inject(self, text):
+        """
+        حقن النص بالطريقة المناسبة لطوله (لصق أو ضغطات مفاتيح)
+        
+        Returns:
+            True إذا أُرسل النص كاملاً، False إذا فشلت الكتابة (الخطأ يُطبع ولا يُرفع)
+        """
+        started = time.perf_counter()
         try:
-            if self.method == 'keyboard':
-                self._type_with_keyboard(text)
-            elif self.method == 'pyautogui':
-                self._type_with_pyautogui(text)
+            self.last_strategy = self._choose_strategy(text)
+            if self.last_strategy == 'paste':
+                try:
+                    self._paste_text(text)
+                    return True
+                except Exception as e:
+                    print(f"⚠️ فشل اللصق، الكتابة بالمفاتيح: {e}")
+                    self.last_strategy = 'keys'
+            
+            return self._type_keys(text)
         except Exception as e:
             print(f"❌ خطأ في الكتابة: {e}")
+            return False
+        finally:
+            self.last_type_time = time.perf_counter() - started
     
-    def _type_with_keyboard(self, text):
-        """الكتابة باستخدام مكتبة keyboard"""
-        # keyboard.write يدعم Unicode والعربية بشكل جيد
-        keyboard.write(text, delay=self.delay)
+    def _choose_strategy(self, text):
+        """
+        اختيار طريقة الكتابة: 'paste' أو 'keys'
+        
+        الكتابة حرفاً حرفاً تكلف ضغطة (وتأخيراً) لكل حرف، بينما اللصق كلفته
+        ثابتة تقريباً (نسخ + Ctrl+V + انتظار قراءة الحافظة + استعادتها)،
+        فالنصوص الطويلة تُلصق والقصيرة تُكتب بالمفاتيح.
+        """
+        if not self.backend.has_clipboard or self.paste_threshold is None:
+            return 'keys'
+        if len(text) >= self.paste_threshold:
+            return 'paste'
+        return 'keys'
     
-    def _type_with_pyautogui(self, text):
-        """الكتابة باستخدام pyautogui"""
-        # pyautogui.write قد لا يدعم العربية بشكل كامل
-        # لذا نستخدم طريقة بديلة
-        for char in text:
-            if char == ' ':
-                pyautogui.press('space')
-            elif char == '\n':
-                pyautogui.press('enter')
-            else:
-                # محاولة كتابة الحرف مباشرة
-                try:
-                    pyautogui.write(char, interval=self.delay)
-                except:
-                    # إذا فشلت، استخدم clipboard
-                    self._type_with_clipboard(char)
-            # تم تقليل التأخير - pyautogui.write يتعامل مع التأخير تلقائياً
-    
-    def _type_with_clipboard(self, text):
-        """الكتابة باستخدام الحافظة (للأحرف العربية)"""
+    def _paste_text(self, text):
+        """لصق النص كاملاً عبر الحافظة مع استعادة محتواها الأصلي مرة واحدة"""
+        original = self._read_clipboard()
         try:
-            import pyperclip
-            original = pyperclip.paste()
-            pyperclip.copy(text)
-            
-            if platform.system() == 'Darwin':
-                pyautogui.hotkey('command', 'v')
+            self._paste_segment(text)
+        finally:
+            self._restore_clipboard(original)
+    
+    def _paste_segment(self, text):
+        """نسخ مقطع ولصقه (الحافظة لا تُستعاد هنا)"""
+        self.backend.copy(text)
+        modifier = 'command' if platform.system() == 'Darwin' else 'ctrl'
+        self.backend.hotkey(modifier, 'v')
+        # التطبيق يقرأ الحافظة بعد معالجة Ctrl+V، فتغييرها فوراً قد يلصق المحتوى القديم
+        time.sleep(self.paste_settle)
+    
+    def _read_clipboard(self):
+        """نص الحافظة الحالي (None إذا تعذرت قراءته، مثل محتوى غير نصي)"""
+        try:
+            return self.backend.paste()
+        except Exception:
+            return None
+    
+    def _restore_clipboard(self, original):
+        if original is None:
+            return
+        try:
+            self.backend.copy(original)
+        except Exception as e:
+            print(f"⚠️ تعذرت استعادة الحافظة: {e}")
+    
+    def _type_keys(self, text):
+        """الكتابة بضغطات المفاتيح عبر واجهة الحقن (False إذا تعذرت كتابة النص)"""
+        # keyboard.write يدعم Unicode والعربية بشكل جيد
+        if self.backend.unicode_write:
+            self.backend.write(text, delay=self.delay)
+            return True
+        
+        # pyautogui.write يكتب ASCII فقط (الأحرف الأخرى تُتجاهل بصمت)،
+        # لذا تُلصق كل سلسلة متتالية من الأحرف غير ASCII دفعة واحدة
+        # وتُستعاد الحافظة مرة واحدة في النهاية بدلاً من كل حرف
+        runs = []
+        for char in text:
+            is_ascii = char.isascii()
+            if runs and runs[-1][0] == is_ascii:
+                runs[-1][1].append(char)
             else:
-                pyautogui.hotkey('ctrl', 'v')
-            
-            time.sleep(0.02)  # محسّن للسرعة
-            pyperclip.copy(original)
-        except ImportError:
+                runs.append((is_ascii, [char]))
+        
+        if all(is_ascii for is_ascii, _chars in runs):
+            self.backend.write(text, delay=self.delay)
+            return True
+        if not self.backend.has_clipboard:
             print("⚠️ يرجى تثبيت pyperclip لدعم أفضل للعربية")
-        except Exception as e:
-            print(f"❌ خطأ في استخدام الحافظة: {e}")
+            return False
+        
+        original = self._read_clipboard()
+        try:
+            for is_ascii, chars in runs:
+                if is_ascii:
+                    self.backend.write(''.join(chars), delay=self.delay)
+                else:
+                    self._paste_segment(''.join(chars))
+        finally:
+            self._restore_clipboard(original)
+        return True
+    
+    def type_revision(self, hypothesis, final=False):
+        """
+        تحديث نص الجملة الجارية في الحقل إلى فرضية جديدة بأقل عدد من الضغطات
+        
+        يُحذف بـ Backspace ما بعد البادئة المشتركة مع ما كُتب سابقاً فقط، ثم
+        يُكتب باقي الفرضية الجديدة؛ فالنص الثابت في بداية الجملة لا يُعاد ولا يرمش.
+        يُفترض أن المؤشر لم يتحرك منذ آخر تحديث وأن Backspace يحذف محرفاً واحداً.
+        
+        Args:
+            hypothesis: النص الكامل للجملة حسب آخر فرضية
+            final: النتيجة النهائية للجملة (الجملة التالية تبدأ من حقل فارغ)
+        """
+        if not self.is_enabled:
+            # الجملة انتهت حتى لو لم يُكتب منها شيء: الجملة التالية تبدأ من حقل فارغ
+            if final:
+                self.live_text = ""
+            return
+        
+        typed = self.live_text
+        prefix = 0
+        limit = min(len(typed), len(hypothesis))
+        while prefix < limit and typed[prefix] == hypothesis[prefix]:
+            prefix += 1
+        # لا تُترك حركة (تشكيل) معلّقة بدون حرفها: الرجوع لبداية الحرف المركّب
+        while 0 < prefix and (
+            (prefix < len(typed) and unicodedata.combining(typed[prefix]))
+            or (prefix < len(hypothesis) and unicodedata.combining(hypothesis[prefix]))
+        ):
+            prefix -= 1
+        
+        backspaces = len(typed) - prefix
+        suffix = hypothesis[prefix:]
+        try:
+            if backspaces:
+                self._press_backspace(backspaces)
+                self.live_text = typed[:prefix]
+            # النص المكتوب يُحدّث بعد حقن مؤكد فقط، وإلا تُحسب المراجعة التالية
+            # على نص لم يصل للحقل فتحذف منه ما ليس فيه
+            if not suffix or self._inject(suffix):
+                self.live_text = hypothesis
+        finally:
+            stats = self.revision_stats
+            stats['revisions'] += 1
+            stats['backspaces'] += backspaces
+            stats['typed'] += len(suffix)
+            # إعادة الكتابة الساذجة: حذف كل ما كُتب ثم كتابة الفرضية كاملة
+            stats['naive'] += len(typed) + len(hypothesis)
+            if final:
+                self.live_text = ""
+    
+    def reset_revision(self):
+        """نسيان نص الجملة الجارية (مثلاً عند نقل التركيز لحقل آخر)"""
+        self.live_text = ""
+    
+    def _press_backspace(self, count):
+        self.backend.press('backspace', presses=count, delay=self.delay)
     
     def type_with_commands(self, text):
-        """كتابة النص مع معالجة الأوامر الصوتية"""
-        # قاموس الأوامر الصوتية
-        commands = {
-            "سطر جديد": "\n",
-            "نقطة": ".",
-            "فاصلة": "،",
-            "فاصلة منقوطة": "؛",
-            "نقطتان": ":",
-            "علامة استفهام": "؟",
-            "علامة تعجب": "!",
-            "قوس مفتوح": "(",
-            "قوس مغلق": ")",
-            "مسافة": " ",
-            "تاب": "\t",
-        }
+        """
+        كتابة النص مع معالجة الأوامر الصوتية
         
-        # استبدال الأوامر
-        for command, replacement in commands.items():
-            if command in text:
-                text = text.replace(command, replacement)
+        النص يُمسح مرة واحدة (أطول أمر أولاً وبحدود الكلمات)، والأوامر
+        تصبح علامات ترقيم أو ضغطات مفاتيح (press_key / press_hotkey) بالترتيب.
         
-        self.type_text(text)
+        Returns:
+            قائمة CommandToken المنفذة
+        """
+        if not self.is_enabled:
+            return []
+        if self.command_watcher is not None:
+            # قراءة المرجع مرة واحدة: الجملة كلها تُنفذ بنفس إصدار الأوامر
+            tokenizer = self.command_watcher.current
+        else:
+            if self.command_tokenizer is None:
+                from voice_commands import VoiceCommandTokenizer, create_commands_watcher
+                self.command_watcher = create_commands_watcher()
+                if self.command_watcher is None:
+                    self.command_tokenizer = VoiceCommandTokenizer.from_config()
+            tokenizer = (self.command_watcher.current if self.command_watcher
+                         else self.command_tokenizer)
+        return tokenizer.apply(self, text)
     
     def press_key(self, key):
         """الضغط على مفتاح معين"""
         try:
-            if self.method == 'keyboard':
-                keyboard.press_and_release(key)
-            elif self.method == 'pyautogui':
-                pyautogui.press(key)
+            self.backend.press(key)
         except Exception as e:
             print(f"❌ خطأ في الضغط على المفتاح: {e}")
     
     def press_hotkey(self, *keys):
         """الضغط على مجموعة مفاتيح"""
         try:
-            if self.method == 'keyboard':
-                keyboard.press_and_release('+'.join(keys))
-            elif self.method == 'pyautogui':
-                pyautogui.hotkey(*keys)
+            self.backend.hotkey(*keys)
         except Exception as e:
             print(f"❌ خطأ في الضغط على المفاتيح: {e}")
     
@@ -172,35 +297,211 @@ class AutoTyper:
         self.is_enabled = False
 
 
-class TextCorrector:
-    """مصحح النص التلقائي للعربية"""
-    
-    def __init__(self):
-        # قاموس التصحيحات الشائعة
-        self.corrections = {
-            # أخطاء شائعة في التعرف على الصوت
-            "انتهت الفترة التجريبية المجانية": "",
-            "شو": "ما هو",
-            "ليش": "لماذا",
-            "وين": "أين",
-            "اش": "شيء",
-            # إضافة المزيد حسب الحاجة
+class TypingWorker:
+    """
+    خيط كتابة واحد يغذيه طابور، حتى لا يحجب تطبيق بطيء خيط التعرف
+    
+    النصوص تُكتب بترتيب وصولها، وكل ما تراكم في الطابور أثناء كتابة نص سابق
+    يُدمج في حقن واحد (ضغطات أو لصق واحد بدلاً من عدة). الفرضيات الجزئية
+    المتتالية (submit_revision) تُختصر إلى أحدثها فقط، لأن كل فرضية تحل محل سابقتها.
+    """
+    
+    def __init__(self, typer, max_coalesce_chars=2000):
+        """
+        Args:
+            typer: كائن AutoTyper (يمكن استبداله أثناء العمل، فيُستخدم من الدفعة التالية)
+            max_coalesce_chars: أقصى طول للنص المدمج في حقن واحد
+        """
+        self.typer = typer
+        self.max_coalesce_chars = max_coalesce_chars
+        self._queue = queue.Queue()
+        self._carry = None  # نص سُحب من الطابور ولم يتسع له الحقن السابق
+        self._stopping = False  # سُحبت علامة الإيقاف أثناء الدمج: لا انتظار بعد المحمول
+        self._busy = False
+        self.stats = {'segments': 0, 'injections': 0, 'latency_total': 0.0,
+                      'latency_max': 0.0, 'type_total': 0.0}
+        self._thread = threading.Thread(target=self._run, name='typing', daemon=True)
+        self._thread.start()
+    
+    def submit(self, text):
+        """إضافة نص للكتابة (لا يحجب)"""
+        if text:
+            self._queue.put(('text', text, time.perf_counter()))
+    
+    def submit_revision(self, hypothesis, final=False):
+        """إضافة فرضية جديدة للجملة الجارية (تُطبق بـ AutoTyper.type_revision)"""
+        self._queue.put(('final' if final else 'revision', hypothesis, time.perf_counter()))
+    
+    def depth(self):
+        """عدد النصوص المنتظرة أو قيد الكتابة"""
+        return self._queue.qsize() + (self._carry is not None) + self._busy
+    
+    def _next_batch(self):
+        """أول نص (بانتظار) ثم كل ما تراكم بعده دون انتظار، بالترتيب"""
+        first, self._carry = self._carry, None
+        if first is None:
+            if self._stopping:
+                return None
+            first = self._queue.get()
+            if first is None:
+                return None
+        batch = [first]
+        length = len(first[1])
+        while batch[-1][0] != 'final':  # الجملة التالية لا تُدمج مع جملة اكتملت
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                # علامة الإيقاف لا تُحمل للدفعة التالية: الطابور بعدها فارغ فينتهي الخيط
+                self._stopping = True
+                break
+            if (item[0] == 'text') != (first[0] == 'text') or (
+                    item[0] == 'text' and length + len(item[1]) > self.max_coalesce_chars):
+                self._carry = item
+                break
+            batch.append(item)
+            length += len(item[1])
+        return batch
+    
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                break
+            self._busy = True
+            started = time.perf_counter()
+            try:
+                kind, text, _queued = batch[-1]
+                if kind == 'text':
+                    self.typer.type_text(''.join(text for _kind, text, _queued in batch))
+                else:
+                    self.typer.type_revision(text, final=kind == 'final')
+            except Exception as e:
+                # خطأ في نص واحد لا يوقف الخيط: النصوص التالية تُكتب كالمعتاد
+                print(f"❌ خطأ في خيط الكتابة: {e}")
+            finally:
+                self._busy = False
+            now = time.perf_counter()
+            self.stats['injections'] += 1
+            self.stats['type_total'] += now - started
+            for _kind, _text, queued in batch:
+                latency = now - queued
+                self.stats['segments'] += 1
+                self.stats['latency_total'] += latency
+                self.stats['latency_max'] = max(self.stats['latency_max'], latency)
+    
+    def flush(self, timeout=5.0):
+        """انتظار كتابة كل ما في الطابور"""
+        deadline = time.monotonic() + timeout
+        while self.depth() and time.monotonic() < deadline:
+            time.sleep(0.005)
+        return self.depth() == 0
+    
+    def stop(self, timeout=2.0):
+        """كتابة المتبقي ثم إيقاف الخيط"""
+        self._queue.put(None)
+        self._thread.join(timeout)
+    
+    def get_stats(self):
+        """عمق الطابور وزمن الانتظار من الإضافة حتى انتهاء الكتابة (ms)"""
+        stats = self.stats
+        segments = stats['segments']
+        injections = stats['injections']
+        return {
+            'depth': self.depth(),
+            'segments': segments,
+            'injections': injections,
+            'coalesced': segments - injections,
+            'mean_latency_ms': stats['latency_total'] * 1000 / segments if segments else 0.0,
+            'max_latency_ms': stats['latency_max'] * 1000,
+            'mean_type_ms': stats['type_total'] * 1000 / injections if injections else 0.0,
         }
+
+
+# التصحيحات المدمجة (تُدمج معها config.CORRECTIONS، وتصبح المحتوى الأول لملف التصحيحات)
+DEFAULT_CORRECTIONS = {
+    # أخطاء شائعة في التعرف على الصوت
+    "انتهت الفترة التجريبية المجانية": "",
+    "شو": "ما هو",
+    "ليش": "لماذا",
+    "وين": "أين",
+    "اش": "شيء",
+}
+
+
+class TextCorrector:
+    """
+    مصحح النص التلقائي للعربية
+    
+    التصحيحات كلها في آلة Aho-Corasick واحدة: مرور واحد على النص مهما كبر
+    القاموس، والعبارة تُستبدل ككلمة كاملة فقط ("وين" لا تتغير داخل "تكوين").
+    مع ملف تصحيحات تُبنى الآلة الجديدة في خيط المراقبة عند تعديل الملف
+    وتُبدّل دفعة واحدة دون إعادة تشغيل.
+    """
+    
+    def __init__(self, path=None, poll_interval=None):
+        """
+        Args:
+            path: ملف تصحيحات JSON يُراقب ويُعاد تحميله عند تعديله
+                (None = القاموس المدمج فقط)
+            poll_interval: ثوانٍ بين فحوص الملف (None = من الإعدادات، 0 = بدون مراقبة)
+        """
+        defaults = dict(DEFAULT_CORRECTIONS)
+        defaults.update(_config_value('CORRECTIONS', None) or {})
+        
+        # تصحيحات add_correction تبقى فوق كل إصدار يُحمّل من الملف
+        self._added = {}
+        self._static = None
+        self._watcher = None
+        self._lock = threading.RLock()
+        if path:
+            from dictionary_files import DictionaryWatcher
+            if poll_interval is None:
+                poll_interval = _config_value('DICTIONARY_RELOAD_INTERVAL', 2.0)
+            self._watcher = DictionaryWatcher(
+                path, 'corrections', self._build, defaults, poll_interval=poll_interval or 2.0
+            )
+            # قفل المراقب نفسه: الإضافة لا تتقاطع مع بناء إصدار جديد من الملف
+            self._lock = self._watcher.lock
+            if poll_interval:
+                self._watcher.start()
+        else:
+            self._static = self._build(defaults)
         
         # قواعد التصحيح
         self.rules = []
     
+    @classmethod
+    def from_config(cls):
+        """إنشاء المصحح من config.CORRECTIONS_FILE (أو القاموس المدمج إن لم يُحدد ملف)"""
+        return cls(path=_config_value('CORRECTIONS_FILE', None))
+    
+    def _build(self, entries):
+        """بناء آلة كاملة (روابط الفشل جاهزة) من قاموس الملف مع الإضافات"""
+        for wrong, correct in entries.items():
+            if not isinstance(correct, str):
+                raise ValueError(f"بديل '{wrong}' يجب أن يكون نصاً: {correct!r}")
+        return AhoCorasickReplacer(dict(entries, **self._added)).compile()
+    
+    @property
+    def _replacer(self):
+        return self._watcher.current if self._watcher else self._static
+    
+    @property
+    def corrections(self):
+        """قاموس التصحيحات الحالي (للقراءة - الإضافة عبر add_correction)"""
+        return self._replacer.replacements
+    
+    @property
+    def version(self):
+        """إصدار ملف التصحيحات المستخدم (0 = القاموس المدمج)"""
+        return self._watcher.version if self._watcher else 0
+    
     def correct(self, text):
         """تصحيح النص"""
-        corrected = text
-        
-        # تطبيق التصحيحات من القاموس
-        for wrong, correct in self.corrections.items():
-            if wrong in corrected:
-                if correct == "":
-                    corrected = corrected.replace(wrong, "")
-                else:
-                    corrected = corrected.replace(wrong, correct)
+        # تطبيق التصحيحات من القاموس (أطول عبارة أولاً وبحدود الكلمات)
+        corrected = self._replacer.replace(text)
         
         # تطبيق قواعد التصحيح
         for rule in self.rules:
@@ -209,12 +510,21 @@ class TextCorrector:
         return corrected.strip()
     
     def add_correction(self, wrong, correct):
-        """إضافة تصحيح جديد"""
-        self.corrections[wrong] = correct
+        """إضافة تصحيح جديد (يُطبق من التصحيح التالي، والآلة الكاملة تُبنى في الخلفية)"""
+        # تحت قفل المراقب: إما قبل بناء الإصدار التالي فيدخل في _build، أو بعد تبديله
+        # فيُضاف للآلة الجديدة؛ ولا يتغير _added أثناء نسخه داخل بناء جارٍ
+        with self._lock:
+            self._added[wrong] = correct
+            self._replacer.add(wrong, correct)
     
     def add_rule(self, rule_func):
         """إضافة قاعدة تصحيح جديدة"""
         self.rules.append(rule_func)
+    
+    def close(self):
+        """إيقاف مراقبة ملف التصحيحات"""
+        if self._watcher:
+            self._watcher.stop()
 
 
 def test_typer():
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+سكريبت قياس كلفة التصحيح التلقائي مع نمو قاموس التصحيحات
+
+يقارن لكل حجم قاموس:
+- الطريقة القديمة: حلقة in + str.replace لكل تصحيح (تكبر مع القاموس)
+- آلة Aho-Corasick في TextCorrector (ثابتة تقريباً لكل جملة)
+
+الاستخدام:
+    python benchmark_corrections.py [حجم1 حجم2 ...]
+"""
+
+import random
+import sys
+import time
+
+from auto_typer import TextCorrector
+
+DEFAULT_SIZES = [10, 100, 1000, 5000, 20000]
+
+# حروف عربية لتوليد كلمات اصطناعية
+LETTERS = "ابتثجحخدذرزسشصضطظعغفقكلمنهوي"
+
+UTTERANCES = [
+    "السلام عليكم شو الأخبار اليوم",
+    "وين رحت أمس ليش ما رديت على الهاتف",
+    "أريد كتابة رسالة طويلة إلى مدير المشروع بخصوص تكوين الفريق الجديد",
+    "اش رأيك في الاجتماع القادم يوم الخميس",
+]
+
+
+def random_word(rng, min_length=3, max_length=8):
+    """كلمة اصطناعية عشوائية"""
+    return ''.join(rng.choice(LETTERS) for _ in range(rng.randint(min_length, max_length)))
+
+
+def build_corrections(size, seed=0):
+    """قاموس تصحيحات اصطناعي بالحجم المطلوب (عبارات من كلمة إلى ثلاث كلمات)"""
+    rng = random.Random(seed)
+    corrections = {}
+    while len(corrections) < size:
+        phrase = ' '.join(random_word(rng) for _ in range(rng.randint(1, 3)))
+        corrections[phrase] = random_word(rng)
+    return corrections
+
+
+def naive_correct(corrections, text):
+    """الطريقة القديمة في TextCorrector.correct (in + replace لكل تصحيح)"""
+    for wrong, correct in corrections.items():
+        if wrong in text:
+            text = text.replace(wrong, correct)
+    return text.strip()
+
+
+def time_per_utterance(function, repeats):
+    """متوسط زمن الجملة الواحدة (بالميكروثانية)"""
+    started = time.perf_counter()
+    for _ in range(repeats):
+        for utterance in UTTERANCES:
+            function(utterance)
+    return (time.perf_counter() - started) * 1e6 / (repeats * len(UTTERANCES))
+
+
+def benchmark_size(size):
+    """قياس حجم قاموس واحد"""
+    corrections = build_corrections(size)
+    corrector = TextCorrector()
+
+    started = time.perf_counter()
+    for wrong, correct in corrections.items():
+        corrector.add_correction(wrong, correct)
+    corrector.correct(" ")  # بناء روابط الفشل (النص الفارغ لا يمر بالآلة)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    merged = dict(corrector.corrections)
+    repeats = max(5, 20000 // size)
+    return {
+        'size': size,
+        'build_ms': build_ms,
+        'naive_us': time_per_utterance(lambda text: naive_correct(merged, text), repeats),
+        'automaton_us': time_per_utterance(corrector.correct, 200),
+    }
+
+
+def main():
+    """الدالة الرئيسية"""
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+
+    corrector = TextCorrector()
+    print("\n🔎 حدود الكلمات:")
+    for utterance in UTTERANCES:
+        print(f"   {utterance}\n → {corrector.correct(utterance)}")
+
+    print("\n" + "=" * 70)
+    print("📊 زمن تصحيح الجملة الواحدة حسب حجم القاموس")
+    print("=" * 70)
+    print(f"\n{'القاموس':<10} │ {'البناء':<12} │ {'in + replace':<16} │ {'Aho-Corasick':<16}")
+    print(f"{'─' * 10}┼{'─' * 14}┼{'─' * 18}┼{'─' * 18}")
+
+    for size in sizes:
+        r = benchmark_size(size)
+        print(f"{r['size']:<10} │ {r['build_ms']:>8.1f} ms │ {r['naive_us']:>11.1f} µs │ "
+              f"{r['automaton_us']:>11.1f} µs")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
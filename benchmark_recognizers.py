@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+سكريبت قياس أداء محركات التعرف على الصوت
+يقيس زمن التحميل وعامل الزمن الحقيقي (RTF) ونسبة خطأ الكلمات (WER)
+ويقارن كل إعداد بالإعداد الأساسي (الأول في القائمة)
+
+الاستخدام:
+    python benchmark_recognizers.py <مجلد_العينات> [إعداد1 إعداد2 ...] [--cache] [--json <ملف>]
+
+كل عينة ملف WAV (mono, 16-bit) ويمكن وضع النص المرجعي بجانبه
+في ملف بنفس الاسم وامتداد .txt لحساب الدقة.
+
+مع --cache تُعاد نتائج العينات التي سبق فك ترميزها بنفس الإعداد من
+الذاكرة المؤقتة (result_cache.py) فوراً، ويُحسب RTF على العينات المفكوكة فقط.
+
+مع --json تُحفظ النتائج مع نسخ torch و whisper لإرفاقها بطلبات الدمج.
+"""
+
+import json
+import os
+import platform
+import sys
+import time
+import wave
+
+import numpy as np
+
+from audio_processing import int16_to_float32
+from speech_recognizer import SpeechRecognizer
+from result_cache import RecognitionCache
+
+# مسار الذاكرة المؤقتة عند --cache (نفس مسار config.RESULT_CACHE_PATH إن وُجد)
+try:
+    import config
+    CACHE_PATH = config.RESULT_CACHE_PATH
+except (ImportError, AttributeError):
+    CACHE_PATH = os.path.join(os.path.expanduser("~"), ".voice_to_text", "result_cache.db")
+
+# الإعدادات المتاحة للمقارنة (الأول هو الأساس الذي تُحسب الفروق مقابله)
+BENCHMARK_CONFIGS = {
+    'whisper-fp32': {'engine': 'whisper', 'whisper_quantize': False},
+    'whisper-int8': {'engine': 'whisper', 'whisper_quantize': True},
+    'faster-whisper-int8': {'engine': 'faster-whisper'},
+    # مسار الإملاء المباشر (مصفوفة صوت) بنافذة 30 ثانية ثم بنافذة بطول الجملة
+    'whisper-live': {'engine': 'whisper', 'live': True, 'dynamic_padding': False},
+    'whisper-live-dynpad': {'engine': 'whisper', 'live': True, 'dynamic_padding': True},
+}
+
+
+def read_samples_array(path: str):
+    """قراءة WAV أحادي 16-bit كمصفوفة float32 بتردد 16kHz (كما يصل من الميكروفون)"""
+    with wave.open(path, 'rb') as wf:
+        if wf.getframerate() != 16000 or wf.getnchannels() != 1:
+            raise ValueError(f"{path}: مسار المصفوفة يتطلب WAV أحادي 16kHz")
+        return int16_to_float32(np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16))
+
+
+def load_samples(samples_dir: str) -> list:
+    """تحميل ملفات العينات والنصوص المرجعية"""
+    samples = []
+    for name in sorted(os.listdir(samples_dir)):
+        if not name.lower().endswith('.wav'):
+            continue
+
+        path = os.path.join(samples_dir, name)
+        with wave.open(path, 'rb') as wf:
+            duration = wf.getnframes() / float(wf.getframerate())
+
+        reference = None
+        reference_path = os.path.splitext(path)[0] + '.txt'
+        if os.path.exists(reference_path):
+            with open(reference_path, 'r', encoding='utf-8') as f:
+                reference = f.read().strip()
+
+        samples.append({'path': path, 'duration': duration, 'reference': reference})
+    return samples
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """حساب نسبة خطأ الكلمات (مسافة Levenshtein على مستوى الكلمات)"""
+    ref_words = reference.split()
+    hyp_words = hypothesis.split()
+    if not ref_words:
+        return 0.0 if not hyp_words else 1.0
+
+    previous = list(range(len(hyp_words) + 1))
+    for i, ref_word in enumerate(ref_words, 1):
+        current = [i] + [0] * len(hyp_words)
+        for j, hyp_word in enumerate(hyp_words, 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word)
+            )
+        previous = current
+
+    return previous[-1] / len(ref_words)
+
+
+def benchmark_config(name: str, options: dict, samples: list, language: str = 'ar',
+                     cache: RecognitionCache = None) -> dict:
+    """قياس إعداد واحد على جميع العينات (النتائج المخزنة لا تدخل في RTF)"""
+    try:
+        options = dict(options)
+        live = options.pop('live', False)
+        dynamic_padding = options.pop('dynamic_padding', None)
+        start = time.perf_counter()
+        recognizer = SpeechRecognizer(language=language, **options)
+        load_time = time.perf_counter() - start
+        if dynamic_padding is not None:
+            recognizer.dynamic_padding = dynamic_padding
+        if cache is not None and not live:
+            recognizer.result_cache = cache
+
+        total_audio = 0.0
+        total_processing = 0.0
+        cached = 0
+        errors = []
+
+        for sample in samples:
+            hits = cache.stats['hits'] if cache else 0
+            start = time.perf_counter()
+            if live:
+                text = recognizer._recognize_with_whisper_array(read_samples_array(sample['path']))
+            else:
+                text = recognizer.recognize_audio_file(sample['path'])
+            elapsed = time.perf_counter() - start
+            if cache and cache.stats['hits'] > hits:
+                cached += 1
+            else:
+                total_processing += elapsed
+                total_audio += sample['duration']
+
+            if sample['reference'] is not None:
+                errors.append(word_error_rate(sample['reference'], text))
+
+        return {
+            'name': name,
+            'load_time': load_time,
+            'rtf': total_processing / total_audio if total_audio else 0.0,
+            'wer': sum(errors) / len(errors) if errors else None,
+            'cached': cached,
+            'success': True
+        }
+
+    except Exception as e:
+        return {'name': name, 'error': str(e), 'success': False}
+
+
+def print_results(results: list):
+    """طباعة جدول النتائج مع الفروق مقابل الإعداد الأساسي"""
+    print("\n" + "=" * 80)
+    print("📊 نتائج القياس")
+    print("=" * 80)
+
+    baseline = next((r for r in results if r['success']), None)
+
+    print(f"\n{'الإعداد':<20} │ {'التحميل':<16} │ {'RTF':<16} │ {'WER':<16}")
+    print(f"{'─' * 20}┼{'─' * 18}┼{'─' * 18}┼{'─' * 18}")
+
+    for r in results:
+        if not r['success']:
+            print(f"{r['name']:<20} │ ❌ فشل: {r['error']}")
+            continue
+
+        load = f"{r['load_time']:.2f}s"
+        rtf = f"{r['rtf']:.3f}"
+        wer = f"{r['wer'] * 100:.1f}%" if r['wer'] is not None else "N/A"
+
+        if baseline and r is not baseline:
+            load += f" ({r['load_time'] - baseline['load_time']:+.2f})"
+            rtf += f" ({r['rtf'] - baseline['rtf']:+.3f})"
+            if r['wer'] is not None and baseline['wer'] is not None:
+                wer += f" ({(r['wer'] - baseline['wer']) * 100:+.1f})"
+
+        print(f"{r['name']:<20} │ {load:<16} │ {rtf:<16} │ {wer:<16}")
+
+    cached = [f"{r['name']}: {r['cached']}" for r in results if r['success'] and r['cached']]
+    if cached:
+        print(f"\n⚡ عينات من الذاكرة المؤقتة (خارج RTF): {', '.join(cached)}")
+
+    if baseline:
+        print(f"\n💡 الفروق بين الأقواس مقابل: {baseline['name']}")
+    print("=" * 80)
+
+
+def save_results(path: str, results: list, samples: list):
+    """حفظ النتائج في ملف JSON مع بيئة القياس (النسخ تغيّر الأرقام)"""
+    import speech_recognizer
+    versions = {'python': platform.python_version(), 'machine': platform.machine(),
+                'cpu_count': os.cpu_count()}
+    for module in ('torch', 'whisper', 'faster_whisper'):
+        try:
+            versions[module] = getattr(__import__(module), '__version__', 'unknown')
+        except Exception:
+            versions[module] = None
+    report = {
+        'environment': versions,
+        'samples': len(samples),
+        'audio_seconds': sum(s['duration'] for s in samples),
+        'torch_available': speech_recognizer.TORCH_AVAILABLE,
+        'results': results,
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"💾 تم حفظ النتائج في: {path}")
+
+
+def main():
+    """الدالة الرئيسية"""
+    json_path = None
+    args = []
+    argv = iter(sys.argv[1:])
+    for arg in argv:
+        if arg == '--json':
+            json_path = next(argv, None)
+        elif arg != '--cache':
+            args.append(arg)
+    cache = RecognitionCache(CACHE_PATH) if '--cache' in sys.argv else None
+    if not args:
+        print(__doc__)
+        sys.exit(1)
+
+    samples = load_samples(args[0])
+    if not samples:
+        print(f"❌ لا توجد ملفات WAV في: {args[0]}")
+        sys.exit(1)
+
+    names = args[1:] or list(BENCHMARK_CONFIGS.keys())
+    unknown = [n for n in names if n not in BENCHMARK_CONFIGS]
+    if unknown:
+        print(f"❌ إعدادات غير معروفة: {', '.join(unknown)}")
+        print(f"💡 المتاح: {', '.join(BENCHMARK_CONFIGS.keys())}")
+        sys.exit(1)
+
+    total_duration = sum(s['duration'] for s in samples)
+    print(f"\n🎧 {len(samples)} عينة ({total_duration:.1f} ثانية) × {len(names)} إعدادات")
+
+    results = []
+    for name in names:
+        print(f"\n🔄 جاري قياس: {name}")
+        results.append(benchmark_config(name, BENCHMARK_CONFIGS[name], samples, cache=cache))
+
+    print_results(results)
+    if json_path:
+        save_results(json_path, results, samples)
+
+
+if __name__ == "__main__":
+    main()
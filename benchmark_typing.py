@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+سكريبت قياس طرق الكتابة التلقائية بدون شاشة (RecordingBackend)
+
+يقيس لكل طريقة: الأحرف في الثانية، وعدد الأحداث المرسلة لكل مقطع،
+وزمن الكتابة من الاستدعاء حتى آخر حدث (متوسط و p95)، ويتحقق أن
+الحقل المحاكى يحوي النص المطلوب بالضبط.
+
+الطرق:
+- per-char: استدعاء type_raw لكل حرف (كتابة كل حرف فور وصوله)
+- bulk: كتابة المقطع كاملاً بضغطات المفاتيح في استدعاء واحد
+- clipboard: لصق المقطع عبر الحافظة دائماً
+- auto: اختيار AutoTyper الافتراضي حسب الطول (TYPING_PASTE_THRESHOLD)
+
+الاستخدام:
+    python benchmark_typing.py [طريقة1 طريقة2 ...] [--ascii-only]
+
+الأحداث الحقيقية ليست مجانية: كل حدث يكلف EVENT_LATENCY ثانية في المحاكاة،
+وwrite تنتظر TYPING_DELAY بين الأحرف كما تفعل keyboard و pyautogui.
+مع --ascii-only تُحاكى pyautogui (write تكتب ASCII فقط والباقي يُلصق).
+"""
+
+import sys
+import time
+
+from auto_typer import AutoTyper
+from typing_backends import RecordingBackend
+
+try:
+    import config
+    TYPING_DELAY = config.TYPING_DELAY
+    PASTE_THRESHOLD = config.TYPING_PASTE_THRESHOLD
+    PASTE_SETTLE = config.TYPING_PASTE_SETTLE
+except (ImportError, AttributeError):
+    TYPING_DELAY = 0.01
+    PASTE_THRESHOLD = 20
+    PASTE_SETTLE = 0.03
+
+# كلفة حقن حدث واحد في النظام (تقريبية لـ SendInput / XTest)
+EVENT_LATENCY = 0.0002
+
+SEGMENTS = [
+    "نعم",
+    "شكراً جزيلاً",
+    "السلام عليكم ورحمة الله",
+    "Meeting at 10:30, room B",
+    "أريد كتابة رسالة طويلة إلى مدير المشروع بخصوص تكوين الفريق الجديد",
+    "سأرسل التقرير النهائي يوم الخميس إن شاء الله، وأرجو مراجعة الملاحق المرفقة قبل الاجتماع "
+    "القادم حتى نتمكن من مناقشة الميزانية والجدول الزمني بالتفصيل",
+]
+
+# paste_threshold لكل طريقة (None = ضغطات فقط، 0 = لصق دائماً)
+STRATEGIES = {
+    'per-char': None,
+    'bulk': None,
+    'clipboard': 0,
+    'auto': PASTE_THRESHOLD,
+}
+
+
+def benchmark_strategy(name, ascii_only=False):
+    """قياس طريقة واحدة على كل المقاطع"""
+    backend = RecordingBackend(event_latency=EVENT_LATENCY, unicode_write=not ascii_only)
+    typer = AutoTyper(delay=TYPING_DELAY, paste_settle=PASTE_SETTLE, backend=backend)
+    typer.paste_threshold = STRATEGIES[name]  # في المُنشئ None تعني "من الإعدادات"
+    backend.copy("محتوى الحافظة الأصلي")
+
+    latencies = []
+    events = 0
+    chars = 0
+    correct = True
+    for segment in SEGMENTS:
+        backend.clear()
+        started = time.perf_counter()
+        if name == 'per-char':
+            for char in segment:
+                typer.type_raw(char)
+        else:
+            typer.type_raw(segment)
+        latencies.append(time.perf_counter() - started)
+        events += len(backend.events)
+        chars += len(segment)
+        correct = correct and backend.text == segment
+
+    latencies.sort()
+    return {
+        'name': name,
+        'cps': chars / sum(latencies),
+        'events_per_segment': events / len(SEGMENTS),
+        'mean_ms': sum(latencies) * 1000 / len(latencies),
+        'p95_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000,
+        'correct': correct,
+        'clipboard_kept': backend.clipboard == "محتوى الحافظة الأصلي",
+    }
+
+
+def main():
+    """الدالة الرئيسية"""
+    ascii_only = '--ascii-only' in sys.argv
+    names = [arg for arg in sys.argv[1:] if arg != '--ascii-only'] or list(STRATEGIES)
+    unknown = [n for n in names if n not in STRATEGIES]
+    if unknown:
+        print(f"❌ طرق غير معروفة: {', '.join(unknown)}")
+        print(f"💡 المتاح: {', '.join(STRATEGIES)}")
+        sys.exit(1)
+
+    chars = sum(len(segment) for segment in SEGMENTS)
+    print(f"\n⌨️ {len(SEGMENTS)} مقاطع ({chars} حرف) - تأخير {TYPING_DELAY * 1000:.1f} ms/حرف، "
+          f"{EVENT_LATENCY * 1000:.1f} ms/حدث، انتظار اللصق {PASTE_SETTLE * 1000:.0f} ms"
+          f"{' - محاكاة pyautogui (ASCII فقط)' if ascii_only else ''}")
+
+    print("\n" + "=" * 78)
+    print(f"{'الطريقة':<10} │ {'حرف/ثانية':>10} │ {'أحداث/مقطع':>10} │ "
+          f"{'المتوسط':>10} │ {'p95':>10} │ النص │ الحافظة")
+    print(f"{'─' * 10}┼{'─' * 12}┼{'─' * 12}┼{'─' * 12}┼{'─' * 12}┼{'─' * 6}┼{'─' * 8}")
+    for name in names:
+        r = benchmark_strategy(name, ascii_only)
+        print(f"{r['name']:<10} │ {r['cps']:>10.0f} │ {r['events_per_segment']:>10.1f} │ "
+              f"{r['mean_ms']:>7.1f} ms │ {r['p95_ms']:>7.1f} ms │ "
+              f"{'✅' if r['correct'] else '❌':^4} │ {'✅' if r['clipboard_kept'] else '❌':^6}")
+    print("=" * 78)
+
+
+if __name__ == "__main__":
+    main()
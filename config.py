@@ -6,23 +6,80 @@
 import os
 
 # إعدادات محرك التعرف على الصوت
-RECOGNITION_ENGINE = "whisper"  # أو "vosk"
+RECOGNITION_ENGINE = "whisper"  # أو "vosk" أو "faster-whisper"
 WHISPER_MODEL_SIZE = "base"     # tiny, base, small, medium, large (كلما كبر كلما زادت الدقة والبطء)
+WHISPER_QUANTIZE = False        # تكميم int8 ديناميكي لطبقات Whisper على المعالج (أسرع وأصغر)
+WHISPER_MMAP = True             # تحميل أوزان Whisper بتعيين الذاكرة (mmap) - أسرع ومشتركة بين العمليات
+WHISPER_TRIM_SILENCE = True     # قص الصمت من بداية ونهاية الجملة قبل Whisper
+WHISPER_DYNAMIC_PADDING = False # نافذة مُرمّز بطول الجملة بدلاً من 30 ثانية (تجريبي: قارن WER بـ benchmark_recognizers whisper-live-dynpad)
+FASTER_WHISPER_COMPUTE_TYPE = "int8"  # دقة CTranslate2 لمحرك faster-whisper (int8, int8_float32, float32)
 VOSK_MODEL_PATH = None          # سيبحث تلقائياً في مجلد models/
 
 # إعدادات اللغة
-LANGUAGE = "ar"                 # ar للعربية
+LANGUAGE = "ar"                 # ar للعربية، أو "auto" للكشف التلقائي (مع Whisper أو faster-whisper)
+AUTO_LANGUAGE_CANDIDATES = ["ar", "en"]  # تقييد الكشف التلقائي بهذه اللغات (None = كل لغات Whisper)
+AUTO_LANGUAGE_USE_VOSK = True   # بعد الكشف: التعرف بنموذج Vosk للغة المكتشفة إن كان محملاً
+AUTO_LANGUAGE_MIN_CONFIDENCE = 0.5  # ثقة الجملة التي تُعتبر تحتها منخفضة
+AUTO_LANGUAGE_RECHECK_AFTER = 2     # عدد الجمل منخفضة الثقة المتتالية قبل إعادة الكشف
+PARALLEL_LANGUAGES = None       # مثل ["ar", "en"]: فك ترميز كل جملة بعدة نماذج Vosk معاً واختيار الأعلى ثقة
+
+# إعدادات Google Speech والتعرف المتحوّط
+GOOGLE_SPEECH_ENDPOINT = None   # None = خدمة Google الحقيقية، أو رابط خادم محلي بديل للاختبار
+GOOGLE_SPEECH_KEY = None        # None = المفتاح العام الافتراضي
+GOOGLE_SPEECH_TIMEOUT = 10.0    # مهلة طلب Google (بالثواني)
+GOOGLE_SPEECH_RETRIES = 1       # إعادة المحاولة عند انقطاع الاتصال أو خطأ 5xx
+GOOGLE_MAX_CHUNK_SECONDS = 15   # الصوت الأطول يُقسّم عند الصمت إلى عدة طلبات
+GOOGLE_PARALLEL_REQUESTS = 4    # أقصى عدد طلبات Google متزامنة (واتصالات keep-alive محفوظة)
+HEDGED_RECOGNITION = False      # بدء Google بالتوازي إذا تأخر المحرك المحلي (يتطلب السماح بـ Google)
+HEDGE_DELAY = 0.8               # المدة التي يُنتظر فيها المحرك المحلي قبل بدء Google (بالثواني)
+HEDGE_TIMEOUT = 10.0            # أقصى مدة للسباق بعد انتهاء مهلة التحوّط (بالثواني)
 
 # إعدادات التسجيل الصوتي
 SAMPLE_RATE = 16000            # معدل العينات (Hz)
 CHUNK_SIZE = 8000              # حجم القطعة
+CAPTURE_NATIVE_RATE = True     # فتح الميكروفون بمعدله الأصلي (44.1/48 kHz) والتحويل إلى 16kHz داخلياً
+STOP_DRAIN_TIMEOUT = 1.0       # مهلة إكمال التعرف الجاري عند الإيقاف قبل إلغائه (بالثواني)
 PHRASE_TIME_LIMIT = 10         # الحد الأقصى لطول الجملة (بالثواني)
 PAUSE_THRESHOLD = 1.5          # وقت الانتظار عند الصمت (بالثواني)
 
+# المعالجة الأولية للصوت الملتقط (NumPy، كتلة بكتلة)
+DSP_ENABLED = False            # مرشح تمرير عالٍ + طرح طيفي للضوضاء + تحكم تلقائي في الكسب
+DSP_HIGHPASS_HZ = 90           # إزالة DC والطنين (50/60 Hz) تحت هذا التردد
+DSP_NOISE_REDUCTION = True     # طرح الضوضاء بملف ضوضاء يتجدد من فترات الهدوء
+DSP_AGC = True                 # تكبير الكلام الخافت نحو مستوى ثابت
+DSP_AGC_TARGET = 3000          # مستوى RMS المستهدف للكلام (int16)
+DSP_CPU_BUDGET = 0.15          # أقصى نسبة من مدة الكتلة لزمن معالجتها (تتوقف المعالجة إذا تجاوزتها باستمرار)
+
+# إعدادات موارد المعالج
+TORCH_THREADS = None           # خيوط torch داخل العملية (intra-op) - None = الافتراضي (كل الأنوية)
+TORCH_INTEROP_THREADS = None   # خيوط torch بين العمليات (inter-op) - تُضبط مرة واحدة فقط
+TORCH_AUTO_TUNE = False        # قياس أسرع عدد خيوط torch لـ Whisper عند البدء (يُتجاهل إذا حُدد TORCH_THREADS)
+VOSK_THREADS = None            # خيوط Kaldi/BLAS لـ Vosk - تُطبق عند استيراد المكتبة
+CAPTURE_CPU_AFFINITY = None    # أنوية خيط التقاط الصوت مثل [0] (Linux فقط) - None = بدون تقييد
+
+# الالتقاط من عدة ميكروفونات (multi_mic.py)
+MULTI_MIC_DEVICES = None       # مثل {"مذيع": 1, "ضيف": 2}: اسم القناة → فهرس جهاز الإدخال
+
+# بوابة الثقة قبل المعالجة اللاحقة (التصحيح، الترجمة، النطق، الكتابة)
+CONFIDENCE_GATE_ENABLED = True
+CONFIDENCE_DROP_BELOW = 0.3     # إسقاط النتائج الأقل ثقة من هذا الحد
+CONFIDENCE_DEFER_BELOW = 0.55   # تأجيل النتائج بين الحدين حتى تؤكدها الجملة التالية
+CONFIDENCE_DEFER_WINDOW = 3.0   # مدة صلاحية النتيجة المؤجلة (بالثواني)
+# حدّا (الإسقاط، التأجيل) لكل محرك: ثقة Whisper هي exp(avg_logprob) و0.37 ≈ logprob -1
+# (حد Whisper نفسه لفشل فك الترميز)، بينما ثقة Vosk متوسط conf الكلمات
+CONFIDENCE_THRESHOLDS = {
+    'vosk': (0.3, 0.55),
+    'whisper': (0.37, 0.5),
+    'faster-whisper': (0.37, 0.5),
+    'google': (0.3, 0.55),
+}
+
 # إعدادات الكتابة
 TYPING_METHOD = "keyboard"     # keyboard أو pyautogui
 TYPING_DELAY = 0.01            # التأخير بين الأحرف (بالثواني)
 AUTO_SPACE = True              # إضافة مسافة تلقائية بعد كل كلمة
+TYPING_PASTE_THRESHOLD = 20    # النصوص بهذا الطول فأكثر تُلصق عبر الحافظة دفعة واحدة (None = لا لصق)
+TYPING_PASTE_SETTLE = 0.03     # انتظار قراءة التطبيق للحافظة قبل استعادة محتواها (بالثواني)
 
 # إعدادات الواجهة
 USE_CUSTOMTKINTER = True       # استخدام CustomTkinter إذا كان متاحاً
@@ -34,8 +91,29 @@ WINDOW_HEIGHT = 700
 HISTORY_FILE = "voice_history.txt"  # ملف حفظ التاريخ
 CONFIG_FILE = "config.json"          # ملف الإعدادات المحفوظة
 
+# أرشيف صوت الجمل (audio_archive.py) لإعادة المعالجة وضبط الجودة
+AUDIO_ARCHIVE_ENABLED = False
+AUDIO_ARCHIVE_DIR = os.path.join(os.path.expanduser("~"), ".voice_to_text", "archive")
+AUDIO_ARCHIVE_CODEC = None     # "flac" (يتطلب SpeechRecognition) أو "zdelta" - None = FLAC إن توفر
+AUDIO_ARCHIVE_SEGMENT_MB = 64  # حجم ملف المقطع قبل بدء مقطع جديد
+AUDIO_ARCHIVE_MAX_MB = 1024    # الحجم الكلي قبل حذف أقدم المقاطع (None = بلا حد)
+
+# ذاكرة نتائج التعرف المؤقتة (result_cache.py): الملف المكرر يُعاد نصه فوراً
+RESULT_CACHE_ENABLED = False
+RESULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".voice_to_text", "result_cache.db")
+RESULT_CACHE_MAX_MB = 64       # الحجم الأقصى قبل إخلاء الأقدم استخداماً
+
+# إعادة تعرف الجمل المؤرشفة بنموذج أكبر في أوقات الخمول (retranscriber.py - يتطلب الأرشيف)
+RETRANSCRIBE_ENABLED = False
+RETRANSCRIBE_MODEL_SIZE = "small"  # أكبر من WHISPER_MODEL_SIZE المستخدم للإملاء المباشر
+RETRANSCRIBE_ENGINE = None     # "whisper" أو "faster-whisper" - None = faster-whisper إن توفر
+RETRANSCRIBE_IDLE_DELAY = 10.0  # ثوانٍ من الخمول بعد آخر تسجيل قبل البدء
+RETRANSCRIBE_MIN_INTERVAL = 5.0  # أقل مدة بين جملتين (بالثواني)
+RETRANSCRIBE_MAX_CPU = 50      # لا يعمل إذا تجاوز حمل المعالج هذه النسبة (%)
+
 # مسارات النماذج
 MODELS_DIR = os.path.join(os.path.dirname(__file__), "models")
+WHISPER_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".voice_to_text", "whisper")  # النماذج المكمّمة
 VOSK_MODELS = {
     "ar": os.path.join(MODELS_DIR, "vosk-model-ar-0.22"),
     "en": os.path.join(MODELS_DIR, "vosk-model-en-us-0.22"),
@@ -50,7 +128,12 @@ CORRECTIONS = {
     "وين": "أين",
 }
 
-# الأوامر الصوتية
+# الأوامر الصوتية (voice_commands.py): نص يُكتب، أو {"key": مفتاح}، أو {"hotkey": [مفاتيح]}
+# "mod" في المفاتيح = command على macOS و ctrl على غيره. أوامر التحرير (حذف، تراجع...)
+# كلمات يومية تُنطق في الإملاء العادي، فإن أُضيفت فببادئة لا تُقال عرضاً، مثل:
+#     "أمر حذف": {"key": "backspace"},
+#     "أمر تراجع": {"hotkey": ["mod", "z"]},
+#     "أمر تحديد الكل": {"hotkey": ["mod", "a"]},
 VOICE_COMMANDS = {
     "سطر جديد": "\n",
     "نقطة": ".",
@@ -62,5 +145,12 @@ VOICE_COMMANDS = {
     "قوس مفتوح": "(",
     "قوس مغلق": ")",
     "مسافة": " ",
+    "تاب": {"key": "tab"},
 }
 
+# ملفات القواميس الخارجية (dictionary_files.py): {"version": رقم, "corrections"/"commands": {...}}
+# تُنشأ من القاموسين أعلاه عند غيابها، ثم يُعاد تحميلها عند تعديلها دون إعادة تشغيل
+CORRECTIONS_FILE = os.path.join(os.path.expanduser("~"), ".voice_to_text", "corrections.json")
+VOICE_COMMANDS_FILE = os.path.join(os.path.expanduser("~"), ".voice_to_text", "voice_commands.json")
+DICTIONARY_RELOAD_INTERVAL = 2.0  # ثوانٍ بين فحوص تعديل الملفات (0 = بدون مراقبة)
+
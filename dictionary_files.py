@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+ملفات القواميس الخارجية (التصحيحات والأوامر الصوتية) مع إعادة تحميل أثناء التشغيل
+
+كل ملف JSON بالشكل {"version": 3, "<القسم>": {...}}. يُراقب تاريخ تعديله
+وحجمه بالاستطلاع، وعند تغيّره يُقرأ ويُبنى المُطابق الجديد (آلة Aho-Corasick أو
+تعبير الأوامر) في خيط المراقبة، ثم يُبدّل مرجع واحد دفعة واحدة: من يقرأ
+current لا يرى أبداً بنية نصف مبنية، والملف المعطوب يُبقي النسخة السابقة.
+"""
+
+import json
+import os
+import threading
+
+try:
+    import config
+    CONFIG_AVAILABLE = True
+except ImportError:
+    CONFIG_AVAILABLE = False
+
+
+def load_dictionary_file(path, section):
+    """
+    قراءة ملف قاموس والتحقق من صيغته
+
+    Returns:
+        (الإصدار, القاموس)
+
+    Raises:
+        ValueError: إذا لم يكن الملف بالصيغة المتوقعة
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        try:
+            data = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"JSON غير صالح في {path}: {e}") from e
+
+    if not isinstance(data, dict):
+        raise ValueError(f"{path}: المتوقع كائن JSON")
+    version = data.get('version')
+    if not isinstance(version, int) or isinstance(version, bool):
+        raise ValueError(f"{path}: الحقل version يجب أن يكون عدداً صحيحاً")
+    entries = data.get(section)
+    if not isinstance(entries, dict):
+        raise ValueError(f"{path}: القسم '{section}' يجب أن يكون قاموساً")
+    return version, entries
+
+
+def save_dictionary_file(path, section, entries, version=1):
+    """كتابة ملف قاموس بشكل ذري (ملف مؤقت ثم os.replace) فلا يقرأ المراقب ملفاً نصف مكتوب"""
+    directory = os.path.dirname(str(path))
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': version, section: entries}, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, path)
+
+
+class DictionaryWatcher:
+    """
+    مُطابق مبني من ملف قاموس، يُعاد بناؤه في الخلفية عند تعديل الملف
+
+    - current: المُطابق الحالي (قراءة مرجع واحد، آمنة من أي خيط)
+    - version: إصدار الملف الذي بُني منه المُطابق الحالي
+    - إذا لم يوجد الملف يُنشأ من defaults بالإصدار 1 ليعدّله المستخدم
+    """
+
+    def __init__(self, path, section, build, defaults=None, poll_interval=2.0):
+        """
+        Args:
+            path: مسار ملف JSON
+            section: اسم القسم داخل الملف ("corrections" أو "commands")
+            build: دالة تأخذ القاموس وتعيد المُطابق المبني بالكامل
+            defaults: القاموس الابتدائي عند غياب الملف أو تعذر قراءته
+            poll_interval: ثوانٍ بين فحوص تاريخ التعديل
+        """
+        self.path = str(path)
+        self.section = section
+        self.build = build
+        self.poll_interval = poll_interval
+        self.reloads = 0
+        self.errors = 0
+        self._signature = None
+        # يُمسك طوال القراءة والبناء والتبديل: من يعدّل مدخلات build من خيط آخر
+        # (مثل TextCorrector.add_correction) يمسكه فلا يتقاطع مع بناء جارٍ
+        self.lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        defaults = dict(defaults or {})
+        if not os.path.exists(self.path):
+            try:
+                save_dictionary_file(self.path, section, defaults)
+            except OSError as e:
+                print(f"⚠️ تعذر إنشاء {self.path}: {e}")
+
+        # (الإصدار, المُطابق) في مرجع واحد حتى يتبدلا معاً؛ الإصدار 0 = الافتراضي
+        self._state = None
+        self.check()
+        if self._state is None:
+            self._state = (0, build(defaults))
+
+    @property
+    def current(self):
+        return self._state[1]
+
+    @property
+    def version(self):
+        return self._state[0]
+
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def check(self):
+        """
+        فحص الملف مرة واحدة وإعادة البناء إذا تغيّر
+
+        Returns:
+            True إذا بُدّل المُطابق
+        """
+        signature = self._file_signature()
+        if signature is None or signature == self._signature:
+            return False
+
+        with self.lock:
+            previous_signature = self._signature
+            # يُسجّل التوقيع حتى لو فشلت القراءة: الملف المعطوب لا يُعاد تحليله
+            # في كل دورة، والحفظ التالي من المحرر يغيّر التوقيع فيُقرأ من جديد
+            self._signature = signature
+
+            try:
+                version, entries = load_dictionary_file(self.path, self.section)
+                matcher = self.build(entries)
+            except (OSError, ValueError, TypeError) as e:
+                self.errors += 1
+                print(f"⚠️ تجاهل {os.path.basename(self.path)}: {e}")
+                return False
+            except Exception as e:
+                # خطأ غير متوقع أثناء البناء ليس عيباً في الملف: يُعاد المحاولة في الدورة التالية
+                self._signature = previous_signature
+                self.errors += 1
+                print(f"⚠️ فشل بناء {os.path.basename(self.path)}، إعادة المحاولة لاحقاً: {e}")
+                return False
+
+            previous = self._state
+            self._state = (version, matcher)
+        self.reloads += 1
+        if previous is not None:
+            print(f"🔄 أُعيد تحميل {os.path.basename(self.path)}: "
+                  f"الإصدار {previous[0]} → {version} ({len(entries)} مدخل)")
+        return True
+
+    def start(self):
+        """بدء خيط المراقبة (خفيف: stat واحد كل poll_interval)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name=f'watch-{self.section}', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """إيقاف خيط المراقبة"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(self.poll_interval + 1)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"⚠️ خطأ في مراقبة {self.path}: {e}")
+
+
+def create_watcher_from_config(path_setting, section, build, defaults):
+    """
+    مراقب لملف قاموس من إعدادات config.py
+
+    Returns:
+        DictionaryWatcher يعمل في الخلفية، أو None إذا لم يُحدد ملف
+    """
+    path = getattr(config, path_setting, None) if CONFIG_AVAILABLE else None
+    if not path:
+        return None
+    interval = getattr(config, 'DICTIONARY_RELOAD_INTERVAL', 2.0) if CONFIG_AVAILABLE else 2.0
+    watcher = DictionaryWatcher(path, section, build, defaults, poll_interval=interval)
+    if interval:
+        watcher.start()
+    return watcher
+
+
+def test_dictionary_files():
+    """اختبار التحميل وإعادة البناء والتبديل والإبقاء على الإصدار السابق عند ملف معطوب"""
+    import tempfile
+    import time
+    from text_replacer import AhoCorasickReplacer
+
+    print("🧪 اختبار إعادة تحميل القواميس")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "corrections.json")
+        watcher = DictionaryWatcher(
+            path, 'corrections',
+            lambda entries: AhoCorasickReplacer(entries).compile(),
+            defaults={"وين": "أين"}, poll_interval=0.05
+        )
+        watcher.start()
+        assert watcher.version == 1 and watcher.current.replace("وين رحت") == "أين رحت"
+
+        # قارئ مستمر يحاكي رد نداء التعرف أثناء التبديلات
+        seen = set()
+        stop = threading.Event()
+
+        def reader():
+            while not stop.is_set():
+                seen.add(watcher.current.replace("وين ليش"))
+
+        thread = threading.Thread(target=reader)
+        thread.start()
+
+        entries = {f"كلمة{i}": f"بديل{i}" for i in range(20000)}
+        entries.update({"وين": "أين", "ليش": "لماذا"})
+        started = time.perf_counter()
+        save_dictionary_file(path, 'corrections', entries, version=2)
+        while watcher.version != 2 and time.perf_counter() - started < 10:
+            time.sleep(0.01)
+        print(f"⏱️ الإصدار 2 ({len(entries)} مدخل) فعّال بعد "
+              f"{(time.perf_counter() - started) * 1000:.0f} ms")
+
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('{"version": 3, "corrections": {')  # حفظ نصف مكتمل
+        time.sleep(0.2)
+        stop.set()
+        thread.join()
+        watcher.stop()
+
+        assert watcher.version == 2, "الملف المعطوب يجب ألا يستبدل الإصدار السابق"
+        assert seen <= {"أين ليش", "أين لماذا"}, f"حالة وسيطة: {seen}"
+        print(f"📊 نتائج القارئ أثناء التبديل: {sorted(seen)}")
+        print("✅ التبديل ذري والملف المعطوب يُتجاهل")
+
+
+if __name__ == "__main__":
+    test_dictionary_files()
@@ -24,6 +24,21 @@ try:
 except ImportError:
     PIL_AVAILABLE = False
 
+# استيراد الإعدادات
+try:
+    import config
+    CONFIG_AVAILABLE = True
+except ImportError:
+    CONFIG_AVAILABLE = False
+    config = None
+
+# سجل النصوص المحولة
+try:
+    from utils import HistoryManager
+    HISTORY_AVAILABLE = True
+except ImportError:
+    HISTORY_AVAILABLE = False
+
 # استيراد نظام TTS
 try:
     from text_to_speech import TextToSpeech
@@ -48,6 +63,8 @@ class VoiceTypingGUI:
         """
         self.recognizer = recognizer
         self.typer = typer
+        self.typing_worker = None  # خيط الكتابة (يُنشأ مع أول نص)
+        self._typing_lock = threading.Lock()  # _type_async يُستدعى من خيوط التعرف وخيط الواجهة
         self.model_manager = model_manager
         self.spell_checker = spell_checker
         self.is_listening = False
@@ -56,6 +73,20 @@ class VoiceTypingGUI:
         self.current_language = 'ar'
         self.offline_mode = 'offline_first'
         
+        # بوابة الثقة (تُنشأ مع أول استماع)
+        self.confidence_gate = None
+        
+        # إعادة التعرف بنموذج أكبر في الخمول (تُنشأ مع أول استماع إذا كانت مفعلة)
+        self.retranscriber = None
+        
+        # سجل النتائج (النص مع المحرك والثقة والتوقيتات)
+        self.history = None
+        if HISTORY_AVAILABLE:
+            try:
+                self.history = HistoryManager()
+            except Exception as e:
+                print(f"⚠️ فشل تهيئة السجل: {e}")
+        
         # تهيئة نظام TTS
         self.tts = None
         if TTS_AVAILABLE:
@@ -817,7 +848,8 @@ class VoiceTypingGUI:
                                 language=self.current_language,
                                 model_path=str(model_path),
                                 use_google_fallback=True,
-                                offline_only=False
+                                offline_only=False,
+                                audio_archive=self._load_audio_archive()
                             )
                             print("✅ تم تحميل محرك Vosk بنجاح")
                             self.update_status("✅ تم تحميل Vosk", "#00ff00")
@@ -833,7 +865,8 @@ class VoiceTypingGUI:
                             engine='google',
                             language=self.current_language,
                             use_google_fallback=False,
-                            offline_only=False
+                            offline_only=False,
+                            audio_archive=self._load_audio_archive()
                         )
                         print("✅ تم استخدام Google Speech Recognition")
                         self.update_status("✅ جاهز مع Google", "#00ff00")
@@ -898,6 +931,11 @@ class VoiceTypingGUI:
                     messagebox.showerror("خطأ", error_msg)
                     self.update_status("❌ الكتابة غير متاحة", "#ff0000")
                     return
+        
+        # إعادة التعرف في الخمول تتوقف فور بدء التسجيل
+        self._ensure_retranscriber()
+        if self.retranscriber:
+            self.retranscriber.pause()
             
         self.is_listening = True
         
@@ -938,30 +976,39 @@ class VoiceTypingGUI:
         print("\n⏹️ طلب إيقاف التسجيل...")
         self.is_listening = False
         
-        # إيقاف التسجيل في thread منفصل لمنع التجميد
-        def stop_in_background():
-            if self.recognizer:
-                try:
-                    self.recognizer.stop_recording()
-                except Exception as e:
-                    print(f"⚠️ خطأ في إيقاف التسجيل: {e}")
-            
-            # الانتظار لإيقاف الـ thread
-            if self.listening_thread and self.listening_thread.is_alive():
-                try:
-                    self.listening_thread.join(timeout=1.0)  # تقليل الوقت من 2 إلى 1 ثانية
-                except:
-                    pass
-            
-            # تحديث الواجهة في الخيط الرئيسي
-            self.root.after(0, self._update_ui_after_stop)
+        # طلب الإيقاف فوري ولا يحجب الواجهة: خيط الاستماع يستيقظ ويكمل الإيقاف بنفسه
+        if self.recognizer:
+            try:
+                self.recognizer.request_stop()
+            except Exception as e:
+                print(f"⚠️ خطأ في إيقاف التسجيل: {e}")
         
-        # بدء الإيقاف في خيط منفصل
-        stop_thread = threading.Thread(target=stop_in_background, daemon=True)
-        stop_thread.start()
+        self._update_ui_when_idle()
+    
+    def _update_ui_when_idle(self):
+        """تحديث الواجهة عند وصول المحرك للخمول (فحص دوري بدلاً من خيط انتظار)"""
+        listening = self.listening_thread is not None and self.listening_thread.is_alive()
+        if listening and self.recognizer and not self.recognizer.wait_until_idle(0):
+            self.root.after(20, self._update_ui_when_idle)
+            return
+        self._update_ui_after_stop()
+    
+    def _ensure_retranscriber(self):
+        """إنشاء مُجدول إعادة التعرف في الخمول مرة واحدة (إذا كان مفعلاً في الإعدادات)"""
+        if self.retranscriber or not self.recognizer:
+            return
+        try:
+            from retranscriber import create_retranscriber_from_config
+            self.retranscriber = create_retranscriber_from_config(self.recognizer, self.history)
+            if self.retranscriber:
+                self.retranscriber.start()
+        except Exception as e:
+            print(f"⚠️ فشل تهيئة إعادة التعرف في الخمول: {e}")
     
     def _update_ui_after_stop(self):
         """تحديث الواجهة بعد الإيقاف"""
+        if self.retranscriber:
+            self.retranscriber.resume()
         try:
             if CUSTOMTK_AVAILABLE:
                 self.record_button.configure(
@@ -978,18 +1025,63 @@ class VoiceTypingGUI:
             
             self.update_status("⏸️ متوقف", "#00ff00")
             print("✅ تم إيقاف التسجيل بنجاح")
+            
+            stop_stats = self.recognizer.last_stop_stats if self.recognizer else {}
+            if stop_stats:
+                print(f"⏱️ زمن الإيقاف: {stop_stats['latency'] * 1000:.0f} ms")
+            if self.typing_worker:
+                typing_stats = self.typing_worker.get_stats()
+                print(f"⌨️ الكتابة: {typing_stats['segments']} نص في {typing_stats['injections']} حقن، "
+                      f"انتظار {typing_stats['mean_latency_ms']:.0f} ms (أقصى {typing_stats['max_latency_ms']:.0f}), "
+                      f"في الطابور {typing_stats['depth']}")
+            
+            if self.confidence_gate:
+                self.confidence_gate.flush()
+                stats = self.confidence_gate.get_stats()
+                skipped = ", ".join(f"{stage}: {count}" for stage, count in stats['skipped_work'].items())
+                print(f"📊 بوابة الثقة: مقبول {stats['accepted']}، مُسقط {stats['dropped']}، "
+                      f"مؤجل {stats['deferred']} (مدمج {stats['merged']}، منتهٍ {stats['expired']})")
+                if skipped:
+                    print(f"   ⚡ عمل تم تجنبه: {skipped}")
         except Exception as e:
             print(f"⚠️ خطأ في تحديث الواجهة: {e}")
         
+    def _load_audio_archive(self):
+        """أرشيف صوت الجمل المشترك (None إذا كان معطلاً أو تعذر فتحه)"""
+        try:
+            from audio_archive import create_archive_from_config
+            return create_archive_from_config()
+        except Exception as e:
+            print(f"⚠️ فشل تهيئة أرشيف الصوت: {e}")
+            return None
+    
     def _listen_continuous(self):
         """حلقة الاستماع المستمر"""
         try:
             print("\n🎤 بدء الاستماع المستمر...")
             print(f"   المحرك: {self.recognizer.engine if self.recognizer else 'غير موجود'}")
             
-            def on_text_recognized(text):
-                """استدعاء عند التعرف على نص"""
-                print(f"🔊 تم التعرف على نص: '{text}'")
+            if self.confidence_gate is None and (not CONFIG_AVAILABLE or config.CONFIDENCE_GATE_ENABLED):
+                from speech_recognizer import ConfidenceGate
+                self.confidence_gate = ConfidenceGate(
+                    drop_below=config.CONFIDENCE_DROP_BELOW if CONFIG_AVAILABLE else 0.3,
+                    defer_below=config.CONFIDENCE_DEFER_BELOW if CONFIG_AVAILABLE else 0.55,
+                    defer_window=config.CONFIDENCE_DEFER_WINDOW if CONFIG_AVAILABLE else 3.0,
+                    stages_provider=self._downstream_stages,
+                    thresholds=getattr(config, 'CONFIDENCE_THRESHOLDS', None) if CONFIG_AVAILABLE else None
+                )
+            
+            def on_text_recognized(result):
+                """استدعاء عند التعرف على نص (RecognitionResult)"""
+                text = result.text
+                confidence = f", ثقة {result.confidence:.0%}" if result.confidence is not None else ""
+                print(f"🔊 تم التعرف على نص: '{text}' ({result.engine}{confidence}, "
+                      f"{result.processing_time * 1000:.0f} ms)")
+                
+                # إسقاط أو تأجيل النتائج منخفضة الثقة قبل المراحل المكلفة
+                if self.confidence_gate:
+                    text = self.confidence_gate.filter(result)
+                
                 if text and text.strip():
                     # تصحيح إملائي إذا كان مفعلاً
                     if self.spell_check_enabled.get() and self.spell_checker:
@@ -1005,6 +1097,13 @@ class VoiceTypingGUI:
                             print(f"⚠️ خطأ في المصحح الإملائي: {e}")
                     
                     self.current_text = text
+                    if self.history:
+                        try:
+                            row_id = self.history.save_result(result, text)
+                            if result.utterance_id and self.recognizer.audio_archive:
+                                self.recognizer.audio_archive.link_history(result.utterance_id, row_id)
+                        except Exception as e:
+                            print(f"⚠️ خطأ في حفظ السجل: {e}")
                     # إضافة النص للواجهة
                     self.root.after(0, self._add_text_to_display, text)
                     
@@ -1016,12 +1115,8 @@ class VoiceTypingGUI:
                         # كتابة النص في التطبيق النشط (فقط إذا كان مفعّلاً)
                         if self.auto_type_enabled.get() and self.typer:
                             print(f"⌨️ جاري الكتابة: '{text}'")
-                            try:
-                                # كتابة النص مع مسافة في النهاية (فاصل الجملة)
-                                self.typer.type_text(text + " ")
-                                print("✅ تم الكتابة بنجاح (مع مسافة فاصلة)")
-                            except Exception as e:
-                                print(f"❌ خطأ في الكتابة: {e}")
+                            # كتابة النص مع مسافة في النهاية (فاصل الجملة)
+                            self._type_async(text + " ")
                         elif not self.auto_type_enabled.get():
                             print("ℹ️ الكتابة التلقائية معطلة")
                         else:
@@ -1044,6 +1139,35 @@ class VoiceTypingGUI:
                 f"❌ خطأ: {msg}", "#ff0000"
             ))
             
+    def _type_async(self, text):
+        """
+        إرسال نص لخيط الكتابة بدلاً من كتابته في خيط التعرف (أو خيط الواجهة)
+        
+        تطبيق بطيء الاستجابة يؤخر الكتابة فقط، والنصوص المتراكمة تُدمج في حقن واحد
+        """
+        # خيط كتابة واحد طوال عمر التطبيق: خيطان يكتبان في النافذة نفسها يخلطان الترتيب
+        with self._typing_lock:
+            if self.typing_worker is None:
+                from auto_typer import TypingWorker
+                self.typing_worker = TypingWorker(self.typer)
+            elif self.typing_worker.typer is not self.typer:
+                # تغيّرت طريقة الكتابة: الخيط نفسه يكمل طابوره بالكاتب الجديد من الدفعة التالية
+                self.typing_worker.typer = self.typer
+            self.typing_worker.submit(text)
+    
+    def _downstream_stages(self):
+        """أسماء المراحل اللاحقة التي كانت ستُنفذ لكل نتيجة بالإعدادات الحالية"""
+        stages = []
+        if self.spell_check_enabled.get() and self.spell_checker:
+            stages.append('spell_check')
+        if self.auto_translate_enabled.get():
+            stages.append('translation')
+            if self.tts_enabled.get() and self.tts:
+                stages.append('tts')
+        if self.auto_type_enabled.get() and self.typer:
+            stages.append('typing')
+        return stages
+    
     def _add_text_to_display(self, text):
         """إضافة نص إلى منطقة العرض"""
         self.text_display.insert("end", text + "\n")
@@ -1110,12 +1234,8 @@ class VoiceTypingGUI:
                 # كتابة النص المترجم إذا كانت الكتابة التلقائية مفعلة
                 if self.auto_type_enabled.get() and self.typer:
                     print(f"⌨️ جاري كتابة النص المترجم: '{translated_text}'")
-                    try:
-                        # كتابة النص المترجم مع مسافة في النهاية (فاصل الجملة)
-                        self.typer.type_text(translated_text + " ")
-                        print("✅ تم كتابة النص المترجم بنجاح (مع مسافة فاصلة)")
-                    except Exception as e:
-                        print(f"❌ خطأ في كتابة النص المترجم: {e}")
+                    # كتابة النص المترجم مع مسافة في النهاية (فاصل الجملة)
+                    self._type_async(translated_text + " ")
                 
                 # النطق التلقائي إذا كان مفعلاً
                 if self.tts_enabled.get() and self.tts:
@@ -1568,6 +1688,20 @@ class VoiceTypingGUI:
             if self.listening_thread and self.listening_thread.is_alive():
                 self.listening_thread.join(timeout=1.0)
             
+            if self.retranscriber:
+                self.retranscriber.stop(timeout=1.0)
+            
+            # كتابة ما تبقى في طابور الكتابة
+            if self.typing_worker:
+                self.typing_worker.stop(timeout=1.0)
+            
+            if self.recognizer:
+                self.recognizer.close()
+            
+            # كتابة ما تبقى من صوت الجمل في الأرشيف
+            if self.recognizer and self.recognizer.audio_archive:
+                self.recognizer.audio_archive.close()
+            
             # إغلاق النافذة
             self.root.quit()
             self.root.destroy()
@@ -256,10 +256,19 @@ class VoiceTypingApp:
                 logging.error(f"❌ نموذج {language} غير موجود")
                 return False
             
+            # الأرشيف نسخة واحدة يملكها التطبيق (تُغلق في cleanup)
+            archive = None
+            try:
+                from audio_archive import create_archive_from_config
+                archive = create_archive_from_config()
+            except Exception as e:
+                logging.warning(f"⚠️ فشل تهيئة أرشيف الصوت: {e}")
+            
             self.recognizer = SpeechRecognizer(
                 engine=model_type,
                 model_path=model_path,
-                language=language
+                language=language,
+                audio_archive=archive
             )
             
             logging.info(f"✅ تم تحميل محرك {model_type}")
@@ -337,6 +346,12 @@ class VoiceTypingApp:
                 logging.debug("✅ تم إيقاف التسجيل")
             except Exception as e:
                 logging.warning(f"خطأ في إيقاف التسجيل: {e}")
+            self.recognizer.close()
+            
+            # كتابة ما تبقى من صوت الجمل في الأرشيف
+            archive = getattr(self.recognizer, 'audio_archive', None)
+            if archive:
+                archive.close()
         
         # إغلاق الواجهة
         if self.gui and hasattr(self.gui, 'root'):
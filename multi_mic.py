@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+الالتقاط والتعرف المتزامن من عدة ميكروفونات (مثل سماعتين في استوديو مقابلات)
+كل ميكروفون قناة مستقلة باسمها، وكل القنوات تشارك نماذج المحرك نفسه
+"""
+
+import threading
+import time
+
+from speech_recognizer import SpeechRecognizer, PYAUDIO_AVAILABLE
+
+try:
+    import pyaudio
+except ImportError:
+    pyaudio = None
+
+try:
+    import config
+    CONFIG_AVAILABLE = True
+except ImportError:
+    CONFIG_AVAILABLE = False
+
+
+def list_input_devices():
+    """
+    قائمة أجهزة الإدخال المتاحة
+
+    Returns:
+        list: [(الفهرس, الاسم, عدد القنوات), ...]
+    """
+    if not PYAUDIO_AVAILABLE:
+        return []
+
+    audio = pyaudio.PyAudio()
+    try:
+        devices = []
+        for index in range(audio.get_device_count()):
+            info = audio.get_device_info_by_index(index)
+            if info.get('maxInputChannels', 0) > 0:
+                devices.append((index, info['name'], info['maxInputChannels']))
+        return devices
+    finally:
+        audio.terminate()
+
+
+class MultiMicTranscriber:
+    """
+    تعرف متزامن من عدة أجهزة إدخال
+
+    لكل قناة خيط التقاط وكشف صمت ومعرِّف خاص بها (SpeechRecognizer.spawn_channel)،
+    والتعرف يجري في خيوط منفصلة: Kaldi و CTranslate2 يحرران GIL فتتوزع
+    القنوات على أنوية المعالج، بينما يبقى نموذج واحد لكل لغة في الذاكرة.
+    """
+
+    def __init__(self, recognizer: SpeechRecognizer, devices: dict):
+        """
+        Args:
+            recognizer: محرك محمّل تشارك القنوات نماذجه
+            devices: قاموس {اسم القناة: فهرس جهاز الإدخال}
+        """
+        if not PYAUDIO_AVAILABLE:
+            # sounddevice.rec تستخدم بثاً عاماً واحداً فلا تصلح لعدة أجهزة معاً
+            raise ImportError("الالتقاط من عدة ميكروفونات يتطلب PyAudio: pip install PyAudio")
+        if not devices:
+            raise ValueError("يجب تحديد جهاز إدخال واحد على الأقل")
+
+        self.recognizer = recognizer
+        self.channels = {
+            label: recognizer.spawn_channel(device_index, label)
+            for label, device_index in devices.items()
+        }
+        self.threads = {}
+
+    def start(self, callback, phrase_time_limit=8, pause_threshold=0.8):
+        """
+        بدء الاستماع على كل القنوات
+
+        Args:
+            callback: دالة تُستدعى بكائن RecognitionResult (الحقل channel يحدد القناة)
+            phrase_time_limit: الحد الأقصى لطول الجملة (بالثواني)
+            pause_threshold: وقت الانتظار عند الصمت (بالثواني)
+        """
+        # فتح الأجهزة بالتتابع قبل بدء الخيوط حتى يظهر خطأ أي جهاز فوراً
+        opened = []
+        try:
+            for channel in self.channels.values():
+                channel.start_recording()
+                opened.append(channel)
+        except Exception:
+            for channel in opened:
+                channel.stop_recording()
+            raise
+
+        for label, channel in self.channels.items():
+            thread = threading.Thread(
+                target=channel.listen_continuous,
+                args=(callback, phrase_time_limit, pause_threshold),
+                name=f'capture-{label}',
+                daemon=True
+            )
+            self.threads[label] = thread
+            thread.start()
+
+        print(f"✅ الاستماع على {len(self.channels)} قنوات: {', '.join(self.channels)}")
+
+    def stop(self, timeout=2.0):
+        """إيقاف كل القنوات معاً وانتظار وصولها للخمول"""
+        for channel in self.channels.values():
+            channel.request_stop()
+        for channel in self.channels.values():
+            channel.wait_until_idle(timeout)
+        for thread in self.threads.values():
+            thread.join(timeout=timeout)
+        self.threads = {}
+
+    def close(self):
+        """تحرير منفذي خيوط كل قناة (بعد stop)"""
+        for channel in self.channels.values():
+            channel.close()
+
+    def is_running(self):
+        """هل ما زالت أي قناة تستمع"""
+        return any(thread.is_alive() for thread in self.threads.values())
+
+
+def test_multi_mic():
+    """اختبار الالتقاط من كل أجهزة الإدخال المحددة في الإعدادات (أو أول جهازين)"""
+    print("🧪 اختبار الالتقاط من عدة ميكروفونات")
+    print("=" * 50)
+
+    devices = getattr(config, 'MULTI_MIC_DEVICES', None) if CONFIG_AVAILABLE else None
+    if not devices:
+        available = list_input_devices()
+        for index, name, channels in available:
+            print(f"🎙️ [{index}] {name} ({channels} قنوات)")
+        devices = {f"mic{index}": index for index, _name, _channels in available[:2]}
+
+    if not devices:
+        print("❌ لا توجد أجهزة إدخال")
+        return
+
+    recognizer = SpeechRecognizer(engine='vosk', language='ar')
+    transcriber = MultiMicTranscriber(recognizer, devices)
+
+    def on_result(result):
+        print(f"[{result.channel}] {result.text} ({result.processing_time * 1000:.0f} ms)")
+
+    transcriber.start(on_result)
+    print("\n🎤 تحدث في الميكروفونات... (Ctrl+C للإيقاف)")
+    try:
+        while transcriber.is_running():
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        transcriber.stop()
+        transcriber.close()
+        recognizer.close()
+
+
+if __name__ == "__main__":
+    test_multi_mic()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+ذاكرة مؤقتة لنتائج التعرف مفهرسة ببصمة محتوى الصوت
+
+الملف نفسه (أو نسخة منه باسم أو ترويسة مختلفة) يُعاد إرساله كثيراً في المهام
+الدفعية وتشغيل عينات الاختبار، فتُخزّن نتيجته على القرص بمفتاح
+(بصمة الصوت، المحرك، النموذج، اللغة، خيارات فك الترميز) وتُعاد فوراً دون
+فك ترميز. الإملاء المباشر لا يمر بها: كل جملة ملتقطة صوت جديد لن يتكرر.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import wave
+from typing import Optional
+
+try:
+    import config
+    CONFIG_AVAILABLE = True
+except ImportError:
+    CONFIG_AVAILABLE = False
+
+
+def audio_digest(path, block_size=1 << 20) -> str:
+    """
+    بصمة BLAKE2b لمحتوى ملف صوتي
+
+    لملفات WAV تُحسب من صيغة العينات وبياناتها فقط، فلا تؤثر عليها حقول
+    الترويسة الإضافية (LIST/INFO) أو اسم الملف؛ وبقية الصيغ تُبصم بايتاتها كاملة.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    try:
+        with wave.open(str(path), 'rb') as wf:
+            digest.update(f"pcm:{wf.getnchannels()}:{wf.getsampwidth()}:{wf.getframerate()}".encode())
+            frames_per_block = max(1, block_size // (wf.getnchannels() * wf.getsampwidth()))
+            while True:
+                data = wf.readframes(frames_per_block)
+                if not data:
+                    break
+                digest.update(data)
+        return digest.hexdigest()
+    except (wave.Error, EOFError):
+        pass
+
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(b"file:")
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class RecognitionCache:
+    """
+    نتائج تعرف على القرص (SQLite) بحد حجم وإخلاء الأقدم استخداماً (LRU)
+
+    كل مدخل يحفظ النص مع حالة آخر تعرف (المحرك الفعلي والثقة والكلمات)
+    حتى تُعاد النتيجة المنظمة كاملة كما لو فُك ترميزها الآن.
+    """
+
+    def __init__(self, path, max_bytes=64 * 1024 * 1024):
+        """
+        Args:
+            path: ملف قاعدة البيانات
+            max_bytes: الحجم الأقصى لمحتوى المدخلات قبل إخلاء الأقدم استخداماً
+        """
+        self.path = str(path)
+        self.max_bytes = max_bytes
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evicted': 0}
+
+        # اتصال واحد طوال عمر الذاكرة (فتح SQLite لكل عملية يكلف أكثر من الاستعلام
+        # نفسه)، ويُستخدم من أي خيط تحت self._lock
+        self._conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                text TEXT NOT NULL,
+                state TEXT,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results(last_used)")
+        self._conn.commit()
+        # الحجم الكلي يُحسب مرة واحدة ثم يُحدّث مع كل إدخال وإخلاء بدل SUM على الجدول كله
+        self._total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+
+    @staticmethod
+    def make_key(digest, engine, model, language, options='') -> str:
+        """مفتاح المدخل: البصمة مع كل ما يغيّر النتيجة (options: خيارات فك الترميز)"""
+        return f"{digest}|{engine}|{model}|{language}|{options}"
+
+    def get(self, key: str) -> Optional[tuple]:
+        """
+        Returns:
+            (النص, حالة آخر تعرف) أو None
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT text, state FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.stats['misses'] += 1
+                return None
+            self._conn.execute("UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self.stats['hits'] += 1
+        return row[0], json.loads(row[1]) if row[1] else {}
+
+    def put(self, key: str, text: str, state: Optional[dict] = None):
+        """تخزين نتيجة ثم إخلاء الأقدم استخداماً إذا تجاوز الحجم حده"""
+        state_json = json.dumps(state or {}, ensure_ascii=False)
+        size = len(key) + len(text.encode('utf-8')) + len(state_json.encode('utf-8'))
+        with self._lock:
+            previous = self._conn.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, text, state, size, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, text, state_json, size, time.time())
+            )
+            self._total += size - (previous[0] if previous else 0)
+            if self._total > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        # إخلاء حتى 90% من الحد حتى لا يتكرر الإخلاء مع كل إدخال
+        target = self.max_bytes * 0.9
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM results ORDER BY last_used"):
+            if self._total <= target:
+                break
+            victims.append((key,))
+            self._total -= size
+        self._conn.executemany("DELETE FROM results WHERE key = ?", victims)
+        self.stats['evicted'] += len(victims)
+
+    def clear(self):
+        """مسح كل المدخلات"""
+        with self._lock:
+            self._conn.execute("DELETE FROM results")
+            self._conn.commit()
+            self._total = 0
+
+    def close(self):
+        """إغلاق اتصال قاعدة البيانات"""
+        with self._lock:
+            self._conn.close()
+
+    def get_stats(self):
+        """إحصائيات الإصابة والحجم"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            stats = dict(self.stats)
+            stats['bytes'] = self._total
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        stats['entries'] = entries
+        return stats
+
+
+def create_cache_from_config() -> Optional[RecognitionCache]:
+    """إنشاء الذاكرة المؤقتة من إعدادات config.py (None إذا كانت معطلة)"""
+    if not CONFIG_AVAILABLE or not getattr(config, 'RESULT_CACHE_ENABLED', False):
+        return None
+    return RecognitionCache(
+        getattr(config, 'RESULT_CACHE_PATH'),
+        max_bytes=getattr(config, 'RESULT_CACHE_MAX_MB', 64) * 1024 * 1024
+    )
+
+
+def test_result_cache():
+    """اختبار البصمة والإصابة والإخلاء في مجلد مؤقت"""
+    import tempfile
+
+    print("🧪 اختبار ذاكرة نتائج التعرف")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as directory:
+        wav_a = os.path.join(directory, "a.wav")
+        wav_b = os.path.join(directory, "b.wav")
+        for path in (wav_a, wav_b):
+            with wave.open(path, 'wb') as wf:
+                wf.setnchannels(1)
+                wf.setsampwidth(2)
+                wf.setframerate(16000)
+                wf.writeframes(bytes(range(256)) * 500)
+        assert audio_digest(wav_a) == audio_digest(wav_b), "نفس الصوت بملفين يجب أن يطابق"
+
+        cache = RecognitionCache(os.path.join(directory, "cache.db"), max_bytes=4096)
+        key = cache.make_key(audio_digest(wav_a), 'vosk', 'vosk-model-ar-0.22', 'ar')
+        assert cache.get(key) is None
+        cache.put(key, "مرحبا بالعالم", {'engine': 'vosk', 'confidence': 0.9})
+
+        started = time.perf_counter()
+        text, state = cache.get(key)
+        print(f"⚡ إصابة في {(time.perf_counter() - started) * 1000:.2f} ms: '{text}' {state}")
+
+        for i in range(100):
+            cache.put(cache.make_key(f"{i:040x}", 'vosk', 'm', 'ar'), "نص " * 10)
+        stats = cache.get_stats()
+        print(f"📊 {stats['entries']} مدخلات، {stats['bytes']} بايت، أُخلي {stats['evicted']}")
+        assert stats['bytes'] <= 4096 and cache.get(key) is None, "الأقدم استخداماً لم يُخلَ"
+        cache.close()
+        print("✅ البصمة والإصابة والإخلاء تعمل")
+
+
+if __name__ == "__main__":
+    test_result_cache()
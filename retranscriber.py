@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+إعادة التعرف في أوقات الخمول بنموذج Whisper أكبر
+
+الإملاء المباشر يحتاج نموذجاً سريعاً، أما الجمل المؤرشفة (audio_archive.py)
+فيمكن إعادة تعرفها لاحقاً بنموذج أدق عندما يكون البرنامج خاملاً والمعالج متفرغاً،
+ويُحفظ النص المحسّن بجانب الأصلي في HistoryManager.
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+
+from speech_recognizer import (FASTER_WHISPER_AVAILABLE, WHISPER_AVAILABLE, load_faster_whisper_model,
+                               load_whisper_model, whisper_decode_lock)
+from audio_processing import trim_silence, int16_to_float32
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+try:
+    import config
+    CONFIG_AVAILABLE = True
+except ImportError:
+    CONFIG_AVAILABLE = False
+
+
+def cpu_load_percent():
+    """
+    حمل المعالج الحالي كنسبة مئوية (None إذا تعذر قياسه)
+
+    psutil إن توفر (كل الأنظمة)، وإلا متوسط الحمل لدقيقة على أنظمة Unix.
+    """
+    if PSUTIL_AVAILABLE:
+        return psutil.cpu_percent(interval=None)
+    if hasattr(os, 'getloadavg'):
+        return 100.0 * os.getloadavg()[0] / (os.cpu_count() or 1)
+    return None
+
+
+class RetranscriptionWorker:
+    """
+    النموذج الأكبر وحده لإعادة التعرف، بدون حالة المحرك المباشر
+
+    لا ينسخ SpeechRecognizer: منفذو الخيوط والأرشيف وأحداث الإيقاف والخمول
+    تبقى للمحرك المباشر وحده. لنموذج Whisper هنا قفل فك ترميز خاص به
+    (whisper_decode_lock)، فإعادة التعرف لا تؤخر فك ترميز الإملاء المباشر.
+    """
+
+    def __init__(self, engine, model_size, quantize=False, cpu_threads=None):
+        self.engine = engine
+        self.model_size = model_size
+        if engine == 'faster-whisper':
+            self.model = load_faster_whisper_model(model_size, cpu_threads)
+        else:
+            self.model = load_whisper_model(model_size, quantize)
+
+    def transcribe(self, audio, language=None, should_stop=None):
+        """
+        تعرف كامل على مصفوفة float32 بتردد 16kHz (الدقة أهم من الزمن هنا)
+
+        Args:
+            language: رمز اللغة أو None للكشف التلقائي
+            should_stop: دالة بلا وسائط تعيد True إذا يجب ترك الجملة (مثل بدء التسجيل)
+
+        Returns:
+            النص، أو None إذا قُطع التعرف (النتيجة الجزئية تُهمل)
+        """
+        should_stop = should_stop or (lambda: False)
+        if should_stop():
+            return None
+
+        if self.engine == 'faster-whisper':
+            # segments مولّد كسول: كل مقطع يُفك عند طلبه، فالفحص بينها يقطع فك الترميز فعلاً
+            segments, _info = self.model.transcribe(audio, language=language, task='transcribe')
+            texts = []
+            for segment in segments:
+                if should_stop():
+                    return None
+                texts.append(segment.text.strip())
+            return " ".join(texts).strip()
+
+        # openai-whisper لا يُقطع أثناء فك الترميز: الفحص قبله وبعده، والنتيجة
+        # التي تنتهي بعد بدء التسجيل تُهمل فتُعاد الجملة لاحقاً
+        with whisper_decode_lock(self.model):
+            if should_stop():
+                return None
+            result = self.model.transcribe(
+                audio, language=language, task='transcribe',
+                fp16=self.model.device.type != 'cpu'
+            )
+        if should_stop():
+            return None
+        return result['text'].strip()
+
+
+class IdleRetranscriber:
+    """
+    مُجدول خلفي يعيد تعرف الجمل المؤرشفة بنموذج أكبر
+
+    - يعمل فقط بعد idle_delay ثانية من آخر تسجيل، وعندما يكون حمل المعالج أقل من max_cpu
+    - جملة واحدة كل min_interval ثانية على الأكثر (تحديد المعدل)
+    - pause() أو بدء التسجيل يوقفه فوراً: faster-whisper يُقطع بين المقاطع، ونتيجة
+      Whisper التي تكتمل بعد بدء التسجيل تُهمل؛ الجملة المقطوعة لا تُعلَّم فتُعاد لاحقاً.
+      وخيطه بأولوية منخفضة (Linux) حتى لا ينافس الالتقاط على المعالج أثناء المقطع الجاري
+    - النموذج الأكبر يُحمّل عند أول جملة فقط
+    """
+
+    POLL_INTERVAL = 0.25  # ثوانٍ بين فحوص الخمول
+
+    def __init__(self, recognizer, history, archive, model_size='small', engine=None,
+                 idle_delay=10.0, min_interval=5.0, max_cpu=50.0, batch_size=20):
+        """
+        Args:
+            recognizer: المحرك المباشر (يُراقب فقط لمعرفة الخمول)
+            history: HistoryManager لحفظ النص المحسّن
+            archive: AudioArchive مصدر الجمل
+            model_size: حجم نموذج Whisper الأكبر
+            engine: "whisper" أو "faster-whisper" (None = faster-whisper إن توفر)
+            idle_delay: ثوانٍ من الخمول قبل البدء
+            min_interval: أقل مدة بين جملتين (بالثواني)
+            max_cpu: أقصى حمل للمعالج (%) يُسمح عنده بالعمل
+            batch_size: عدد الجمل المقروءة من الفهرس في كل مرة
+        """
+        if engine is None:
+            engine = 'faster-whisper' if FASTER_WHISPER_AVAILABLE else 'whisper'
+        if engine == 'faster-whisper' and not FASTER_WHISPER_AVAILABLE:
+            raise ImportError("faster-whisper غير مثبت. قم بتثبيته: pip install faster-whisper")
+        if engine == 'whisper' and not WHISPER_AVAILABLE:
+            raise ImportError("Whisper غير مثبت: pip install openai-whisper")
+
+        self.recognizer = recognizer
+        self.history = history
+        self.archive = archive
+        self.model_size = model_size
+        self.engine = engine
+        self.model_tag = f"{engine}:{model_size}"
+        self.idle_delay = idle_delay
+        self.min_interval = min_interval
+        self.max_cpu = max_cpu
+        self.batch_size = batch_size
+
+        self._worker = None  # RetranscriptionWorker بالنموذج الأكبر (يُنشأ عند أول جملة)
+        self._paused = threading.Event()
+        self._stop = threading.Event()
+        self._last_activity = time.monotonic()
+        self._last_job = 0.0
+        self._thread = None
+        self.stats = {'improved': 0, 'unchanged': 0, 'skipped': 0, 'interrupted': 0, 'busy_ms': 0.0}
+
+    def start(self):
+        """بدء الخيط الخلفي"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='retranscriber', daemon=True)
+        self._thread.start()
+        print(f"🌙 إعادة التعرف في الخمول مفعلة ({self.model_tag})")
+
+    def stop(self, timeout=5.0):
+        """إيقاف الخيط الخلفي (ينتظر انتهاء الجملة الجارية حتى المهلة)"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def pause(self):
+        """إيقاف مؤقت فوري (يقطع الجملة الجارية أيضاً)، مثلاً عند بدء التسجيل"""
+        self._paused.set()
+        self._last_activity = time.monotonic()
+
+    def resume(self):
+        """استئناف بعد الخمول (تبدأ مهلة idle_delay من الآن)"""
+        self._last_activity = time.monotonic()
+        self._paused.clear()
+
+    def _is_busy(self):
+        """هل المحرك المباشر يسجل أو يعالج جملة"""
+        recognizer = self.recognizer
+        if recognizer.is_listening or not recognizer.wait_until_idle(0):
+            self._last_activity = time.monotonic()
+            return True
+        return False
+
+    def _interrupted(self):
+        """هل يجب ترك الجملة الجارية (إيقاف، إيقاف مؤقت، أو المحرك المباشر يعمل)"""
+        return self._stop.is_set() or self._paused.is_set() or self._is_busy()
+
+    def _can_run(self):
+        if self._paused.is_set() or self._is_busy():
+            return False
+        now = time.monotonic()
+        if now - self._last_activity < self.idle_delay or now - self._last_job < self.min_interval:
+            return False
+        load = cpu_load_percent()
+        return load is None or load < self.max_cpu
+
+    def _run(self):
+        self._lower_priority()
+        while not self._stop.is_set():
+            if not self._can_run():
+                self._stop.wait(self.POLL_INTERVAL)
+                continue
+
+            pending = self.archive.pending_retranscription(self.model_tag, self.batch_size)
+            if not pending:
+                # لا جديد: فحص الفهرس مرة كل min_interval فقط
+                self._last_job = time.monotonic()
+                continue
+
+            for utterance_id, history_id, language in pending:
+                if self._stop.is_set() or not self._can_run():
+                    break
+                self._last_job = time.monotonic()
+                try:
+                    if self.retranscribe(utterance_id, history_id, language) is False:
+                        break  # قُطعت بالتسجيل: الانتظار حتى الخمول التالي
+                except Exception as e:
+                    print(f"⚠️ خطأ في إعادة التعرف: {e}")
+                    self.archive.mark_retranscribed(utterance_id, self.model_tag)
+                    self.stats['skipped'] += 1
+                self._last_job = time.monotonic()
+
+    @staticmethod
+    def _lower_priority():
+        """خفض أولوية خيط العمل (Linux: nice لكل خيط، والخيوط التي ينشئها ترثها)"""
+        if hasattr(os, 'setpriority') and hasattr(threading, 'get_native_id'):
+            try:
+                os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+            except OSError:
+                pass
+
+    def _load_worker(self):
+        """تحميل النموذج الأكبر (نفس مسارات التحميل: mmap، التكميم، الذاكرة المؤقتة)"""
+        print(f"🔄 جاري تحميل نموذج إعادة التعرف ({self.model_tag})...")
+        return RetranscriptionWorker(
+            self.engine, self.model_size,
+            quantize=getattr(self.recognizer, 'whisper_quantize', False),
+            cpu_threads=getattr(self.recognizer, 'cpu_threads', None)
+        )
+
+    def retranscribe(self, utterance_id, history_id, language=None):
+        """
+        إعادة تعرف جملة مؤرشفة واحدة وحفظ النص المحسّن
+
+        Returns:
+            النص الجديد، أو None إذا لم يعد صوت الجملة موجوداً، أو False إذا قُطع
+            التعرف (بدء تسجيل أو إيقاف) فتبقى الجملة معلّقة لإعادة المحاولة
+        """
+        audio = self.archive.read(utterance_id)
+        if audio is None:
+            self.archive.mark_retranscribed(utterance_id, self.model_tag)
+            self.stats['skipped'] += 1
+            return None
+
+        pcm, _sample_rate = audio  # الأرشيف يحفظ صوت 16kHz الذي رآه المحرك المباشر
+        started = time.perf_counter()
+        if self._worker is None:
+            self._worker = self._load_worker()
+
+        language = language if language and language != 'auto' else None
+        samples = trim_silence(np.frombuffer(pcm, dtype=np.int16))
+        text = ""
+        if len(samples) > 0:
+            text = self._worker.transcribe(int16_to_float32(samples), language,
+                                           should_stop=self._interrupted)
+        if text is None:
+            self.stats['interrupted'] += 1
+            self.stats['busy_ms'] += (time.perf_counter() - started) * 1000
+            return False
+
+        if text:
+            self.history.save_improved_text(history_id, text, self.model_tag)
+            self.stats['improved'] += 1
+        else:
+            self.stats['unchanged'] += 1
+        self.archive.mark_retranscribed(utterance_id, self.model_tag)
+        self.stats['busy_ms'] += (time.perf_counter() - started) * 1000
+        return text
+
+    def get_stats(self):
+        """إحصائيات إعادة التعرف"""
+        stats = dict(self.stats)
+        stats['model'] = self.model_tag
+        stats['paused'] = self._paused.is_set()
+        return stats
+
+
+def create_retranscriber_from_config(recognizer, history):
+    """إنشاء المُجدول من إعدادات config.py (None إذا كان معطلاً أو الأرشيف غير مفعل)"""
+    if not CONFIG_AVAILABLE or not getattr(config, 'RETRANSCRIBE_ENABLED', False):
+        return None
+    if not history or not getattr(recognizer, 'audio_archive', None):
+        print("⚠️ إعادة التعرف في الخمول تتطلب السجل وأرشيف الصوت (AUDIO_ARCHIVE_ENABLED)")
+        return None
+    return IdleRetranscriber(
+        recognizer, history, recognizer.audio_archive,
+        model_size=getattr(config, 'RETRANSCRIBE_MODEL_SIZE', 'small'),
+        engine=getattr(config, 'RETRANSCRIBE_ENGINE', None),
+        idle_delay=getattr(config, 'RETRANSCRIBE_IDLE_DELAY', 10.0),
+        min_interval=getattr(config, 'RETRANSCRIBE_MIN_INTERVAL', 5.0),
+        max_cpu=getattr(config, 'RETRANSCRIBE_MAX_CPU', 50.0)
+    )
+
+
+def test_retranscriber():
+    """إعادة تعرف الجمل المؤرشفة المعلّقة مرة واحدة ومقارنة النصين"""
+    from audio_archive import create_archive_from_config
+    from speech_recognizer import SpeechRecognizer
+    from utils import HistoryManager
+
+    print("🧪 اختبار إعادة التعرف بنموذج أكبر")
+    print("=" * 50)
+
+    archive = create_archive_from_config()
+    if archive is None:
+        print("❌ أرشيف الصوت غير مفعل (AUDIO_ARCHIVE_ENABLED)")
+        return
+    recognizer = SpeechRecognizer(engine=getattr(config, 'RECOGNITION_ENGINE', 'whisper'),
+                                  audio_archive=archive)
+
+    history = HistoryManager()
+    retranscriber = IdleRetranscriber(
+        recognizer, history, recognizer.audio_archive,
+        model_size=getattr(config, 'RETRANSCRIBE_MODEL_SIZE', 'small'),
+        engine=getattr(config, 'RETRANSCRIBE_ENGINE', None)
+    )
+    originals = {row['id']: row['text'] for row in history.get_history(limit=1000)}
+    pending = recognizer.audio_archive.pending_retranscription(retranscriber.model_tag, 5)
+    for utterance_id, history_id, language in pending:
+        text = retranscriber.retranscribe(utterance_id, history_id, language)
+        print(f"#{history_id}: '{originals.get(history_id)}' → '{text}'")
+    recognizer.audio_archive.close()
+    print(f"📊 {retranscriber.get_stats()}")
+
+
+if __name__ == "__main__":
+    test_retranscriber()
@@ -6,9 +6,39 @@
 import wave
 import tempfile
 import os
+import queue
+import copy
+import sys
+import dataclasses
+import inspect
 import threading
 import time
+import weakref
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
+
+try:
+    import config
+    CONFIG_AVAILABLE = True
+except ImportError:
+    CONFIG_AVAILABLE = False
+    config = None
+
+
+def _config_value(name, default=None):
+    """قراءة قيمة من config.py مع قيمة افتراضية إذا لم يكن متاحاً"""
+    if CONFIG_AVAILABLE:
+        return getattr(config, name, default)
+    return default
+
+
+# خيوط Kaldi/BLAS تُقرأ من متغيرات البيئة عند تحميل المكتبات،
+# لذا يجب ضبطها قبل استيراد vosk و whisper (torch يتجاوزها لاحقاً بـ set_num_threads)
+_vosk_threads = _config_value('VOSK_THREADS')
+if _vosk_threads:
+    for _env_var in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS'):
+        os.environ.setdefault(_env_var, str(_vosk_threads))
 
 try:
     # محاولة استيراد openai-whisper (الصحيح)
@@ -28,6 +58,20 @@ except Exception:
     WHISPER_AVAILABLE = False
     whisper = None
 
+try:
+    import torch
+    TORCH_AVAILABLE = True
+except Exception:
+    # مثل whisper: تثبيت torch المعطوب (مكتبات CUDA/DLL ناقصة) يرفع OSError وليس ImportError
+    TORCH_AVAILABLE = False
+    torch = None
+
+try:
+    from faster_whisper import WhisperModel
+    FASTER_WHISPER_AVAILABLE = True
+except ImportError:
+    FASTER_WHISPER_AVAILABLE = False
+
 try:
     from vosk import Model, KaldiRecognizer
     VOSK_AVAILABLE = True
@@ -35,6 +79,7 @@ except ImportError:
     VOSK_AVAILABLE = False
 
 try:
+    # SpeechRecognition اختيارية: لقراءة ملفات غير WAV فقط (الطلب نفسه عبر GoogleSpeechClient)
     import speech_recognition as sr
     GOOGLE_SR_AVAILABLE = True
 except ImportError:
@@ -54,46 +99,571 @@ except ImportError:
 
 import json
 
+from audio_processing import (SILENCE_THRESHOLD, AudioFrontEnd, StreamingResampler,
+                              trim_silence, split_at_silences, int16_to_float32)
+from google_speech import GoogleSpeechClient, GoogleSpeechError
+from result_cache import RecognitionCache, audio_digest, create_cache_from_config
+
+
+def _shutdown_executor(executor):
+    """إيقاف منفذ خيوط دون انتظار، مع إلغاء المهام التي لم تبدأ بعد"""
+    if sys.version_info >= (3, 9):
+        executor.shutdown(wait=False, cancel_futures=True)
+        return
+    # Python 3.8 لا يعرف cancel_futures: إلغاء المنتظر في الطابور يدوياً كما يفعل 3.9
+    while True:
+        try:
+            work_item = executor._work_queue.get_nowait()
+        except queue.Empty:
+            break
+        if work_item is not None:
+            work_item.future.cancel()
+    executor.shutdown(wait=False)
+
+
+def _torch_version():
+    """(major, minor) لنسخة torch المثبتة، أو (0, 0) إذا تعذرت قراءتها"""
+    try:
+        return tuple(int(part) for part in torch.__version__.split('+')[0].split('.')[:2])
+    except (AttributeError, ValueError):
+        return (0, 0)
+
+
+# torch.load(mmap=True) و load_state_dict(assign=True) أُضيفا معاً في torch 2.1
+TORCH_MMAP_SUPPORTED = TORCH_AVAILABLE and _torch_version() >= (2, 1)
+
+
+def _torch_load(path, **kwargs):
+    """
+    torch.load مع حذف الوسائط التي لا تعرفها نسخة torch المثبتة
+
+    weights_only أُضيف في torch 1.13: النسخ الأقدم ترفع TypeError الذي يبدو
+    كملف تالف، فيُعاد التكميم عند كل تشغيل. بدون الوسيط تحمّل pickle كاملاً
+    (وهو السلوك الافتراضي لتلك النسخ أصلاً).
+    """
+    parameters = inspect.signature(torch.load).parameters
+    kwargs = {name: value for name, value in kwargs.items() if name in parameters}
+    return torch.load(path, **kwargs)
+
+
+def quantize_whisper_model(model):
+    """
+    تكميم ديناميكي int8 لطبقات Linear في نموذج Whisper (للمعالج فقط)
+    
+    Args:
+        model: نموذج Whisper بدقة fp32
+        
+    Returns:
+        النموذج المكمّم
+    """
+    model = model.cpu().eval()
+    # whisper.model.Linear صنف فرعي يحوّل النوع فقط، بينما quantize_dynamic
+    # يطابق نوع الطبقة حرفياً، لذا نعيدها إلى nn.Linear (مطابقة تماماً على fp32)
+    for module in model.modules():
+        if isinstance(module, torch.nn.Linear):
+            module.__class__ = torch.nn.Linear
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+class RecognitionResult:
+    """
+    نتيجة تعرف منظمة: النص مع كلماته وتوقيتاتها وثقتها
+    
+    القوائم words و starts و ends و confidences متوازية (عنصر لكل كلمة)،
+    وتكون التوقيتات والثقة None إذا لم يوفرها المحرك.
+    """
+    
+    __slots__ = ('text', 'words', 'starts', 'ends', 'confidences',
+                 'confidence', 'engine', 'language', 'processing_time', 'channel',
+                 'utterance_id')
+    
+    def __init__(self, text, words=None, starts=None, ends=None, confidences=None,
+                 confidence=None, engine=None, language=None, processing_time=0.0,
+                 channel=None, utterance_id=None):
+        self.text = text
+        self.words = words if words is not None else text.split()
+        self.starts = starts
+        self.ends = ends
+        self.confidences = confidences
+        if confidence is None and confidences:
+            confidence = sum(confidences) / len(confidences)
+        self.confidence = confidence  # ثقة الجملة (0-1) أو None
+        self.engine = engine
+        self.language = language
+        self.processing_time = processing_time  # بالثواني
+        self.channel = channel  # اسم قناة الميكروفون (None عند ميكروفون واحد)
+        self.utterance_id = utterance_id  # رقم صوت الجملة في AudioArchive (إن كان مفعلاً)
+    
+    @classmethod
+    def from_vosk_words(cls, text, vosk_words, **kwargs):
+        """إنشاء نتيجة من قائمة كلمات Vosk (حقول word و start و end و conf)"""
+        if not vosk_words:
+            return cls(text, **kwargs)
+        return cls(
+            text,
+            words=[w['word'] for w in vosk_words],
+            starts=[w.get('start') for w in vosk_words],
+            ends=[w.get('end') for w in vosk_words],
+            confidences=[w.get('conf', 1.0) for w in vosk_words],
+            **kwargs
+        )
+    
+    def to_dict(self):
+        """تحويل النتيجة إلى قاموس (للتخزين أو JSON)"""
+        return {name: getattr(self, name) for name in self.__slots__}
+    
+    def __str__(self):
+        return self.text
+    
+    def __repr__(self):
+        confidence = f"{self.confidence:.2f}" if self.confidence is not None else "N/A"
+        return (f"RecognitionResult({self.text!r}, engine={self.engine}, "
+                f"language={self.language}, confidence={confidence})")
+
+
+class ConfidenceGate:
+    """
+    بوابة ثقة تسبق المراحل المكلفة (التصحيح، الترجمة، النطق، الكتابة)
+    
+    - ثقة أقل من drop_below: تُسقط النتيجة
+    - ثقة بين الحدين: تُؤجل، وتُدمج مع الجملة التالية المقبولة إن وصلت
+      خلال defer_window ثانية، وإلا تنتهي صلاحيتها وتُسقط
+    - ثقة غير معروفة (None): تمر كما هي
+    
+    مقاييس الثقة تختلف بين المحركات (متوسط conf كلمات Vosk مقابل exp(avg_logprob)
+    في Whisper)، لذا يمكن تحديد حدّين لكل محرك في thresholds.
+    """
+    
+    def __init__(self, drop_below=0.3, defer_below=0.55, defer_window=3.0, stages_provider=None,
+                 thresholds=None):
+        """
+        Args:
+            drop_below: حد الإسقاط الافتراضي
+            defer_below: حد التأجيل الافتراضي
+            defer_window: مدة صلاحية النتيجة المؤجلة (بالثواني)
+            stages_provider: دالة تعيد أسماء المراحل اللاحقة المفعلة حالياً (لعدّ العمل الموفّر)
+            thresholds: {المحرك: (حد الإسقاط, حد التأجيل)} - المحركات غير المذكورة تستخدم الافتراضي
+        """
+        self.drop_below = drop_below
+        self.defer_below = defer_below
+        self.thresholds = {engine: tuple(limits) for engine, limits in (thresholds or {}).items()}
+        self.defer_window = defer_window
+        self.stages_provider = stages_provider
+        self._deferred = None  # (النص, وقت التأجيل)
+        self._lock = threading.Lock()
+        self.counters = {'accepted': 0, 'dropped': 0, 'deferred': 0, 'merged': 0, 'expired': 0}
+        self.skipped_work = {}  # اسم المرحلة -> عدد الاستدعاءات التي تم تجنبها
+    
+    def filter(self, result):
+        """
+        تمرير نتيجة عبر البوابة
+        
+        Returns:
+            النص الواجب معالجته (قد يتضمن نصاً مؤجلاً سابقاً) أو None
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            confidence = result.confidence
+            drop_below, defer_below = self.thresholds.get(
+                result.engine, (self.drop_below, self.defer_below)
+            )
+            
+            if confidence is not None and confidence < drop_below:
+                self.counters['dropped'] += 1
+                self._record_skipped()
+                print(f"🚫 تم إسقاط نتيجة منخفضة الثقة ({confidence:.0%}): '{result.text}'")
+                return None
+            
+            if confidence is not None and confidence < defer_below:
+                if self._deferred:
+                    # نتيجتان مؤجلتان متتاليتان: الأقدم تُسقط ولا تُدمج
+                    self.counters['expired'] += 1
+                    self._record_skipped()
+                self._deferred = (result.text, now)
+                self.counters['deferred'] += 1
+                print(f"⏳ تم تأجيل نتيجة منخفضة الثقة ({confidence:.0%}): '{result.text}'")
+                return None
+            
+            self.counters['accepted'] += 1
+            if self._deferred:
+                # الجملة التالية مقبولة فالمؤجلة على الأرجح كلام حقيقي
+                deferred_text = self._deferred[0]
+                self._deferred = None
+                self.counters['merged'] += 1
+                return f"{deferred_text} {result.text}"
+            return result.text
+    
+    def flush(self):
+        """
+        إنهاء النتيجة المؤجلة عند توقف الاستماع (لن تصل جملة تؤكدها)
+        
+        تُحسب منتهية الصلاحية مثل تلك التي تجاوزت defer_window.
+        
+        Returns:
+            النص المؤجل الذي أُسقط أو None
+        """
+        with self._lock:
+            if not self._deferred:
+                return None
+            text = self._deferred[0]
+            self._deferred = None
+            self.counters['expired'] += 1
+            self._record_skipped()
+        print(f"⌛ أُسقطت نتيجة مؤجلة عند الإيقاف: '{text}'")
+        return text
+    
+    def _expire(self, now):
+        """إسقاط النتيجة المؤجلة إذا انتهت صلاحيتها"""
+        if self._deferred and now - self._deferred[1] > self.defer_window:
+            self._deferred = None
+            self.counters['expired'] += 1
+            self._record_skipped()
+    
+    def _record_skipped(self):
+        """عدّ المراحل اللاحقة التي لم تُستدعَ بسبب الإسقاط"""
+        stages = self.stages_provider() if self.stages_provider else []
+        for stage in stages:
+            self.skipped_work[stage] = self.skipped_work.get(stage, 0) + 1
+    
+    def get_stats(self):
+        """الحصول على عدادات البوابة والعمل الموفّر"""
+        with self._lock:
+            return {**self.counters, 'skipped_work': dict(self.skipped_work)}
+
+
+def _load_whisper_mmap(model_size):
+    """
+    تحميل Whisper بتعيين الذاكرة (mmap) من نسخة fp32 في الذاكرة المؤقتة
+
+    نقاط Whisper الأصلية بدقة fp16 فتُنسخ وتُحوّل عند كل تحميل. النسخة fp32
+    تُحفظ مرة واحدة، ثم تُربط أوزانها مباشرة بصفحات الملف (assign=True)
+    فتُقرأ عند الحاجة فقط وتتشاركها كل العمليات عبر ذاكرة نظام التشغيل.
+    """
+    cache_dir = Path(_config_value(
+        'WHISPER_CACHE_DIR', Path.home() / '.voice_to_text' / 'whisper'
+    ))
+    cache_file = cache_dir / f"whisper-{model_size}-fp32.pt"
+
+    if not cache_file.exists():
+        model = whisper.load_model(model_size, device='cpu')
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            temp_path = cache_file.with_suffix('.tmp')
+            torch.save({
+                'dims': dataclasses.asdict(model.dims),
+                'model_state_dict': model.state_dict(),
+            }, temp_path)
+            os.replace(temp_path, cache_file)
+            print(f"💾 تم حفظ نسخة fp32 القابلة للتعيين في: {cache_file}")
+        except Exception as e:
+            print(f"⚠️ فشل حفظ نسخة fp32: {e}")
+        return model
+
+    # يتطلب torch >= 2.1 (TORCH_MMAP_SUPPORTED)، والنسخ الأقدم تستخدم whisper.load_model
+    checkpoint = torch.load(cache_file, map_location='cpu', mmap=True, weights_only=True)
+
+    model = whisper.model.Whisper(whisper.model.ModelDimensions(**checkpoint['dims']))
+    model.load_state_dict(checkpoint['model_state_dict'], assign=True)
+
+    # رؤوس المحاذاة ليست جزءاً من state_dict (نفس ما يفعله whisper.load_model)
+    alignment_heads = getattr(whisper, '_ALIGNMENT_HEADS', {}).get(model_size)
+    if alignment_heads is not None:
+        model.set_alignment_heads(alignment_heads)
+
+    print(f"⚡ تم ربط أوزان Whisper بالذاكرة من: {cache_file}")
+    return model
+
+
+def _load_quantized_whisper(model_size):
+    """تحميل Whisper المكمّم من الذاكرة المؤقتة على القرص، أو تكميمه وحفظه لأول مرة"""
+    if not TORCH_AVAILABLE:
+        raise ImportError("التكميم يتطلب torch: pip install torch")
+
+    cache_dir = Path(_config_value(
+        'WHISPER_CACHE_DIR', Path.home() / '.voice_to_text' / 'whisper'
+    ))
+    # الأوزان المكمّمة مرتبطة بنسخة torch التي أنشأتها
+    cache_file = cache_dir / f"whisper-{model_size}-int8-torch{torch.__version__}.pt"
+
+    if cache_file.exists():
+        try:
+            model = _torch_load(cache_file, map_location='cpu', weights_only=False)
+            print(f"⚡ تم تحميل النموذج المكمّم من: {cache_file}")
+            return model
+        except Exception as e:
+            print(f"⚠️ ملف النموذج المكمّم تالف، سيُعاد إنشاؤه: {e}")
+
+    print("🔧 جاري تكميم النموذج إلى int8 (مرة واحدة فقط)...")
+    model = quantize_whisper_model(whisper.load_model(model_size, device='cpu'))
+
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        # الكتابة في ملف مؤقت ثم الاستبدال حتى لا يبقى ملف ناقص عند الانقطاع
+        temp_path = cache_file.with_suffix('.tmp')
+        torch.save(model, temp_path)
+        os.replace(temp_path, cache_file)
+        print(f"💾 تم حفظ النموذج المكمّم في: {cache_file}")
+    except Exception as e:
+        print(f"⚠️ فشل حفظ النموذج المكمّم: {e}")
+
+    return model
+
+
+def load_whisper_model(model_size, quantize=False):
+    """
+    تحميل نموذج Whisper بأسرع مسار متاح: المكمّم من الذاكرة المؤقتة، أو mmap
+    لنسخة fp32 (torch >= 2.1 على المعالج)، أو whisper.load_model
+
+    دالة مستقلة عن SpeechRecognizer حتى يحمّل IdleRetranscriber نموذجه الأكبر
+    دون نسخ المحرك المباشر.
+    """
+    if not WHISPER_AVAILABLE or whisper is None:
+        raise ImportError("Whisper غير مثبت: pip install openai-whisper")
+    if quantize:
+        return _load_quantized_whisper(model_size)
+    if (_config_value('WHISPER_MMAP', True) and TORCH_MMAP_SUPPORTED
+            and not torch.cuda.is_available()):
+        return _load_whisper_mmap(model_size)
+    return whisper.load_model(model_size)
+
+
+def load_faster_whisper_model(model_size, cpu_threads=None):
+    """تحميل نموذج faster-whisper (CTranslate2 بدقة FASTER_WHISPER_COMPUTE_TYPE على المعالج)"""
+    if not FASTER_WHISPER_AVAILABLE:
+        raise ImportError("faster-whisper غير مثبت. قم بتثبيته: pip install faster-whisper")
+    # نفس مجلد ذاكرة Whisper المؤقتة حتى تبقى كل نماذج Whisper في مكان واحد
+    cache_dir = _config_value('WHISPER_CACHE_DIR', str(Path.home() / '.voice_to_text' / 'whisper'))
+    return WhisperModel(
+        model_size,
+        device='cpu',
+        compute_type=_config_value('FASTER_WHISPER_COMPUTE_TYPE', 'int8'),
+        cpu_threads=int(cpu_threads or 0),  # 0 = اختيار CTranslate2 التلقائي
+        download_root=str(cache_dir)
+    )
+
+
+_DECODE_LOCKS = weakref.WeakKeyDictionary()
+_DECODE_LOCKS_GUARD = threading.Lock()
+
+
+def whisper_decode_lock(model):
+    """
+    قفل فك الترميز الخاص بنموذج Whisper واحد
+
+    decode و transcribe يركّبان hooks لذاكرة kv على النموذج نفسه، فلا يعمل
+    فك ترميزان على النموذج ذاته معاً. القفل لكل نموذج (لا قفل عام للوحدة)،
+    فنموذج إعادة التعرف الأكبر لا يؤخر الإملاء المباشر، بينما القنوات التي
+    تشارك نموذجاً واحداً تتناوب عليه.
+    """
+    with _DECODE_LOCKS_GUARD:
+        lock = _DECODE_LOCKS.get(model)
+        if lock is None:
+            lock = _DECODE_LOCKS[model] = threading.Lock()
+        return lock
+
+
+class _AudioContextView:
+    """
+    نموذج Whisper كما يراه decode بطول سياق صوتي مختلف، دون تعديل النموذج المشترك
+
+    decode يتخطى المُرمّز فقط إذا طابق شكل الميزات (n_audio_ctx, n_audio_state)،
+    فتُعرض هنا أبعاد بطول النافذة المُقصّرة وتُحال بقية الخصائص للنموذج نفسه.
+    كشف اللغة (detect_language) يقرأ أبعاد النموذج الأصلية، لذا يتطلب المسار لغة محددة.
+    """
+
+    def __init__(self, model, n_audio_ctx):
+        self._model = model
+        self.dims = dataclasses.replace(model.dims, n_audio_ctx=n_audio_ctx)
+
+    def __getattr__(self, name):
+        return getattr(self._model, name)
+
+
+def _thread_local_state(name, default):
+    """
+    خاصية لحالة آخر تعرف محفوظة لكل خيط على حدة
+
+    في التعرف المتحوّط يعمل المحرك المحلي و Google في خيطين معاً،
+    فلا يكتب أحدهما فوق محرك/ثقة/كلمات الآخر قبل تحديد الفائز.
+    """
+    def getter(self):
+        return getattr(self._last_state, name, default)
+
+    def setter(self, value):
+        setattr(self._last_state, name, value)
+
+    return property(getter, setter)
+
 
 class SpeechRecognizer:
     """محرك التعرف على الصوت مع دعم عدة محركات"""
     
+    last_confidence = _thread_local_state('confidence', None)  # متوسط ثقة آخر جملة (0-1) إن توفر
+    last_words = _thread_local_state('words', [])  # كلمات Vosk لآخر جملة (word, start, end, conf)
+    last_engine = _thread_local_state('engine', None)  # المحرك الذي أنتج آخر نص (قد يكون google)
+    last_language = _thread_local_state('language', None)  # اللغة المكتشفة لآخر جملة في التعرف المتوازي
+    
     def __init__(self, engine='vosk', model_path=None, language='ar', 
-                 use_google_fallback=False, offline_only=False):
+                 use_google_fallback=False, offline_only=False,
+                 torch_threads=None, torch_interop_threads=None, capture_affinity=None,
+                 whisper_model_size=None, whisper_quantize=None, parallel_languages=None,
+                 hedged=None, audio_archive=None):
         """
         تهيئة محرك التعرف
         
         Args:
-            engine: 'whisper' أو 'vosk' أو 'google'
+            engine: 'whisper' أو 'faster-whisper' أو 'vosk' أو 'google'
             model_path: مسار النموذج (للـ Vosk)
-            language: اللغة ('ar' للعربية)
+            language: اللغة ('ar' للعربية، 'auto' للكشف التلقائي مع Whisper)
             use_google_fallback: استخدام Google كاحتياطي عند الفشل
             offline_only: العمل بدون إنترنت فقط (تعطيل Google)
+            torch_threads: عدد خيوط torch (افتراضي: config.TORCH_THREADS)
+            torch_interop_threads: عدد خيوط torch بين العمليات (افتراضي: config.TORCH_INTEROP_THREADS)
+            capture_affinity: أنوية خيط الالتقاط (افتراضي: config.CAPTURE_CPU_AFFINITY)
+            whisper_model_size: حجم نموذج Whisper (افتراضي: config.WHISPER_MODEL_SIZE)
+            whisper_quantize: تكميم Whisper إلى int8 (افتراضي: config.WHISPER_QUANTIZE)
+            parallel_languages: لغات Vosk التي تُفك كل جملة بها معاً (افتراضي: config.PARALLEL_LANGUAGES)
+            hedged: بدء Google بالتوازي إذا تأخر المحرك المحلي (افتراضي: config.HEDGED_RECOGNITION)
+            audio_archive: أرشيف صوت الجمل المشترك (create_archive_from_config) - يغلقه من أنشأه
         """
         self.engine = engine.lower()
-        self.language = language
+        # في الوضع التلقائي تبقى اللغة None حتى تكشفها أول جملة
+        self.auto_language = (language == 'auto')
+        self.language = None if self.auto_language else language
         self.is_listening = False
         self.audio_stream = None
         self.pyaudio_instance = None
         self.use_sounddevice = False  # علامة لاستخدام sounddevice
         self.audio_queue = []  # قائمة إطارات sounddevice
         self.callback = None
+        self.input_device = None  # فهرس جهاز الإدخال (None = الميكروفون الافتراضي)
+        # فتح الجهاز بمعدله الأصلي (44.1/48 kHz غالباً) والتحويل إلى 16kHz داخلياً
+        self.native_rate_capture = _config_value('CAPTURE_NATIVE_RATE', True)
+        self.capture_rate = 16000
+        self.resampler = None
+        
+        # الإيقاف الفوري: حدث + علامة في طابور الصوت توقظ القارئ فوراً،
+        # وعمليات التعرف الجارية تُصرّف حتى مهلة ثم تُلغى نتائجها
+        self._stop_event = threading.Event()
+        self._idle_event = threading.Event()
+        self._idle_event.set()
+        self._audio_blocks = queue.Queue()  # كتل PyAudio من callback البث
+        self._audio_pending = b''
+        self._inflight = set()  # (خيط التعرف, حدث إلغائه)
+        self._inflight_lock = threading.Lock()
+        self._stream_lock = threading.Lock()
+        self._capture_active = False
+        self._stop_requested_at = None
+        self.drain_timeout = _config_value('STOP_DRAIN_TIMEOUT', 1.0)
+        self.last_stop_stats = {}  # زمن الإيقاف حتى الخمول وعدد العمليات المكتملة/الملغاة
+        self.channel = None  # اسم القناة عند الالتقاط من عدة ميكروفونات
         self.use_google_fallback = use_google_fallback and not offline_only
         self.offline_only = offline_only
         
         self.vosk_models = {}
+        self.vosk_model_path = None
         self.current_vosk_model = None
         self.vosk_recognizer = None
         self.processing = False  # حالة المعالجة للتعرف غير المتزامن
         
+        self.whisper_model_size = whisper_model_size or _config_value('WHISPER_MODEL_SIZE', 'base')
+        self.whisper_quantize = (whisper_quantize if whisper_quantize is not None
+                                 else _config_value('WHISPER_QUANTIZE', False))
+        self.model_load_time = None  # زمن تحميل النموذج (بالثواني)
+        self.trim_silence = _config_value('WHISPER_TRIM_SILENCE', True)
+        self.dynamic_padding = _config_value('WHISPER_DYNAMIC_PADDING', False)
+        
+        # المعالجة الأولية للصوت الملتقط (مرشح عالٍ + طرح الضوضاء + AGC) - اختيارية
+        self.front_end = None
+        if _config_value('DSP_ENABLED', False):
+            self.front_end = AudioFrontEnd(
+                highpass_hz=_config_value('DSP_HIGHPASS_HZ', 90),
+                noise_reduction=_config_value('DSP_NOISE_REDUCTION', True),
+                agc=_config_value('DSP_AGC', True),
+                agc_target=_config_value('DSP_AGC_TARGET', 3000),
+                cpu_budget=_config_value('DSP_CPU_BUDGET', 0.15)
+            )
+        
+        # أرشيف صوت الجمل (اختياري): الضغط والكتابة في خيط خلفي خارج مسار التعرف.
+        # يُمرَّر من التطبيق فقط، فالمحركات الإضافية (القياس، إعادة التعرف) لا تفتح كاتباً ثانياً
+        self.audio_archive = audio_archive
+        
+        # ذاكرة النتائج المؤقتة: الملف المكرر (نفس العينات) يُعاد نصه دون فك ترميز
+        self.result_cache = None
+        try:
+            self.result_cache = create_cache_from_config()
+        except Exception as e:
+            print(f"⚠️ فشل تهيئة ذاكرة النتائج المؤقتة: {e}")
+        
+        # الكشف التلقائي للغة: يُشغّل مرة واحدة ثم يُعاد فقط عند انخفاض الثقة
+        self._last_state = threading.local()
+        self.language_confidence = None
+        self.vosk_routed = False  # التعرف عبر Vosk للغة المكتشفة بدلاً من Whisper
+        self._language_detection_due = self.auto_language
+        self._low_confidence_count = 0
+        self._model_manager = None
+        if self.auto_language and self.engine not in ('whisper', 'faster-whisper'):
+            raise ValueError("الكشف التلقائي للغة يتطلب محرك whisper أو faster-whisper")
+        
+        # التعرف المتوازي بعدة لغات: نموذج Vosk مقيم لكل لغة وخيط لكل نموذج
+        self.parallel_languages = list(parallel_languages or _config_value('PARALLEL_LANGUAGES') or [])
+        # اللغة الأساسية مشمولة دائماً، وإلا لما أمكن التبديل إليها أثناء الاستماع
+        if self.parallel_languages and self.language and self.language not in self.parallel_languages:
+            self.parallel_languages.insert(0, self.language)
+        self.parallel_recognizers = {}
+        self._parallel_executor = None
+        
+        # Google عبر عميل بنقطة نهاية قابلة للتغيير (يمكن توجيهه لخادم محلي بديل للاختبار)
+        # واتصالات keep-alive مشتركة بين الجمل؛ الصوت الطويل يُقسّم عند الصمت ويُرسل بالتوازي
+        self.google_client = GoogleSpeechClient(
+            endpoint=_config_value('GOOGLE_SPEECH_ENDPOINT'),
+            key=_config_value('GOOGLE_SPEECH_KEY'),
+            timeout=_config_value('GOOGLE_SPEECH_TIMEOUT', 10.0),
+            max_parallel=_config_value('GOOGLE_PARALLEL_REQUESTS', 4),
+            retries=_config_value('GOOGLE_SPEECH_RETRIES', 1)
+        )
+        self.google_max_chunk_seconds = _config_value('GOOGLE_MAX_CHUNK_SECONDS', 15)
+        
+        # التعرف المتحوّط: إذا لم ينتهِ المحرك المحلي خلال HEDGE_DELAY يبدأ Google بالتوازي
+        # وأول نتيجة مقبولة تفوز (يتطلب السماح بـ Google عبر use_google_fallback)
+        self.hedged = hedged if hedged is not None else _config_value('HEDGED_RECOGNITION', False)
+        self.hedge_delay = _config_value('HEDGE_DELAY', 0.8)
+        self.hedge_timeout = _config_value('HEDGE_TIMEOUT', 10.0)
+        self.hedge_stats = {'local': 0, 'remote': 0, 'remote_started': 0, 'none': 0}
+        self._hedge_executor = None
+        # المحرك المحلي لا يُستدعى من خيطين معاً (نموذج Whisper ومعرِّف Vosk مشتركان)،
+        # فالجملة التالية تنتظر انتهاء فك ترميز محلي خاسر ما زال يعمل
+        self._local_lock = threading.Lock()
+        
+        # ضبط موارد المعالج قبل تحميل النماذج حتى لا يستحوذ torch على كل الأنوية
+        self.cpu_threads = torch_threads or _config_value('TORCH_THREADS')
+        self.capture_affinity = None
+        self._default_affinity = None
+        self.resource_settings = {}
+        self.configure_resources(
+            torch_threads=self.cpu_threads,
+            torch_interop_threads=torch_interop_threads or _config_value('TORCH_INTEROP_THREADS'),
+            capture_affinity=capture_affinity if capture_affinity is not None
+            else _config_value('CAPTURE_CPU_AFFINITY')
+        )
+        
         # تهيئة المحرك المختار
         if self.engine == 'whisper':
             self._init_whisper()
+            # اختيار عدد الخيوط بالقياس عند كل تشغيل، إلا إذا حُدد صراحة
+            if _config_value('TORCH_AUTO_TUNE', False) and not self.cpu_threads:
+                try:
+                    self.auto_tune_threads()
+                except Exception as e:
+                    print(f"⚠️ فشل الضبط التلقائي للخيوط: {e}")
+        elif self.engine == 'faster-whisper':
+            self._init_faster_whisper()
         elif self.engine == 'vosk':
             self._init_vosk(model_path)
+            if len(self.parallel_languages) > 1:
+                self._init_parallel_vosk()
         elif self.engine == 'google':
-            if not GOOGLE_SR_AVAILABLE:
-                raise ImportError("Google Speech Recognition غير مثبت. قم بتثبيته: pip install SpeechRecognition")
             if offline_only:
                 raise ValueError("لا يمكن استخدام Google في وضع offline_only")
         else:
@@ -111,16 +681,36 @@ class SpeechRecognizer:
             )
         
         try:
-            print("🔄 جاري تحميل نموذج Whisper...")
-            # استخدام base كنموذج افتراضي (يمكن تغييره إلى medium أو large للدقة الأفضل)
-            self.whisper_model = whisper.load_model("base")
-            print("✅ تم تحميل نموذج Whisper بنجاح!")
+            print(f"🔄 جاري تحميل نموذج Whisper ({self.whisper_model_size})...")
+            start = time.perf_counter()
+            # base افتراضياً (يمكن تغييره إلى medium أو large للدقة الأفضل من config.py)
+            self.whisper_model = load_whisper_model(self.whisper_model_size, self.whisper_quantize)
+            self.model_load_time = time.perf_counter() - start
+            print(f"✅ تم تحميل نموذج Whisper بنجاح! ({self.model_load_time:.2f} ثانية)")
         except Exception as e:
             raise ImportError(
                 f"فشل في تحميل نموذج Whisper: {e}\n"
                 "تأكد من تثبيت openai-whisper الصحيح: pip install openai-whisper"
             )
     
+    def _init_faster_whisper(self):
+        """تهيئة faster-whisper (CTranslate2 بدقة int8 على المعالج)"""
+        if not FASTER_WHISPER_AVAILABLE:
+            raise ImportError("faster-whisper غير مثبت. قم بتثبيته: pip install faster-whisper")
+        
+        compute_type = _config_value('FASTER_WHISPER_COMPUTE_TYPE', 'int8')
+        try:
+            print(f"🔄 جاري تحميل نموذج faster-whisper ({self.whisper_model_size}, {compute_type})...")
+            start = time.perf_counter()
+            self.faster_whisper_model = load_faster_whisper_model(self.whisper_model_size, self.cpu_threads)
+            self.model_load_time = time.perf_counter() - start
+            print(f"✅ تم تحميل نموذج faster-whisper بنجاح! ({self.model_load_time:.2f} ثانية)")
+        except Exception as e:
+            raise ImportError(
+                f"فشل في تحميل نموذج faster-whisper: {e}\n"
+                "تأكد من التثبيت: pip install faster-whisper"
+            )
+    
     def _init_vosk(self, model_path):
         """تهيئة Vosk"""
         if not VOSK_AVAILABLE:
@@ -159,11 +749,213 @@ class SpeechRecognizer:
                 )
         
         print(f"🔄 جاري تحميل نموذج Vosk من: {model_path}...")
-        self.vosk_model = Model(model_path)
+        self.vosk_model = Model(str(model_path))
+        self.vosk_model_path = str(model_path)
+        self.vosk_models[self.language] = self.vosk_model
         self.vosk_recognizer = KaldiRecognizer(self.vosk_model, 16000)
         self.vosk_recognizer.SetWords(True)
         print("✅ تم تحميل نموذج Vosk بنجاح!")
     
+    def _init_parallel_vosk(self):
+        """تحميل نماذج Vosk لكل اللغات المتوازية وإبقاؤها في الذاكرة"""
+        from model_manager import ModelManager
+        if self._model_manager is None:
+            self._model_manager = ModelManager()
+        
+        for language in self.parallel_languages:
+            model = self.vosk_models.get(language)
+            if model is None:
+                model_path = self._model_manager.get_model_path(language)
+                if not model_path:
+                    print(f"⚠️ لا يوجد نموذج Vosk للغة {language}، سيتم تجاهلها")
+                    continue
+                print(f"🔄 جاري تحميل نموذج Vosk للغة {language}...")
+                model = Model(str(model_path))
+                self.vosk_models[language] = model
+            
+            recognizer = KaldiRecognizer(model, 16000)
+            recognizer.SetWords(True)
+            self.parallel_recognizers[language] = recognizer
+        
+        if len(self.parallel_recognizers) > 1:
+            # منفذ الخيوط يُنشأ عند أول جملة (_recognize_with_vosk_parallel)
+            print(f"✅ التعرف المتوازي مفعّل للغات: {', '.join(self.parallel_recognizers)}")
+        else:
+            self.parallel_recognizers = {}
+    
+    def spawn_channel(self, input_device, label):
+        """
+        إنشاء قناة التقاط لجهاز إدخال آخر تشارك هذا المحرك نماذجه المحملة
+        
+        لكل قناة بثها وكشف صمتها ومعرِّفات Vosk وحالة لغتها ومنفذ خيوطها،
+        بينما النماذج نفسها (نموذج Vosk لكل لغة، Whisper، faster-whisper،
+        واتصالات Google) تبقى نسخة واحدة في الذاكرة.
+        
+        Args:
+            input_device: فهرس جهاز الإدخال
+            label: اسم القناة الذي يظهر في RecognitionResult.channel
+        """
+        channel = copy.copy(self)
+        channel.input_device = input_device
+        channel.channel = label
+        channel.is_listening = False
+        channel.audio_stream = None
+        channel.pyaudio_instance = None
+        channel.audio_queue = []
+        channel.capture_rate = 16000
+        channel.resampler = None
+        channel._stop_event = threading.Event()
+        channel._idle_event = threading.Event()
+        channel._idle_event.set()
+        channel._audio_blocks = queue.Queue()
+        channel._audio_pending = b''
+        channel._inflight = set()
+        channel._inflight_lock = threading.Lock()
+        channel._stream_lock = threading.Lock()
+        channel._capture_active = False
+        channel._stop_requested_at = None
+        channel.callback = None
+        channel.processing = False
+        channel._last_state = threading.local()
+        channel._local_lock = threading.Lock()
+        channel._hedge_executor = None
+        channel.hedge_stats = dict.fromkeys(self.hedge_stats, 0)
+        channel.front_end = copy.deepcopy(self.front_end)
+        
+        # معرِّف Kaldi يحمل حالة البث، فلكل قناة معرِّفها من النموذج المشترك
+        if self.vosk_recognizer is not None:
+            channel.vosk_recognizer = KaldiRecognizer(self.vosk_model, 16000)
+            channel.vosk_recognizer.SetWords(True)
+        channel.parallel_recognizers = {}
+        for language in self.parallel_recognizers:
+            recognizer = KaldiRecognizer(self.vosk_models[language], 16000)
+            recognizer.SetWords(True)
+            channel.parallel_recognizers[language] = recognizer
+        channel._parallel_executor = None
+        
+        return channel
+    
+    def close(self):
+        """
+        تحرير منفذي خيوط التعرف المتوازي والمتحوّط (بعد stop_recording)
+        
+        القناة تغلق منفذيها فقط؛ اتصالات Google يغلقها المحرك الأصلي الذي أنشأها.
+        المنفذان يُنشآن من جديد عند الحاجة، فالتعرف بعد close() يبقى ممكناً.
+        """
+        for name in ('_parallel_executor', '_hedge_executor'):
+            executor = getattr(self, name)
+            if executor is not None:
+                setattr(self, name, None)
+                _shutdown_executor(executor)
+        if self.channel is None:
+            self.google_client.close()
+    
+    def configure_resources(self, torch_threads=None, torch_interop_threads=None,
+                            capture_affinity=None):
+        """
+        ضبط استهلاك المعالج للمحرك
+        
+        Args:
+            torch_threads: عدد خيوط torch داخل العملية (intra-op)
+            torch_interop_threads: عدد خيوط torch بين العمليات (inter-op)
+            capture_affinity: قائمة أنوية المعالج لخيط الالتقاط (None = بدون تغيير)
+            
+        Returns:
+            dict: الإعدادات المطبقة فعلياً
+        """
+        if TORCH_AVAILABLE:
+            if torch_threads:
+                torch.set_num_threads(int(torch_threads))
+            if torch_interop_threads:
+                try:
+                    torch.set_num_interop_threads(int(torch_interop_threads))
+                except RuntimeError as e:
+                    # torch يسمح بضبطها مرة واحدة فقط وقبل أي عمل متوازٍ
+                    print(f"⚠️ لا يمكن تغيير خيوط inter-op الآن: {e}")
+        
+        if capture_affinity is not None:
+            self.capture_affinity = list(capture_affinity) or None
+        
+        self.resource_settings = {
+            'torch_threads': torch.get_num_threads() if TORCH_AVAILABLE else None,
+            'torch_interop_threads': torch.get_num_interop_threads() if TORCH_AVAILABLE else None,
+            'vosk_threads': _vosk_threads,
+            'capture_affinity': self.capture_affinity,
+        }
+        return self.resource_settings
+    
+    def auto_tune_threads(self, candidates=None, repeats=2):
+        """
+        اختيار أسرع عدد خيوط torch على هذا الجهاز بالقياس الفعلي
+        
+        يقيس زمن مُرمّز Whisper (نافذة 30 ثانية ثابتة) لكل عدد خيوط مرشح
+        ثم يطبق الأسرع. خيوط Vosk لا يمكن تغييرها بعد تحميل المكتبة.
+        
+        Args:
+            candidates: أعداد الخيوط المراد تجربتها (افتراضي: 1، 2، 4، نصف الأنوية، كل الأنوية)
+            repeats: عدد مرات القياس لكل مرشح (يُؤخذ الأفضل)
+            
+        Returns:
+            dict: {'best_threads': العدد الأسرع, 'timings': {العدد: الثواني}} أو None
+        """
+        if self.engine != 'whisper' or not TORCH_AVAILABLE:
+            print("⚠️ الضبط التلقائي متاح لمحرك Whisper فقط (خيوط Vosk تُضبط من config.VOSK_THREADS)")
+            return None
+        
+        cpu_count = os.cpu_count() or 1
+        if candidates is None:
+            candidates = sorted({1, 2, 4, max(1, cpu_count // 2), cpu_count})
+        candidates = [n for n in candidates if 0 < n <= cpu_count]
+        
+        # محتوى الصوت لا يؤثر على زمن المُرمّز لأن Whisper يحشو دائماً إلى 30 ثانية
+        mel = whisper.log_mel_spectrogram(
+            whisper.pad_or_trim(np.zeros(16000, dtype=np.float32)),
+            n_mels=self.whisper_model.dims.n_mels
+        ).to(self.whisper_model.device).unsqueeze(0)
+        
+        print("🔧 جاري قياس أفضل عدد خيوط للمعالج...")
+        timings = {}
+        for threads in candidates:
+            torch.set_num_threads(threads)
+            samples = []
+            with torch.no_grad():
+                # القياس الأول إحماء فقط
+                for _ in range(repeats + 1):
+                    start = time.perf_counter()
+                    self.whisper_model.embed_audio(mel)
+                    samples.append(time.perf_counter() - start)
+            timings[threads] = min(samples[1:])
+            print(f"   {threads} خيوط: {timings[threads] * 1000:.0f} ms")
+        
+        best_threads = min(timings, key=timings.get)
+        self.configure_resources(torch_threads=best_threads)
+        print(f"✅ أفضل عدد خيوط: {best_threads}")
+        return {'best_threads': best_threads, 'timings': timings}
+    
+    def _apply_capture_affinity(self):
+        """تثبيت خيط الالتقاط الحالي على الأنوية المحددة"""
+        if not self.capture_affinity:
+            return
+        if not hasattr(os, 'sched_setaffinity'):
+            print("⚠️ تثبيت الأنوية غير مدعوم على هذا النظام")
+            return
+        try:
+            self._default_affinity = os.sched_getaffinity(0)
+            # pid=0 على Linux يعني الخيط الحالي فقط وليس العملية كلها
+            os.sched_setaffinity(0, self.capture_affinity)
+            print(f"📌 خيط الالتقاط مثبت على الأنوية: {self.capture_affinity}")
+        except OSError as e:
+            print(f"⚠️ فشل تثبيت خيط الالتقاط: {e}")
+            self._default_affinity = None
+    
+    def _restore_worker_affinity(self):
+        """إعادة الأنوية الكاملة لخيوط التعرف (ترث الخيوط تقييد الخيط الذي أنشأها)"""
+        if self._default_affinity:
+            try:
+                os.sched_setaffinity(0, self._default_affinity)
+            except OSError:
+                pass
+    
     def switch_language(self, language: str, model_path=None):
         """
         تبديل اللغة أثناء التشغيل
@@ -172,10 +964,27 @@ class SpeechRecognizer:
             language: رمز اللغة الجديد
             model_path: مسار النموذج (للـ Vosk)
         """
+        # النماذج المتوازية مقيمة في الذاكرة فلا حاجة لإعادة التحميل حتى أثناء التسجيل
+        if language in self.parallel_recognizers:
+            self.language = language
+            print(f"✅ تم التبديل إلى اللغة: {language}")
+            return True
+        
         if self.is_listening:
             print("⚠️ لا يمكن تبديل اللغة أثناء التسجيل")
             return False
         
+        if language == 'auto':
+            if self.engine not in ('whisper', 'faster-whisper'):
+                print("⚠️ الكشف التلقائي للغة يتطلب محرك whisper أو faster-whisper")
+                return False
+            self.auto_language = True
+            self._language_detection_due = True
+            print("✅ تم تفعيل الكشف التلقائي للغة")
+            return True
+        
+        self.auto_language = False
+        self.vosk_routed = False
         self.language = language
         
         if self.engine == 'vosk':
@@ -186,18 +995,117 @@ class SpeechRecognizer:
             except Exception as e:
                 print(f"❌ خطأ في تبديل اللغة: {e}")
                 return False
-        elif self.engine == 'whisper':
+        elif self.engine in ('whisper', 'faster-whisper'):
             print(f"✅ تم التبديل إلى اللغة: {language}")
             return True
         
         return True
     
+    def _detect_language(self, audio):
+        """
+        كشف لغة الكلام باستخدام Whisper
+        
+        Args:
+            audio: مصفوفة float32 بتردد 16kHz
+            
+        Returns:
+            tuple: (رمز اللغة, الاحتمال)
+        """
+        if self.engine == 'whisper':
+            model = self.whisper_model
+            mel = whisper.log_mel_spectrogram(
+                whisper.pad_or_trim(audio), n_mels=model.dims.n_mels
+            ).to(model.device)
+            with torch.no_grad():
+                _, probs = model.detect_language(mel)
+        else:
+            # faster-whisper يكشف اللغة فوراً، والمقاطع مولّد لا يُفك ترميزه إلا عند قراءته
+            _segments, info = self.faster_whisper_model.transcribe(audio, beam_size=1)
+            probs = dict(getattr(info, 'all_language_probs', None) or
+                         [(info.language, info.language_probability)])
+        
+        candidates = _config_value('AUTO_LANGUAGE_CANDIDATES')
+        if candidates:
+            restricted = {lang: p for lang, p in probs.items() if lang in candidates}
+            if restricted:
+                probs = restricted
+        
+        total = sum(probs.values()) or 1.0
+        language = max(probs, key=probs.get)
+        return language, probs[language] / total
+    
+    def _detect_and_route_language(self, samples):
+        """كشف لغة الجملة الحالية وتخزين النتيجة وتوجيه التعرف إليها"""
+        try:
+            language, probability = self._detect_language(int16_to_float32(samples))
+        except Exception as e:
+            print(f"⚠️ فشل كشف اللغة: {e}")
+            return
+        
+        self._language_detection_due = False
+        self._low_confidence_count = 0
+        self.language_confidence = probability
+        
+        if language == self.language:
+            return
+        
+        print(f"🌐 اللغة المكتشفة: {language} ({probability:.0%})")
+        self.language = language
+        self._route_to_vosk(language)
+    
+    def _route_to_vosk(self, language):
+        """استخدام نموذج Vosk للغة المكتشفة إن كان محملاً (أسرع من Whisper)"""
+        self.vosk_routed = False
+        if not VOSK_AVAILABLE or not _config_value('AUTO_LANGUAGE_USE_VOSK', True):
+            return
+        
+        model = self.vosk_models.get(language)
+        if model is None:
+            try:
+                from model_manager import ModelManager
+                if self._model_manager is None:
+                    self._model_manager = ModelManager()
+                model_path = self._model_manager.get_model_path(language)
+            except Exception:
+                model_path = None
+            
+            if not model_path:
+                print(f"💡 لا يوجد نموذج Vosk للغة {language}، سيستمر Whisper بلغة ثابتة")
+                return
+            
+            print(f"🔄 جاري تحميل نموذج Vosk للغة {language}...")
+            model = Model(str(model_path))
+            self.vosk_models[language] = model
+        
+        self.vosk_model = model
+        self.vosk_recognizer = KaldiRecognizer(model, 16000)
+        self.vosk_recognizer.SetWords(True)
+        self.vosk_routed = True
+        print(f"✅ التعرف عبر Vosk للغة: {language}")
+    
+    def _track_language_confidence(self):
+        """جدولة إعادة كشف اللغة بعد عدة جمل متتالية منخفضة الثقة"""
+        if not self.auto_language or self.last_confidence is None:
+            return
+        
+        if self.last_confidence < _config_value('AUTO_LANGUAGE_MIN_CONFIDENCE', 0.5):
+            self._low_confidence_count += 1
+            if self._low_confidence_count >= _config_value('AUTO_LANGUAGE_RECHECK_AFTER', 2):
+                print("🔄 انخفضت الثقة، سيُعاد كشف اللغة في الجملة التالية")
+                self._language_detection_due = True
+        else:
+            self._low_confidence_count = 0
+    
     def start_recording(self):
         """بدء التسجيل"""
         if self.is_listening:
             return
         
         self.is_listening = True
+        self._stop_event.clear()
+        self._stop_requested_at = None
+        self._audio_blocks = queue.Queue()
+        self._audio_pending = b''
         
         # التحقق من توفر مكتبات الصوت
         if not PYAUDIO_AVAILABLE and not SOUNDDEVICE_AVAILABLE:
@@ -219,9 +1127,18 @@ class SpeechRecognizer:
                 # استخدام sounddevice
                 print(f"📊 أجهزة الصوت المتاحة:")
                 devices = sd.query_devices()
-                default_input = sd.query_devices(kind='input')
-                print(f"�️ الميكروفون الافتراضي: {default_input['name']}")
+                default_input = sd.query_devices(self.input_device, kind='input')
+                print(f"🎙️ الميكروفون: {default_input['name']}")
+                
+                def supported(rate):
+                    try:
+                        sd.check_input_settings(device=self.input_device, samplerate=rate,
+                                                channels=1, dtype='int16')
+                        return True
+                    except Exception:
+                        return False
                 
+                self._negotiate_capture_rate(default_input['default_samplerate'], supported)
                 self.use_sounddevice = True
                 self.audio_queue = []
             else:
@@ -230,21 +1147,39 @@ class SpeechRecognizer:
                 
                 # طباعة معلومات الأجهزة المتاحة
                 print(f"📊 عدد أجهزة الصوت: {self.pyaudio_instance.get_device_count()}")
-                default_input = self.pyaudio_instance.get_default_input_device_info()
-                print(f"🎙️ الميكروفون الافتراضي: {default_input['name']}")
+                if self.input_device is None:
+                    device_info = self.pyaudio_instance.get_default_input_device_info()
+                    print(f"🎙️ الميكروفون الافتراضي: {device_info['name']}")
+                else:
+                    device_info = self.pyaudio_instance.get_device_info_by_index(self.input_device)
+                    print(f"🎙️ الميكروفون [{self.channel or self.input_device}]: {device_info['name']}")
                 
+                def supported(rate):
+                    try:
+                        return self.pyaudio_instance.is_format_supported(
+                            rate, input_device=device_info['index'],
+                            input_channels=1, input_format=pyaudio.paInt16
+                        )
+                    except ValueError:
+                        return False
+                
+                self._negotiate_capture_rate(device_info.get('defaultSampleRate'), supported)
+                # وضع callback: القارئ ينتظر على طابور لا داخل PortAudio،
+                # فيمكن إيقاظه فوراً عند الإيقاف
                 self.audio_stream = self.pyaudio_instance.open(
                     format=pyaudio.paInt16,
                     channels=1,
-                    rate=16000,
+                    rate=self.capture_rate,
                     input=True,
-                    frames_per_buffer=2000,
-                    input_device_index=None
+                    frames_per_buffer=self._native_samples(2000),
+                    input_device_index=self.input_device,
+                    stream_callback=self._on_audio_block
                 )
                 
                 self.audio_stream.start_stream()
                 self.use_sounddevice = False
             
+            self._idle_event.clear()
             print("✅ تم فتح الميكروفون بنجاح!")
             
         except Exception as e:
@@ -267,73 +1202,466 @@ class SpeechRecognizer:
                 f"5. جرب ميكروفون آخر إذا كان متاحاً"
             )
     
-    def stop_recording(self):
-        """إيقاف التسجيل بأمان"""
-        print("⏹️ جاري إيقاف التسجيل...")
-        self.is_listening = False
+    def _negotiate_capture_rate(self, native_rate, is_supported):
+        """
+        اختيار معدل فتح الجهاز
+        
+        المعدل الأصلي للجهاز إن كان مدعوماً (مع تحويل داخلي إلى 16kHz بدلاً من
+        تحويل نظام التشغيل أو فشل الفتح)، وإلا 16kHz مباشرة كما كان سابقاً.
         
-        # انتظار قليلاً لإنهاء المعالجة الحالية
-        import time
-        time.sleep(0.1)
+        Args:
+            native_rate: المعدل الافتراضي للجهاز كما يعلنه
+            is_supported: دالة (rate) → هل يقبل الجهاز هذا المعدل
+        """
+        rate = 16000
+        if self.native_rate_capture and native_rate and int(native_rate) != 16000:
+            if is_supported(int(native_rate)) or not is_supported(16000):
+                rate = int(native_rate)
+        
+        self.capture_rate = rate
+        self.resampler = None
+        if rate != 16000:
+            self.resampler = StreamingResampler(rate, 16000, block_size=self._native_samples(8000))
+            print(f"🔁 فتح الجهاز بمعدله الأصلي {rate} Hz مع تحويل داخلي إلى 16000 Hz")
+    
+    def _native_samples(self, n_samples):
+        """عدد عينات الجهاز المقابلة لـ n_samples عينة بتردد 16kHz"""
+        return int(round(n_samples * self.capture_rate / 16000))
+    
+    def _on_audio_block(self, in_data, frame_count, time_info, status):
+        """callback بث PyAudio: تمرير الكتلة إلى طابور القارئ"""
+        self._audio_blocks.put(in_data)
+        return (None, pyaudio.paContinue)
+    
+    def _read_audio(self, n_samples):
+        """
+        قراءة ما يقابل n_samples عينة بتردد 16kHz من الجهاز (بعد التحويل من معدله الأصلي)
         
-        # إيقاف حسب المكتبة المستخدمة
-        if hasattr(self, 'use_sounddevice') and self.use_sounddevice:
-            # sounddevice لا تحتاج لإغلاق stream
-            print("✅ تم إيقاف sounddevice")
+        Returns:
+            البايتات، أو None إذا طُلب الإيقاف أثناء الانتظار
+        """
+        needed = self._native_samples(n_samples)
+        if self.use_sounddevice:
+            if self._stop_event.is_set():
+                return None
+            data = sd.rec(needed, samplerate=self.capture_rate, channels=1, dtype='int16',
+                          blocking=True, device=self.input_device)
+            if self._stop_event.is_set():
+                return None  # sd.stop() قطع التسجيل
+            data = data.tobytes()
         else:
-            # إيقاف وإغلاق PyAudio stream
-            if self.audio_stream:
+            chunks = [self._audio_pending]
+            size = len(self._audio_pending)
+            while size < needed * 2:
                 try:
-                    if self.audio_stream.is_active():
-                        self.audio_stream.stop_stream()
-                    self.audio_stream.close()
-                except Exception as e:
-                    print(f"⚠️ خطأ في إيقاف audio_stream: {e}")
-                finally:
-                    self.audio_stream = None
-            
-            # إنهاء PyAudio
-            if self.pyaudio_instance:
-                try:
-                    self.pyaudio_instance.terminate()
-                except Exception as e:
-                    print(f"⚠️ خطأ في إنهاء PyAudio: {e}")
-                finally:
-                    self.pyaudio_instance = None
+                    block = self._audio_blocks.get(timeout=0.5)
+                except queue.Empty:
+                    if self._stop_event.is_set() or self.audio_stream is None:
+                        return None
+                    continue
+                if block is None:
+                    return None  # علامة الإيقاف
+                chunks.append(block)
+                size += len(block)
+            data = b''.join(chunks)
+            self._audio_pending = data[needed * 2:]
+            data = data[:needed * 2]
+        
+        if self.resampler:
+            data = self.resampler.process(data)
+        return data
+    
+    def request_stop(self):
+        """
+        طلب إيقاف فوري دون انتظار
+        
+        يوقظ قارئ الصوت مباشرة (علامة في الطابور لـ PyAudio، وsd.stop لـ
+        sounddevice)، وحلقة الاستماع تكمل الإيقاف: تصريف التعرف الجاري ثم
+        إغلاق البث. wait_until_idle تنتظر اكتمال ذلك.
+        """
+        if self._stop_requested_at is None:
+            self._stop_requested_at = time.perf_counter()
+        self.is_listening = False
+        self._stop_event.set()
+        self._audio_blocks.put(None)
+        if self.use_sounddevice and SOUNDDEVICE_AVAILABLE:
+            try:
+                sd.stop()
+            except Exception:
+                pass
+    
+    def wait_until_idle(self, timeout=None):
+        """
+        انتظار وصول المحرك للخمول بعد الإيقاف (البث مغلق ولا تعرف جارٍ)
+        
+        Returns:
+            bool: True إذا وصل للخمول خلال المهلة
+        """
+        return self._idle_event.wait(timeout)
+    
+    def stop_recording(self):
+        """إيقاف التسجيل بأمان (فوري - بدون انتظار)"""
+        print("⏹️ جاري إيقاف التسجيل...")
+        self.request_stop()
+        
+        # قد يُستدعى من خيط الواجهة ومن خيط الالتقاط معاً
+        with self._stream_lock:
+            # إيقاف حسب المكتبة المستخدمة
+            if hasattr(self, 'use_sounddevice') and self.use_sounddevice:
+                # sounddevice لا تحتاج لإغلاق stream
+                print("✅ تم إيقاف sounddevice")
+            else:
+                # إيقاف وإغلاق PyAudio stream
+                if self.audio_stream:
+                    try:
+                        if self.audio_stream.is_active():
+                            self.audio_stream.stop_stream()
+                        self.audio_stream.close()
+                    except Exception as e:
+                        print(f"⚠️ خطأ في إيقاف audio_stream: {e}")
+                    finally:
+                        self.audio_stream = None
+                
+                # إنهاء PyAudio
+                if self.pyaudio_instance:
+                    try:
+                        self.pyaudio_instance.terminate()
+                    except Exception as e:
+                        print(f"⚠️ خطأ في إنهاء PyAudio: {e}")
+                    finally:
+                        self.pyaudio_instance = None
+        
+        # بدون حلقة استماع (record_and_recognize مثلاً) يكتمل الإيقاف هنا
+        if not self._capture_active:
+            self._mark_idle(0, 0)
         
         print("✅ تم إيقاف التسجيل بنجاح")
     
+    def _start_recognition(self, frames):
+        """تشغيل التعرف على الجملة في خيط منفصل وتسجيله للتصريف عند الإيقاف"""
+        self.processing = True
+        cancel = threading.Event()
+        recognition_thread = threading.Thread(
+            target=self._process_recorded_audio_async,
+            args=(frames, cancel)
+        )
+        recognition_thread.daemon = True
+        with self._inflight_lock:
+            self._inflight.add((recognition_thread, cancel))
+        recognition_thread.start()
+    
+    def _drain_inflight(self, timeout):
+        """
+        انتظار عمليات التعرف الجارية حتى المهلة ثم إلغاء ما تبقى
+        
+        الإلغاء يوقف فك ترميز Vosk عند الكتلة التالية ويمنع وصول النتيجة إلى
+        callback؛ أما Whisper فيكمل في الخلفية وتُهمل نتيجته.
+        
+        Returns:
+            tuple: (عدد المكتملة, عدد الملغاة)
+        """
+        deadline = time.monotonic() + timeout
+        with self._inflight_lock:
+            inflight = list(self._inflight)
+        
+        drained = cancelled = 0
+        for thread, cancel in inflight:
+            thread.join(max(0.0, deadline - time.monotonic()))
+            if thread.is_alive():
+                cancel.set()
+                cancelled += 1
+            else:
+                drained += 1
+        return drained, cancelled
+    
+    def _finish_stop(self):
+        """إكمال الإيقاف من خيط الالتقاط: تصريف التعرف الجاري وإغلاق البث"""
+        drained, cancelled = self._drain_inflight(self.drain_timeout)
+        self.stop_recording()
+        self._capture_active = False
+        self._mark_idle(drained, cancelled)
+    
+    def _mark_idle(self, drained, cancelled):
+        """تسجيل زمن الإيقاف حتى الخمول"""
+        requested = self._stop_requested_at
+        latency = time.perf_counter() - requested if requested is not None else 0.0
+        self.last_stop_stats = {'latency': latency, 'drained': drained, 'cancelled': cancelled}
+        self._stop_requested_at = None
+        self._idle_event.set()
+        print(f"⏱️ زمن الإيقاف حتى الخمول: {latency * 1000:.0f} ms "
+              f"(مكتمل {drained}، ملغى {cancelled})")
+    
     def recognize_audio_file(self, audio_file_path):
-        """التعرف على ملف صوتي"""
-        text = ""
+        """التعرف على ملف صوتي (من الذاكرة المؤقتة فوراً إذا سبق التعرف على نفس الصوت)"""
+        key = self._result_cache_key(audio_file_path) if self.result_cache else None
+        if key:
+            cached = self.result_cache.get(key)
+            if cached:
+                text, state = cached
+                vars(self._last_state).update(state)
+                return text
+        
+        text = self._recognize_file(audio_file_path)
+        
+        # النص الفارغ لا يُخزّن (قد يكون فشلاً مؤقتاً مثل انقطاع الشبكة)، ولا نتيجة
+        # محرك احتياطي (Google بدل Whisper مثلاً) حتى لا تُعاد لاحقاً باسم المحرك المحلي
+        if key and text and self.last_engine == self.engine:
+            self.result_cache.put(key, text, dict(vars(self._last_state)))
+        return text
+    
+    def _result_cache_key(self, audio_file_path):
+        """مفتاح الذاكرة المؤقتة: بصمة الصوت + المحرك + النموذج + اللغة + خيارات فك الترميز"""
+        try:
+            digest = audio_digest(audio_file_path)
+        except OSError:
+            return None
         
         if self.engine == 'whisper':
-            text = self._recognize_with_whisper_file(audio_file_path)
+            model = self.whisper_model_size + ('-int8' if self.whisper_quantize else '')
+        elif self.engine == 'faster-whisper':
+            model = f"{self.whisper_model_size}-{_config_value('FASTER_WHISPER_COMPUTE_TYPE', 'int8')}"
         elif self.engine == 'vosk':
-            text = self._recognize_with_vosk_file(audio_file_path)
-        elif self.engine == 'google':
-            text = self._recognize_with_google_file(audio_file_path)
+            model = os.path.basename(os.path.normpath(self.vosk_model_path or ''))
+        else:
+            model = self.google_client.endpoint
+        
+        language = self.language
+        if self.parallel_languages:
+            language += '+' + ','.join(sorted(self.parallel_languages))
+        
+        # كل إعداد يغيّر الصوت المُفكك أو المحرك الذي قد يُنتج النص يدخل المفتاح
+        options = (f"pad={int(bool(self.dynamic_padding))},trim={int(bool(self.trim_silence))},"
+                   f"dsp={int(self.front_end is not None)},hedge={int(self._hedging_enabled())}")
+        return RecognitionCache.make_key(digest, self.engine, model, language, options)
+    
+    def _recognize_file(self, audio_file_path):
+        """التعرف على ملف بالمحرك المختار (مع التحوّط أو احتياطي Google)"""
+        if self.engine == 'google':
+            return self._recognize_with_google_file(audio_file_path)
+        
+        if self._hedging_enabled():
+            return self._recognize_hedged(
+                lambda race: self._recognize_local_file(audio_file_path),
+                lambda race: self._recognize_with_google_file(audio_file_path, race)
+            )
+        
+        text = self._recognize_local_file(audio_file_path)
         
         # استخدام Google كاحتياطي إذا فشل التعرف الأساسي
-        if not text and self.use_google_fallback and GOOGLE_SR_AVAILABLE:
+        if not text and self.use_google_fallback:
             print("🔄 محاولة استخدام Google Speech Recognition كاحتياطي...")
             text = self._recognize_with_google_file(audio_file_path)
         
         return text
     
+    def _recognize_local_file(self, audio_file_path):
+        """التعرف على ملف بالمحرك المحلي المختار"""
+        if self.engine == 'whisper':
+            return self._recognize_with_whisper_file(audio_file_path)
+        elif self.engine == 'faster-whisper':
+            return self._recognize_with_faster_whisper(audio_file_path)
+        elif self.engine == 'vosk':
+            return self._recognize_with_vosk_file(audio_file_path)
+        return ""
+    
+    def _hedging_enabled(self):
+        """التعرف المتحوّط يعمل فقط مع محرك محلي ومع السماح بـ Google"""
+        return self.hedged and self.use_google_fallback and self.engine != 'google'
+    
+    def _recognize_hedged(self, local_fn, remote_fn, cancel=None):
+        """
+        سباق بين المحرك المحلي و Google بمهلة تحوّط
+        
+        يبدأ المحرك المحلي فوراً؛ إذا لم يُعد نتيجة مقبولة خلال hedge_delay
+        يبدأ طلب Google بالتوازي، وأول نتيجة مقبولة تفوز ويُلغى الآخر
+        (طلب Google لم يُرسل بعد أو فك ترميز Vosk يتوقف عند أول كتلة، أما
+        Whisper فلا يمكن مقاطعته فتُهمل نتيجته فقط).
+        
+        Args:
+            local_fn: دالة (race) → نص من المحرك المحلي
+            remote_fn: دالة (race) → نص من Google
+            cancel: حدث الإيقاف الخارجي (مهلة التصريف): عند ضبطه يُلغى الطرفان،
+                ولا يبدأ طلب Google، ويعود السباق بنص فارغ دون انتظار
+        """
+        if self._hedge_executor is None:
+            self._hedge_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='hedge')
+        race = threading.Event()  # يُضبط عند فوز أحد الطرفين أو الإيقاف
+        
+        def run(fn):
+            # تشغيل في خيط منفصل مع التقاط حالة آخر تعرف الخاصة بهذا الخيط،
+            # بعد مسح ما بقي فيها من جملة سابقة مرّت على خيط المنفذ نفسه
+            vars(self._last_state).clear()
+            return fn(race), dict(vars(self._last_state))
+        
+        def run_local():
+            with self._local_lock:
+                if race.is_set():
+                    return "", {}
+                return run(local_fn)
+        
+        def stopped():
+            return cancel is not None and cancel.is_set()
+        
+        local = self._hedge_executor.submit(run_local)
+        pending = {local}
+        done = self._wait_hedge(pending, self.hedge_delay, cancel)
+        if not done and not stopped():
+            print(f"⏱️ المحرك المحلي تجاوز {self.hedge_delay:.1f}s - بدء Google بالتوازي")
+        
+        deadline = time.monotonic() + self.hedge_timeout
+        remote = None
+        while not stopped():
+            for future in done:
+                pending.discard(future)
+                text, state = self._hedge_outcome(future)
+                if text and not self._is_noise(text):
+                    race.set()
+                    # حالة الخاسر لا تُدمج، ولا يبقى من حالة الخيط المستدعي إلا ما كتبه الفائز
+                    vars(self._last_state).clear()
+                    vars(self._last_state).update(state)
+                    self.hedge_stats['remote' if future is remote else 'local'] += 1
+                    return text
+            
+            # المحلي انتهى بلا نتيجة أو تأخر: تشغيل Google (مرة واحدة)
+            if remote is None:
+                remote = self._hedge_executor.submit(run, remote_fn)
+                pending.add(remote)
+                self.hedge_stats['remote_started'] += 1
+            
+            remaining = deadline - time.monotonic()
+            if not pending or remaining <= 0:
+                break
+            done = self._wait_hedge(pending, remaining, cancel)
+        
+        race.set()
+        self.hedge_stats['none'] += 1
+        return ""
+    
+    @staticmethod
+    def _wait_hedge(pending, timeout, cancel=None, poll=0.02):
+        """أول طرف منتهٍ من pending خلال timeout، أو مجموعة فارغة فور ضبط cancel"""
+        if cancel is None:
+            return wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)[0]
+        deadline = time.monotonic() + timeout
+        while not cancel.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, _ = wait(pending, timeout=min(poll, remaining), return_when=FIRST_COMPLETED)
+            if done:
+                return done
+        return set()
+    
+    @staticmethod
+    def _hedge_outcome(future):
+        """نتيجة أحد طرفي السباق (نص فارغ عند الخطأ)"""
+        try:
+            return future.result()
+        except Exception as e:
+            print(f"⚠️ خطأ في التعرف المتحوّط: {e}")
+            return "", {}
+    
     def _recognize_with_whisper_file(self, audio_file_path):
         """التعرف باستخدام Whisper من ملف"""
+        self.last_engine, self.last_words = 'whisper', []
         try:
+            return self._transcribe_whisper(audio_file_path)
+        except Exception as e:
+            print(f"❌ خطأ في Whisper: {e}")
+            return ""
+    
+    def _transcribe_whisper(self, audio):
+        """Whisper transcribe الكامل (مسار ملف أو مصفوفة) مع حفظ ثقة الجملة"""
+        with whisper_decode_lock(self.whisper_model):
             result = self.whisper_model.transcribe(
-                audio_file_path,
+                audio,
                 language=self.language,
-                task='transcribe'
+                task='transcribe',
+                fp16=self.whisper_model.device.type != 'cpu'
             )
-            return result['text'].strip()
+        logprobs = [segment['avg_logprob'] for segment in result.get('segments', [])]
+        self.last_confidence = float(np.exp(np.mean(logprobs))) if logprobs else None
+        return result['text'].strip()
+    
+    def _recognize_with_whisper_array(self, audio):
+        """
+        التعرف باستخدام Whisper من مصفوفة float32 بتردد 16kHz
+        
+        الجمل القصيرة تُرمّز بنافذة بطولها فقط بدلاً من الحشو إلى 30 ثانية
+        (زمن المُرمّز يتناسب مع طول النافذة)، والجمل الطويلة تمر عبر transcribe.
+        """
+        self.last_engine, self.last_words = 'whisper', []
+        try:
+            if (not self.dynamic_padding or self.language is None
+                    or len(audio) >= whisper.audio.N_SAMPLES - 16000):
+                return self._transcribe_whisper(audio)
+            return self._decode_whisper_short(audio)
         except Exception as e:
             print(f"❌ خطأ في Whisper: {e}")
             return ""
     
+    def _decode_whisper_short(self, audio):
+        """فك ترميز جملة قصيرة بنافذة مُرمّز مُقصّرة"""
+        model = self.whisper_model
+        
+        # طول الصوت + ثانية هامش، بثوانٍ كاملة (100 إطار mel = 50 موضعاً في المُرمّز)
+        seconds = int(np.ceil(len(audio) / 16000)) + 1
+        n_samples = seconds * 16000
+        mel = whisper.log_mel_spectrogram(
+            whisper.pad_or_trim(audio, n_samples), n_mels=model.dims.n_mels
+        ).to(model.device)
+        
+        with torch.no_grad():
+            # نفس AudioEncoder.forward لكن مع جزء من الترميز الموضعي بطول النافذة
+            encoder = model.encoder
+            x = torch.nn.functional.gelu(encoder.conv1(mel.unsqueeze(0)))
+            x = torch.nn.functional.gelu(encoder.conv2(x)).permute(0, 2, 1)
+            x = (x + encoder.positional_embedding[:x.shape[1]]).to(x.dtype)
+            for block in encoder.blocks:
+                x = block(x)
+            audio_features = encoder.ln_post(x)[0]
+        
+        # طول السياق يُمرّر عبر واجهة للنموذج بدلاً من تعديل model.dims المشترك
+        options = whisper.DecodingOptions(
+            language=self.language, fp16=False, without_timestamps=True
+        )
+        view = _AudioContextView(model, audio_features.shape[0])
+        with whisper_decode_lock(model):
+            result = whisper.decode(view, audio_features, options)
+        
+        self.last_confidence = float(np.exp(result.avg_logprob))
+        
+        # نفس شرط transcribe لتجاهل المقاطع الخالية من الكلام
+        if result.no_speech_prob > 0.6 and result.avg_logprob < -1.0:
+            return ""
+        return result.text.strip()
+    
+    def _recognize_with_faster_whisper(self, audio):
+        """
+        التعرف باستخدام faster-whisper
+        
+        Args:
+            audio: مسار ملف صوتي أو مصفوفة float32 بتردد 16kHz
+        """
+        self.last_engine, self.last_words = 'faster-whisper', []
+        try:
+            # beam_size=1 (بحث جشع) مثل الإعداد الافتراضي لـ openai-whisper
+            segments, _info = self.faster_whisper_model.transcribe(
+                audio,
+                language=self.language,
+                task='transcribe',
+                beam_size=1
+            )
+            segments = list(segments)
+            self.last_confidence = (
+                float(np.exp(np.mean([segment.avg_logprob for segment in segments])))
+                if segments else None
+            )
+            return " ".join(segment.text.strip() for segment in segments).strip()
+        except Exception as e:
+            print(f"❌ خطأ في faster-whisper: {e}")
+            return ""
+    
     def _recognize_with_vosk_file(self, audio_file_path):
         """التعرف باستخدام Vosk من ملف"""
         try:
@@ -348,6 +1676,7 @@ class SpeechRecognizer:
             recognizer.SetWords(True)
             
             text_parts = []
+            words = []
             
             while True:
                 data = wf.readframes(4000)
@@ -358,47 +1687,72 @@ class SpeechRecognizer:
                     result = json.loads(recognizer.Result())
                     if result.get('text'):
                         text_parts.append(result['text'])
+                        words.extend(result.get('result', []))
             
             # الحصول على النتيجة النهائية
             final_result = json.loads(recognizer.FinalResult())
             if final_result.get('text'):
                 text_parts.append(final_result['text'])
+                words.extend(final_result.get('result', []))
             
             wf.close()
+            self._set_vosk_last(words)
             return " ".join(text_parts).strip()
             
         except Exception as e:
             print(f"❌ خطأ في Vosk: {e}")
             return ""
     
-    def _recognize_with_google_file(self, audio_file_path):
+    def _recognize_with_google_file(self, audio_file_path, cancel=None):
         """التعرف باستخدام Google Speech Recognition من ملف"""
-        if not GOOGLE_SR_AVAILABLE:
-            return ""
-        
         try:
-            recognizer = sr.Recognizer()
-            
-            with sr.AudioFile(audio_file_path) as source:
-                audio = recognizer.record(source)
+            if GOOGLE_SR_AVAILABLE:
+                # SpeechRecognition تقرأ WAV و AIFF و FLAC وتحوّلها إلى 16kHz/16-bit
+                with sr.AudioFile(audio_file_path) as source:
+                    audio = sr.Recognizer().record(source)
+                pcm = audio.get_raw_data(convert_rate=16000, convert_width=2)
+            else:
+                with wave.open(audio_file_path, 'rb') as wf:
+                    if wf.getnchannels() != 1 or wf.getsampwidth() != 2 or wf.getframerate() != 16000:
+                        print("❌ يجب أن يكون الملف بصيغة mono 16-bit 16kHz")
+                        return ""
+                    pcm = wf.readframes(wf.getnframes())
             
-            google_lang_map = {
-                'ar': 'ar-SA',
-                'en': 'en-US',
-                'ko': 'ko-KR',
-                'ru': 'ru-RU',
-                'tr': 'tr-TR'
-            }
+            return self._recognize_with_google_audio(pcm, cancel)
             
-            google_lang = google_lang_map.get(self.language, self.language)
+        except Exception as e:
+            print(f"❌ خطأ في Google Speech Recognition: {e}")
+            return ""
+    
+    def _recognize_with_google_audio(self, pcm, cancel=None):
+        """
+        التعرف باستخدام Google من بايتات PCM (16kHz, 16-bit mono) بدون ملف مؤقت
+        
+        الصوت الأطول من google_max_chunk_seconds يُقسّم عند الصمت إلى طلبات
+        متوازية (قد تُرفض الطلبات الطويلة)، ثم تُجمع النصوص بالترتيب.
+        """
+        self.last_engine, self.last_words, self.last_confidence = 'google', [], None
+        try:
+            chunks = [pcm]
+            max_samples = int(self.google_max_chunk_seconds * 16000)
+            if len(pcm) // 2 > max_samples:
+                samples = np.frombuffer(pcm, dtype=np.int16)
+                chunks = [chunk.tobytes() for chunk in split_at_silences(samples, max_samples)]
+                if not chunks:
+                    return ""
+                print(f"✂️ تقسيم الصوت إلى {len(chunks)} أجزاء لـ Google")
             
-            text = recognizer.recognize_google(audio, language=google_lang)
-            return text.strip()
+            text, confidence = self.google_client.recognize_many(
+                chunks, 16000, language=self.language or 'ar', cancel=cancel
+            )
+            if not text:
+                if not (cancel and cancel.is_set()):
+                    print("❌ Google لم يتمكن من فهم الصوت")
+                return ""
+            self.last_confidence = confidence
+            return text
             
-        except sr.UnknownValueError:
-            print("❌ Google لم يتمكن من فهم الصوت")
-            return ""
-        except sr.RequestError as e:
+        except GoogleSpeechError as e:
             print(f"❌ خطأ في خدمة Google: {e}")
             return ""
         except Exception as e:
@@ -413,11 +1767,9 @@ class SpeechRecognizer:
         frames = []
         
         for _ in range(0, int(16000 / 8000 * duration)):
-            if hasattr(self, 'use_sounddevice') and self.use_sounddevice:
-                data = sd.rec(8000, samplerate=16000, channels=1, dtype='int16', blocking=True)
-                data = data.tobytes()
-            else:
-                data = self.audio_stream.read(8000, exception_on_overflow=False)
+            data = self._read_audio(8000)
+            if data is None:
+                break  # طُلب الإيقاف
             frames.append(data)
         
         # حفظ في ملف مؤقت
@@ -430,8 +1782,8 @@ class SpeechRecognizer:
             wf.setframerate(16000)
             wf.writeframes(b''.join(frames))
         
-        # التعرف على الصوت
-        text = self.recognize_audio_file(temp_file.name)
+        # التعرف على الصوت (الإملاء المباشر لا يمر بالذاكرة المؤقتة: كل جملة صوت جديد)
+        text = self._recognize_file(temp_file.name)
         
         # حذف الملف المؤقت
         os.unlink(temp_file.name)
@@ -443,7 +1795,7 @@ class SpeechRecognizer:
         الاستماع المستمر للصوت (محسّن بشكل كبير للسرعة)
         
         Args:
-            callback: دالة يتم استدعاؤها عند التعرف على نص
+            callback: دالة تُستدعى بكائن RecognitionResult عند التعرف على نص
             phrase_time_limit: الحد الأقصى لطول الجملة (بالثواني) - افتراضي 8 ثوان
             pause_threshold: وقت الانتظار عند الصمت (بالثواني) - افتراضي 0.8 ثانية
         """
@@ -452,21 +1804,24 @@ class SpeechRecognizer:
         if not self.is_listening:
             self.start_recording()
         
+        self._capture_active = True
+        self._apply_capture_affinity()
+        if self.front_end:
+            self.front_end.reset()  # ملف ضوضاء جديد لكل جلسة
+        
         frames = []
         silence_start = None
         self.processing = False  # منع المعالجة المتعددة المتزامنة
         
         try:
             while self.is_listening:
-                # قراءة الصوت حسب المكتبة المستخدمة
-                if hasattr(self, 'use_sounddevice') and self.use_sounddevice:
-                    # استخدام sounddevice
-                    data = sd.rec(2000, samplerate=16000, channels=1, dtype='int16', blocking=True)
-                    data = data.tobytes()
-                else:
-                    # استخدام PyAudio
-                    data = self.audio_stream.read(2000, exception_on_overflow=False)
+                # قراءة الصوت حسب المكتبة المستخدمة (بتردد 16kHz بعد التحويل)
+                data = self._read_audio(2000)
+                if data is None:
+                    break  # طُلب الإيقاف - القارئ أُوقظ فوراً
                 
+                if self.front_end:
+                    data = self.front_end.process(data)
                 frames.append(data)
                 
                 # التحقق من الصمت - محسّن لأقصى سرعة ممكنة
@@ -477,20 +1832,14 @@ class SpeechRecognizer:
                 else:
                     max_amplitude = 1000  # افتراض وجود صوت
                 
-                if max_amplitude < 500:  # عتبة الصمت محسّنة - 500 أفضل من 250
+                if max_amplitude < SILENCE_THRESHOLD:  # عتبة الصمت محسّنة - 500 أفضل من 250
                     if silence_start is None:
                         silence_start = time.time()
                     elif time.time() - silence_start > pause_threshold and not self.processing:
                         # تم اكتشاف صمت - معالجة فورية
                         if len(frames) > 2:  # على الأقل 0.1 ثانية من الصوت
-                            self.processing = True
                             # استخدام threading للتعرف غير المتزامن
-                            recognition_thread = threading.Thread(
-                                target=self._process_recorded_audio_async,
-                                args=(frames.copy(),)
-                            )
-                            recognition_thread.daemon = True
-                            recognition_thread.start()
+                            self._start_recognition(frames.copy())
                         frames = []
                         silence_start = None
                 else:
@@ -498,13 +1847,7 @@ class SpeechRecognizer:
                 
                 # التحقق من الحد الأقصى للجملة (معالجة فورية)
                 if len(frames) > int(16000 / 4000 * phrase_time_limit) and not self.processing:
-                    self.processing = True
-                    recognition_thread = threading.Thread(
-                        target=self._process_recorded_audio_async,
-                        args=(frames.copy(),)
-                    )
-                    recognition_thread.daemon = True
-                    recognition_thread.start()
+                    self._start_recognition(frames.copy())
                     frames = []
                     silence_start = None
                 
@@ -514,10 +1857,47 @@ class SpeechRecognizer:
         except Exception as e:
             print(f"❌ خطأ في الاستماع: {e}")
         finally:
-            self.stop_recording()
+            if self.resampler:
+                stats = self.resampler.get_stats()
+                print(f"🔁 تحويل المعدل: {stats['mean_ms']:.2f} ms/كتلة "
+                      f"(أقصى {stats['max_ms']:.2f}، {stats['load'] * 100:.2f}% من زمن الصوت)")
+            if self.front_end:
+                stats = self.front_end.get_stats()
+                print(f"🎛️ المعالجة الأولية: {stats['mean_ms']:.2f} ms/كتلة "
+                      f"(أقصى {stats['max_ms']:.2f}، الميزانية {stats['budget_ms']:.1f} ms)")
+            self._finish_stop()
+    
+    def _make_result(self, text, started):
+        """تجميع نتيجة منظمة لآخر جملة من حالة آخر تعرف"""
+        kwargs = {
+            'engine': self.last_engine or self.engine,
+            'language': self.last_language or self.language,
+            'processing_time': time.perf_counter() - started,
+            'channel': self.channel,
+        }
+        if self.last_engine == 'vosk':
+            return RecognitionResult.from_vosk_words(text, self.last_words, **kwargs)
+        return RecognitionResult(text, confidence=self.last_confidence, **kwargs)
+    
+    def _emit_result(self, text, started, cancel=None, audio=None):
+        """
+        إرسال النتيجة المنظمة إلى دالة callback (ما لم تُلغَ بعد الإيقاف)
+        
+        audio: صوت الجملة (PCM 16kHz) يُسلَّم للأرشيف إن كان مفعلاً
+        """
+        if cancel is not None and cancel.is_set():
+            if text:
+                print(f"⏹️ تم إلغاء نتيجة بعد الإيقاف: '{text}'")
+            return
+        if text and self.callback:
+            result = self._make_result(text, started)
+            if self.audio_archive and audio:
+                result.utterance_id = self.audio_archive.submit(audio, 16000, result)
+            self.callback(result)
     
     def _process_recorded_audio(self, frames):
         """معالجة الصوت المسجل (النسخة المتزامنة)"""
+        started = time.perf_counter()
         try:
             # حفظ في ملف مؤقت
             temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.wav')
@@ -529,8 +1909,8 @@ class SpeechRecognizer:
                 wf.setframerate(16000)
                 wf.writeframes(b''.join(frames))
             
-            # التعرف على الصوت
-            text = self.recognize_audio_file(temp_file.name)
+            # التعرف على الصوت (الإملاء المباشر لا يمر بالذاكرة المؤقتة: كل جملة صوت جديد)
+            text = self._recognize_file(temp_file.name)
             
             # حذف الملف المؤقت
             os.unlink(temp_file.name)
@@ -541,21 +1921,73 @@ class SpeechRecognizer:
                 text = text.strip()
                 # تجاهل النصوص القصيرة جداً (أقل من 2 أحرف)
                 if len(text) >= 2 and not self._is_noise(text):
-                    self.callback(text)
+                    self._emit_result(text, started, audio=b''.join(frames))
                 else:
                     print(f"⚠️ تم تجاهل نص مشوش: '{text}'")
                 
         except Exception as e:
             print(f"❌ خطأ في معالجة الصوت: {e}")
     
-    def _process_recorded_audio_async(self, frames):
-        """معالجة الصوت المسجل بشكل غير متزامن (أسرع)"""
+    def _process_recorded_audio_async(self, frames, cancel=None):
+        """
+        معالجة الصوت المسجل بشكل غير متزامن (أسرع)
+        
+        cancel: حدث يُضبط عند الإيقاف إذا لم تنتهِ المعالجة خلال مهلة التصريف
+        """
+        self._restore_worker_affinity()
+        started = time.perf_counter()
+        audio_data = b''.join(frames)
         try:
+            # كشف اللغة مرة واحدة (أو بعد انخفاض الثقة) ثم تخزينها للجمل التالية
+            if self.auto_language and self._language_detection_due:
+                voiced = trim_silence(np.frombuffer(audio_data, dtype=np.int16))
+                if len(voiced) > 0:
+                    self._detect_and_route_language(voiced)
+            
             # استخدام Vosk مباشرة من الذاكرة إذا كان متاحاً (أسرع بكثير)
-            if self.engine == 'vosk' and self.vosk_recognizer:
-                text = self._recognize_with_vosk_memory(frames)
-                if text and self.callback:
-                    self.callback(text)
+            if self.vosk_recognizer and (self.engine == 'vosk' or self.vosk_routed):
+                if self._hedging_enabled():
+                    text = self._recognize_hedged(
+                        lambda race: self._recognize_with_vosk_memory(audio_data, race),
+                        lambda race: self._recognize_with_google_audio(audio_data, race),
+                        cancel
+                    )
+                else:
+                    text = self._recognize_with_vosk_memory(audio_data, cancel)
+                self._track_language_confidence()
+                self._emit_result(text, started, cancel, audio_data)
+                return
+            
+            # عائلة Whisper تقبل المصفوفة مباشرة بدون ملف مؤقت
+            if self.engine in ('whisper', 'faster-whisper'):
+                samples = np.frombuffer(audio_data, dtype=np.int16)
+                if self.trim_silence:
+                    samples = trim_silence(samples)
+                    if len(samples) == 0:
+                        return  # لا يوجد كلام بعد قص الصمت
+                
+                audio = int16_to_float32(samples)
+                if self.engine == 'whisper':
+                    recognize_local = self._recognize_with_whisper_array
+                else:
+                    recognize_local = self._recognize_with_faster_whisper
+                
+                if self._hedging_enabled():
+                    text = self._recognize_hedged(
+                        lambda race: recognize_local(audio),
+                        lambda race: self._recognize_with_google_audio(samples.tobytes(), race),
+                        cancel
+                    )
+                    self._track_language_confidence()
+                else:
+                    text = recognize_local(audio)
+                    self._track_language_confidence()
+                    
+                    if not text and self.use_google_fallback:
+                        print("🔄 محاولة استخدام Google Speech Recognition كاحتياطي...")
+                        text = self._recognize_with_google_audio(samples.tobytes(), cancel)
+                
+                self._emit_result(text, started, cancel, audio_data)
                 return
             
             # للأنظمة الأخرى، استخدام الملف المؤقت
@@ -566,10 +1998,10 @@ class SpeechRecognizer:
                 wf.setnchannels(1)
                 wf.setsampwidth(2)
                 wf.setframerate(16000)
-                wf.writeframes(b''.join(frames))
+                wf.writeframes(audio_data)
             
-            # التعرف على الصوت
-            text = self.recognize_audio_file(temp_file.name)
+            # التعرف على الصوت (الإملاء المباشر لا يمر بالذاكرة المؤقتة: كل جملة صوت جديد)
+            text = self._recognize_file(temp_file.name)
             
             # حذف الملف المؤقت
             try:
@@ -578,51 +2010,118 @@ class SpeechRecognizer:
                 pass
             
             # استدعاء الدالة callback
-            if text and self.callback:
-                self.callback(text)
+            self._emit_result(text, started, cancel, audio_data)
                 
         except Exception as e:
             print(f"❌ خطأ في معالجة الصوت: {e}")
         finally:
             # إعادة تعيين حالة المعالجة بعد انتهاء Thread
             self.processing = False
+            with self._inflight_lock:
+                self._inflight.discard((threading.current_thread(), cancel))
     
-    def _recognize_with_vosk_memory(self, frames):
+    def _recognize_with_vosk_memory(self, audio_data, cancel=None):
         """التعرف على الصوت مباشرة من الذاكرة باستخدام Vosk (أسرع بكثير)"""
         try:
-            audio_data = b''.join(frames)
-            text_parts = []
-            
-            # معالجة مباشرة لأقصى سرعة ممكنة
-            # معالجة مباشرة بدون تقسيم إذا كانت البيانات صغيرة
-            if len(audio_data) <= 16000:  # أقل من ثانية واحدة
-                # معالجة مباشرة - أسرع طريقة
-                if self.vosk_recognizer.AcceptWaveform(audio_data):
-                    result = json.loads(self.vosk_recognizer.Result())
-                    if result.get('text'):
-                        text_parts.append(result['text'])
-            else:
-                # للملفات الأكبر، استخدم chunks صغيرة جداً
-                chunk_size = 1000  # حجم أصغر ممكن للمعالجة الأسرع
-                for i in range(0, len(audio_data), chunk_size):
-                    chunk = audio_data[i:i + chunk_size]
-                    
-                    if self.vosk_recognizer.AcceptWaveform(chunk):
-                        result = json.loads(self.vosk_recognizer.Result())
-                        if result.get('text'):
-                            text_parts.append(result['text'])
-            
-            # الحصول على النتيجة النهائية فوراً
-            final_result = json.loads(self.vosk_recognizer.FinalResult())
-            if final_result.get('text'):
-                text_parts.append(final_result['text'])
+            self.last_language = None
+            if self.parallel_recognizers and not self.vosk_routed:
+                return self._recognize_with_vosk_parallel(audio_data, cancel)
             
-            return " ".join(text_parts).strip()
+            text, words = self._decode_vosk_memory(self.vosk_recognizer, audio_data, cancel)
+            self._set_vosk_last(words)
+            return text
             
         except Exception as e:
             print(f"❌ خطأ في Vosk Memory: {e}")
             return ""
     
+    def _recognize_with_vosk_parallel(self, audio_data, cancel=None):
+        """
+        فك ترميز الجملة بكل النماذج المتوازية معاً واختيار الأعلى ثقة
+        
+        اللغة الفائزة تُحفظ في last_language ولا تغيّر self.language، فتبقى
+        اللغة الأساسية كما اختارها المستخدم (switch_language) وتفوز عند التساوي.
+        """
+        # اللغة الأساسية الحالية أولاً حتى تفوز عند تساوي الثقة
+        if self._parallel_executor is None:
+            # Kaldi يحرر GIL أثناء فك الترميز، فالخيوط تعمل على أنوية مختلفة فعلاً
+            prefix = f'vosk-parallel-{self.channel}' if self.channel else 'vosk-parallel'
+            self._parallel_executor = ThreadPoolExecutor(
+                max_workers=len(self.parallel_recognizers), thread_name_prefix=prefix
+            )
+        languages = sorted(self.parallel_recognizers, key=lambda lang: lang != self.language)
+        futures = {
+            language: self._parallel_executor.submit(
+                self._decode_vosk_memory, self.parallel_recognizers[language], audio_data, cancel
+            )
+            for language in languages
+        }
+        
+        best_language, best_text, best_words, best_confidence = None, "", [], -1.0
+        for language, future in futures.items():
+            try:
+                text, words = future.result()
+            except Exception as e:
+                print(f"⚠️ خطأ في Vosk ({language}): {e}")
+                continue
+            
+            confidence = sum(w.get('conf', 1.0) for w in words) / len(words) if words else 0.0
+            # عند التساوي تفوز اللغة الأسبق في القائمة (الأساسية أولاً)
+            if text and confidence > best_confidence:
+                best_language, best_text, best_words, best_confidence = language, text, words, confidence
+        
+        if best_language:
+            print(f"🌐 اللغة الأعلى ثقة: {best_language} ({best_confidence:.0%})")
+        self.last_language = best_language
+        self._set_vosk_last(best_words)
+        return best_text
+    
+    def _set_vosk_last(self, words):
+        """تخزين كلمات Vosk ومتوسط ثقتها لآخر جملة"""
+        self.last_engine = 'vosk'
+        self.last_words = words
+        self.last_confidence = (
+            sum(w.get('conf', 1.0) for w in words) / len(words) if words else None
+        )
+    
+    @staticmethod
+    def _decode_vosk_memory(recognizer, audio_data, cancel=None):
+        """
+        فك ترميز صوت من الذاكرة بمعرِّف Vosk محدد
+        
+        cancel: threading.Event يوقف فك الترميز عند الكتلة التالية (خسارة السباق المتحوّط)
+        
+        Returns:
+            tuple: (النص, قائمة كلمات Vosk بتوقيتاتها وثقتها - متاحة لأن SetWords(True))
+        """
+        text_parts = []
+        words = []
+        
+        def collect(result):
+            if result.get('text'):
+                text_parts.append(result['text'])
+                words.extend(result.get('result', []))
+        
+        # معالجة مباشرة لأقصى سرعة ممكنة
+        # معالجة مباشرة بدون تقسيم إذا كانت البيانات صغيرة
+        if len(audio_data) <= 16000:  # أقل من ثانية واحدة
+            # معالجة مباشرة - أسرع طريقة
+            if recognizer.AcceptWaveform(audio_data):
+                collect(json.loads(recognizer.Result()))
+        else:
+            # للملفات الأكبر، استخدم chunks صغيرة جداً
+            chunk_size = 1000  # حجم أصغر ممكن للمعالجة الأسرع
+            for i in range(0, len(audio_data), chunk_size):
+                if cancel is not None and cancel.is_set():
+                    break
+                if recognizer.AcceptWaveform(audio_data[i:i + chunk_size]):
+                    collect(json.loads(recognizer.Result()))
+        
+        # الحصول على النتيجة النهائية فوراً
+        collect(json.loads(recognizer.FinalResult()))
+        
+        return " ".join(text_parts).strip(), words
+    
     def _is_noise(self, text):
         """فحص إذا كان النص ضوضاء أو كلام غير مفهوم"""
         text = text.strip().lower()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+اختبارات خيط الكتابة (TypingWorker) بدون شاشة عبر RecordingBackend
+
+التشغيل:
+    python -m pytest -q test_auto_typer.py
+    أو: python test_auto_typer.py
+"""
+
+import os
+import tempfile
+import threading
+import time
+
+from auto_typer import AutoTyper, TextCorrector, TypingWorker
+import typing_backends
+from dictionary_files import save_dictionary_file
+from typing_backends import KeyboardBackend, RecordingBackend, TypingBackend
+
+
+class GatedBackend(RecordingBackend):
+    """أول كتابة تنتظر gate، فتتراكم النصوص التالية في الطابور أثناءها"""
+
+    def __init__(self):
+        super().__init__()
+        self.entered = threading.Event()
+        self.gate = threading.Event()
+
+    def write(self, text, delay=0.0):
+        self.entered.set()
+        self.gate.wait(5)
+        super().write(text, delay)
+
+
+def make_typer(backend):
+    typer = AutoTyper(delay=0, backend=backend)
+    typer.paste_threshold = None  # ضغطات فقط: حدث write واحد لكل حقن
+    return typer
+
+
+def test_worker_keeps_order_and_coalesces_backlog():
+    """ما تراكم أثناء كتابة نص يُكتب بعده في حقن واحد وبترتيبه"""
+    backend = GatedBackend()
+    worker = TypingWorker(make_typer(backend))
+    try:
+        worker.submit("a")
+        assert backend.entered.wait(1)
+        worker.submit("b")
+        worker.submit("c")
+        backend.gate.set()
+        assert worker.flush(2)
+    finally:
+        worker.stop()
+
+    assert backend.text == "abc"
+    assert [value for _time, kind, value in backend.events if kind == 'write'] == ["a", "bc"]
+    stats = worker.get_stats()
+    assert (stats['segments'], stats['injections'], stats['coalesced']) == (3, 2, 1)
+
+
+def test_worker_collapses_revisions_to_latest():
+    """الفرضيات الجزئية المتراكمة تُختصر إلى أحدثها"""
+    backend = GatedBackend()
+    worker = TypingWorker(make_typer(backend))
+    try:
+        worker.submit("> ")
+        assert backend.entered.wait(1)
+        for hypothesis in ("مر", "مرح", "مرحبا"):
+            worker.submit_revision(hypothesis)
+        worker.submit_revision("مرحباً", final=True)
+        backend.gate.set()
+        assert worker.flush(2)
+    finally:
+        worker.stop()
+
+    assert backend.text == "> مرحباً"
+    assert worker.get_stats()['injections'] == 2
+
+
+def test_stop_with_pending_items_ends_thread():
+    """علامة الإيقاف خلف نصوص منتظرة: المتبقي يُكتب ثم ينتهي الخيط"""
+    backend = GatedBackend()
+    worker = TypingWorker(make_typer(backend))
+    worker.submit("a")
+    assert backend.entered.wait(1)
+    worker.submit("b")
+    worker.submit("c")
+    threading.Timer(0.05, backend.gate.set).start()
+    worker.stop(timeout=2)
+
+    assert not worker._thread.is_alive(), "الخيط ما زال ينتظر الطابور بعد stop"
+    assert backend.text == "abc"
+
+
+def test_worker_survives_typing_error():
+    """استثناء أثناء كتابة نص لا يوقف الخيط"""
+
+    class FailingTyper:
+        def __init__(self):
+            self.typed = []
+
+        def type_text(self, text):
+            if text == "boom":
+                raise RuntimeError("فشل الحقن")
+            self.typed.append(text)
+
+    typer = FailingTyper()
+    worker = TypingWorker(typer)
+    try:
+        worker.submit("boom")
+        assert worker.flush(1)
+        worker.submit("ok")
+        assert worker.flush(1)
+    finally:
+        worker.stop()
+
+    assert worker._thread is not None and not worker._thread.is_alive()
+    assert typer.typed == ["ok"]
+    assert worker.get_stats()['segments'] == 2
+
+
+def test_revision_tracks_only_confirmed_text():
+    """حقن فاشل لا يُسجل في live_text، والنتيجة النهائية تصفّره حتى مع تعطيل الكتابة"""
+
+    class FlakyBackend(RecordingBackend):
+        fail = False
+
+        def write(self, text, delay=0.0):
+            if self.fail:
+                raise OSError("الحقل فقد التركيز")
+            super().write(text, delay)
+
+    backend = FlakyBackend()
+    typer = make_typer(backend)
+    typer.type_revision("مرحبا")
+    backend.fail = True
+    typer.type_revision("مرحبا بكم")
+    assert typer.live_text == "مرحبا" == backend.text
+
+    backend.fail = False
+    typer.type_revision("مرحبا بكم")
+    assert typer.live_text == "مرحبا بكم" == backend.text
+
+    typer.disable()
+    typer.type_revision("مرحبا بكم جميعاً", final=True)
+    assert typer.live_text == ""
+
+
+def test_correction_added_during_reload_is_kept():
+    """add_correction أثناء بناء إصدار جديد من الملف لا يضيع ولا يكسر البناء"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "corrections.json")
+        corrector = TextCorrector(path=path, poll_interval=0)
+        try:
+            entries = {f"كلمة{i}": f"بديل{i}" for i in range(20000)}
+            save_dictionary_file(path, 'corrections', entries, version=2)
+            reload = threading.Thread(target=corrector._watcher.check)
+            reload.start()
+            time.sleep(0.02)  # البناء (عشرات ms) جارٍ الآن
+            corrector.add_correction("برشا", "كثيراً")
+            reload.join()
+
+            assert corrector.version == 2
+            assert corrector._watcher.errors == 0
+            assert corrector.correct("برشا كلمة3") == "كثيراً بديل3"
+        finally:
+            corrector.close()
+
+
+def test_backends_are_abstract_and_keyboard_press_honours_delay():
+    """TypingBackend لا يُنشأ مباشرة، وKeyboardBackend.press ينتظر delay بين الضغطات"""
+    try:
+        TypingBackend()
+    except TypeError:
+        pass
+    else:
+        raise AssertionError("TypingBackend أُنشئ رغم أن دواله مجردة")
+
+    class FakeKeyboard:
+        def __init__(self):
+            self.sent = []
+
+        def send(self, key):
+            self.sent.append((time.perf_counter(), key))
+
+    original = getattr(typing_backends, 'keyboard', None)
+    typing_backends.keyboard = fake = FakeKeyboard()
+    try:
+        KeyboardBackend().press('backspace', presses=3, delay=0.03)
+    finally:
+        if original is None:
+            del typing_backends.keyboard
+        else:
+            typing_backends.keyboard = original
+
+    assert [key for _time, key in fake.sent] == ['backspace'] * 3
+    gaps = [b[0] - a[0] for a, b in zip(fake.sent, fake.sent[1:])]
+    assert min(gaps) >= 0.025, f"الضغطات بدون تأخير: {gaps}"
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+اختبارات DictionaryWatcher: الملف المعطوب يُتجاهل، وخطأ البناء غير المتوقع يُعاد محاولته
+
+التشغيل:
+    python -m pytest -q test_dictionary_files.py
+    أو: python test_dictionary_files.py
+"""
+
+import os
+import tempfile
+
+from dictionary_files import DictionaryWatcher, save_dictionary_file
+
+
+def test_broken_file_is_not_reparsed_until_saved_again():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "corrections.json")
+        watcher = DictionaryWatcher(path, 'corrections', dict, defaults={"وين": "أين"})
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('{"version": 2, "corrections": {')
+        assert not watcher.check()
+        assert not watcher.check()
+        assert (watcher.version, watcher.errors) == (1, 1)
+
+
+def test_unexpected_build_error_is_retried():
+    """خطأ البناء ليس عيباً في الملف: الفحص التالي يعيد البناء لنفس التوقيع"""
+    failures = [RuntimeError("dictionary changed size during iteration")]
+
+    def build(entries):
+        if failures:
+            raise failures.pop()
+        return dict(entries)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "corrections.json")
+        watcher = DictionaryWatcher(path, 'corrections', dict, defaults={"وين": "أين"})
+        watcher.build = build
+        save_dictionary_file(path, 'corrections', {"ليش": "لماذا"}, version=2)
+
+        assert not watcher.check()
+        assert watcher.version == 1 and watcher.errors == 1
+        assert watcher.check()
+        assert watcher.version == 2 and watcher.current == {"ليش": "لماذا"}
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
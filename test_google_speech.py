@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+اختبارات عميل Google Speech مقابل خادم HTTP محلي بديل (بدون إنترنت)
+
+التشغيل:
+    python -m pytest -q test_google_speech.py
+    أو: python test_google_speech.py
+"""
+
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from google_speech import GoogleSpeechClient
+
+SILENCE = b'\x00\x00' * 16000  # ثانية صمت
+
+
+class LocalGoogleStandIn:
+    """
+    خادم HTTP محلي يحاكي خدمة Google للاختبار والقياس
+
+    الاستخدام:
+        with LocalGoogleStandIn(transcript="مرحبا", latency=0.2) as server:
+            client = GoogleSpeechClient(endpoint=server.endpoint)
+    """
+
+    def __init__(self, transcript="مرحبا", latency=0.0, confidence=0.9, error_rate=0.0, seed=0):
+        """
+        Args:
+            transcript: النص الذي يعيده الخادم (أو دالة تستقبل بايتات الطلب وتعيد النص)
+            latency: تأخير كل استجابة (بالثواني)
+            confidence: الثقة المعادة
+            error_rate: نسبة الطلبات التي تُرفض بخطأ 503 (0-1)
+            seed: بذرة اختيار الطلبات الفاشلة (لتكرار الاختبار)
+        """
+        self.transcript = transcript
+        self.latency = latency
+        self.confidence = confidence
+        self.error_rate = error_rate
+        self.requests = 0
+        self.errors = 0
+        self.connections = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def endpoint(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/speech-api/v2/recognize"
+
+    def _make_handler(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                with stand_in._lock:
+                    stand_in.connections += 1
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                with stand_in._lock:
+                    stand_in.requests += 1
+                    fail = stand_in._random.random() < stand_in.error_rate
+                    if fail:
+                        stand_in.errors += 1
+                if stand_in.latency:
+                    time.sleep(stand_in.latency)
+
+                if fail:
+                    self.send_response(503)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                transcript = stand_in.transcript
+                if callable(transcript):
+                    transcript = transcript(body)
+                result = {"result": [{"alternative": [
+                    {"transcript": transcript, "confidence": stand_in.confidence}
+                ], "final": True}], "result_index": 0}
+                payload = ('{"result":[]}\n' + json.dumps(result, ensure_ascii=False) + '\n').encode('utf-8')
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass  # بدون طباعة لكل طلب
+
+        return Handler
+
+    def start(self):
+        """تشغيل الخادم على منفذ عشوائي"""
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """إيقاف الخادم"""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def test_recognize_returns_transcript_and_confidence():
+    """طلب واحد يعيد النص والثقة كما أرسلهما الخادم"""
+    with LocalGoogleStandIn(transcript="مرحبا بالعالم", confidence=0.8) as server:
+        client = GoogleSpeechClient(endpoint=server.endpoint, timeout=5)
+        try:
+            assert client.recognize(SILENCE, language='ar') == ("مرحبا بالعالم", 0.8)
+        finally:
+            client.close()
+        assert server.requests == 1
+
+
+def test_cancelled_request_is_not_sent():
+    """الطلب الملغى قبل الإرسال لا يصل للخادم"""
+    with LocalGoogleStandIn() as server:
+        client = GoogleSpeechClient(endpoint=server.endpoint, timeout=5)
+        cancel = threading.Event()
+        cancel.set()
+        try:
+            assert client.recognize(SILENCE, cancel=cancel) == ("", None)
+        finally:
+            client.close()
+        assert server.requests == 0
+
+
+def test_sequential_requests_reuse_one_connection():
+    """keep-alive: الطلبات المتتالية تمر عبر اتصال TCP واحد"""
+    with LocalGoogleStandIn(transcript="نعم") as server:
+        client = GoogleSpeechClient(endpoint=server.endpoint, timeout=5)
+        try:
+            for _ in range(5):
+                assert client.recognize(SILENCE)[0] == "نعم"
+        finally:
+            client.close()
+        assert server.requests == 5
+        assert server.connections == 1
+        assert client.stats['connections'] == 1
+
+
+def test_recognize_many_keeps_chunk_order():
+    """الأجزاء تُرسل بالتوازي وتكتمل بترتيب عكسي، والنص المجمّع بترتيبها الأصلي"""
+    chunks = [bytes([i + 1]) * 3200 for i in range(8)]
+    # الجسم المرسل قد يكون FLAC أو L16 حسب المكتبات المثبتة، فيُطابق بترميز العميل نفسه
+    labels = {GoogleSpeechClient._encode(chunk, 16000)[0]: i for i, chunk in enumerate(chunks)}
+
+    def transcript(body):
+        index = labels[body]
+        time.sleep(0.02 * (len(chunks) - index))  # الجزء الأول يكتمل أخيراً
+        return f"جزء{index}"
+
+    with LocalGoogleStandIn(transcript=transcript) as server:
+        client = GoogleSpeechClient(endpoint=server.endpoint, timeout=5, max_parallel=4)
+        started = time.perf_counter()
+        try:
+            text, confidence = client.recognize_many(chunks)
+        finally:
+            client.close()
+        elapsed = time.perf_counter() - started
+
+    assert text == " ".join(f"جزء{i}" for i in range(len(chunks)))
+    assert confidence == 0.9
+    assert server.requests == len(chunks)
+    # بالتوازي أسرع بوضوح من مجموع التأخيرات تسلسلياً (0.72 ثانية)
+    assert elapsed < 0.02 * sum(range(1, len(chunks) + 1)) * 0.75
+    # لا يُفتح أكثر من max_parallel اتصالاً
+    assert server.connections <= 4
+
+
+def test_recognize_many_retries_transient_errors():
+    """أخطاء 503 العشوائية تُعاد محاولتها والترتيب يبقى محفوظاً"""
+    chunks = [bytes([i + 1]) * 3200 for i in range(8)]
+    labels = {GoogleSpeechClient._encode(chunk, 16000)[0]: i for i, chunk in enumerate(chunks)}
+
+    with LocalGoogleStandIn(transcript=lambda body: f"جزء{labels[body]}",
+                            error_rate=0.25, seed=1) as server:
+        client = GoogleSpeechClient(endpoint=server.endpoint, timeout=5, max_parallel=4, retries=5)
+        try:
+            text, _ = client.recognize_many(chunks)
+        finally:
+            client.close()
+
+    assert text == " ".join(f"جزء{i}" for i in range(len(chunks)))
+    assert server.errors > 0
+    assert client.stats['retries'] == server.errors
+    assert server.requests == len(chunks) + server.errors
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+"""
+اختبارات SpeechRecognizer بدون ميكروفون ولا نماذج: محرك محلي بديل يحاكي Vosk
+(يتوقف عند الكتلة التالية إذا أُلغي) و Google عبر LocalGoogleStandIn
+
+التشغيل:
+    python -m pytest -q test_speech_recognizer.py
+    أو: python test_speech_recognizer.py
+"""
+
+import os
+import tempfile
+import threading
+import time
+import wave
+
+import numpy as np
+
+from google_speech import GoogleSpeechClient
+from result_cache import RecognitionCache
+from speech_recognizer import SpeechRecognizer
+from test_google_speech import LocalGoogleStandIn
+
+SPEECH = (np.sin(np.arange(16000) / 8) * 8000).astype(np.int16).tobytes()  # ثانية "كلام"
+
+
+def make_recognizer(server, **settings):
+    """محرك google موجّه للخادم المحلي مع إعدادات الاختبار"""
+    recognizer = SpeechRecognizer(engine='google', language='ar', use_google_fallback=True)
+    recognizer.google_client.close()
+    recognizer.google_client = GoogleSpeechClient(endpoint=server.endpoint, timeout=5)
+    for name, value in settings.items():
+        setattr(recognizer, name, value)
+    return recognizer
+
+
+class FakeVosk:
+    """محرك محلي بديل: يفك الترميز duration ثانية على كتل 10 ms ويكتب حالته مثل Vosk"""
+
+    def __init__(self, recognizer, text, duration, confidence=0.7):
+        self.recognizer = recognizer
+        self.text = text
+        self.duration = duration
+        self.confidence = confidence
+        self.cancelled = False
+        self.finished = threading.Event()
+
+    def __call__(self, cancel):
+        try:
+            deadline = time.monotonic() + self.duration
+            while time.monotonic() < deadline:
+                if cancel.is_set():
+                    self.cancelled = True
+                    return ""
+                time.sleep(0.01)
+            self.recognizer.last_engine = 'vosk'
+            self.recognizer.last_words = [{'word': self.text, 'conf': self.confidence}]
+            if self.confidence is not None:
+                self.recognizer.last_confidence = self.confidence
+            return self.text
+        finally:
+            self.finished.set()
+
+
+def google(recognizer):
+    return lambda cancel: recognizer._recognize_with_google_audio(SPEECH, cancel)
+
+
+def test_hedged_local_wins_before_hedge_delay():
+    """المحلي ينتهي قبل المهلة: Google لا يُستدعى أصلاً"""
+    with LocalGoogleStandIn(transcript="من جوجل") as server:
+        recognizer = make_recognizer(server, hedge_delay=0.5)
+        local = FakeVosk(recognizer, "من المحلي", duration=0.05)
+        try:
+            assert recognizer._recognize_hedged(local, google(recognizer)) == "من المحلي"
+        finally:
+            recognizer.close()
+
+        assert server.requests == 0
+        assert recognizer.hedge_stats == {'local': 1, 'remote': 0, 'remote_started': 0, 'none': 0}
+        assert recognizer.last_engine == 'vosk'
+        assert recognizer.last_confidence == 0.7
+
+
+def test_hedged_remote_wins_and_cancels_local():
+    """المحلي بطيء: Google يبدأ بعد المهلة ويفوز، والمحلي يُلغى عند كتلته التالية"""
+    with LocalGoogleStandIn(transcript="من جوجل", latency=0.05, confidence=0.9) as server:
+        recognizer = make_recognizer(server, hedge_delay=0.1)
+        local = FakeVosk(recognizer, "من المحلي", duration=2.0)
+        started = time.perf_counter()
+        try:
+            text = recognizer._recognize_hedged(local, google(recognizer))
+            elapsed = time.perf_counter() - started
+            assert local.finished.wait(1.0), "الخاسر لم يتوقف بعد الإلغاء"
+        finally:
+            recognizer.close()
+
+        assert text == "من جوجل"
+        assert 0.1 <= elapsed < 1.0
+        assert local.cancelled
+        assert server.requests == 1
+        assert recognizer.hedge_stats == {'local': 0, 'remote': 1, 'remote_started': 1, 'none': 0}
+        # حالة الفائز وحدها تصل للخيط المستدعي
+        assert recognizer.last_engine == 'google'
+        assert recognizer.last_confidence == 0.9
+        assert recognizer.last_words == []
+
+
+def test_hedged_local_wins_after_remote_started():
+    """Google بدأ لكن المحلي أنهى أولاً: نتيجة Google المتأخرة تُهمل"""
+    with LocalGoogleStandIn(transcript="من جوجل", latency=0.5) as server:
+        recognizer = make_recognizer(server, hedge_delay=0.05)
+        local = FakeVosk(recognizer, "من المحلي", duration=0.15)
+        started = time.perf_counter()
+        try:
+            text = recognizer._recognize_hedged(local, google(recognizer))
+            elapsed = time.perf_counter() - started
+        finally:
+            recognizer.close()
+
+        assert text == "من المحلي"
+        assert elapsed < 0.45, "الفائز لا ينتظر انتهاء الطرف الآخر"
+        assert recognizer.hedge_stats == {'local': 1, 'remote': 0, 'remote_started': 1, 'none': 0}
+        assert recognizer.last_engine == 'vosk'
+        assert recognizer.last_confidence == 0.7
+
+
+def test_hedged_empty_local_starts_remote_immediately():
+    """المحلي أعاد نصاً فارغاً: Google يبدأ فوراً دون انتظار بقية المهلة"""
+    with LocalGoogleStandIn(transcript="من جوجل") as server:
+        recognizer = make_recognizer(server, hedge_delay=1.0)
+        local = FakeVosk(recognizer, "", duration=0.05)
+        started = time.perf_counter()
+        try:
+            text = recognizer._recognize_hedged(local, google(recognizer))
+        finally:
+            recognizer.close()
+
+        assert text == "من جوجل"
+        assert time.perf_counter() - started < 0.5
+        assert recognizer.hedge_stats['remote'] == 1
+
+
+def test_hedged_no_result_counts_none():
+    """كلا الطرفين بلا نص: نص فارغ ويُعدّ في none"""
+    with LocalGoogleStandIn(transcript="") as server:
+        recognizer = make_recognizer(server, hedge_delay=0.05)
+        try:
+            text = recognizer._recognize_hedged(FakeVosk(recognizer, "", 0.01), google(recognizer))
+        finally:
+            recognizer.close()
+
+        assert text == ""
+        assert recognizer.hedge_stats == {'local': 0, 'remote': 0, 'remote_started': 1, 'none': 1}
+
+
+def test_hedged_state_does_not_leak_between_utterances():
+    """حالة جملة سابقة (في خيط المنفذ أو الخيط المستدعي) لا تظهر في نتيجة الجملة التالية"""
+    with LocalGoogleStandIn(transcript="من جوجل", latency=0.05, confidence=0.9) as server:
+        recognizer = make_recognizer(server, hedge_delay=0.05)
+        try:
+            recognizer._recognize_hedged(FakeVosk(recognizer, "بطيء", 1.0), google(recognizer))
+            assert recognizer.last_confidence == 0.9
+
+            # المحلي الفائز هذه المرة لا يعرف الثقة: لا تبقى ثقة Google السابقة
+            local = FakeVosk(recognizer, "من المحلي", duration=0.0, confidence=None)
+            assert recognizer._recognize_hedged(local, google(recognizer)) == "من المحلي"
+            assert recognizer.last_engine == 'vosk'
+            assert recognizer.last_confidence is None
+        finally:
+            recognizer.close()
+
+
+def test_hedged_state_is_per_thread():
+    """سباقان متزامنان من خيطين: كل خيط يرى حالة فائزه فقط"""
+    with LocalGoogleStandIn(transcript="من جوجل", latency=0.2, confidence=0.9) as server:
+        recognizer = make_recognizer(server, hedge_delay=0.5)
+        seen = {}
+
+        def utterance(name, local):
+            text = recognizer._recognize_hedged(local, google(recognizer))
+            seen[name] = (text, recognizer.last_engine, recognizer.last_confidence)
+
+        # الأول: المحلي بلا نص فيذهب لـ Google؛ الثاني يفوز محلياً أثناء انتظار الأول
+        threads = [
+            threading.Thread(target=utterance, args=('remote', FakeVosk(recognizer, "", 0.0))),
+            threading.Thread(target=utterance, args=('local', FakeVosk(recognizer, "سريع", 0.0, 0.6))),
+        ]
+        try:
+            threads[0].start()
+            time.sleep(0.05)
+            threads[1].start()
+            for thread in threads:
+                thread.join(3.0)
+        finally:
+            recognizer.close()
+
+        assert seen['remote'] == ("من جوجل", 'google', 0.9)
+        assert seen['local'] == ("سريع", 'vosk', 0.6)
+        assert recognizer.last_engine is None  # الخيط الرئيسي لم يتعرف على شيء
+
+
+def test_parallel_recognition_works_after_close():
+    """close() يحرر منفذ التعرف المتوازي، والجملة التالية تنشئه من جديد"""
+    with LocalGoogleStandIn() as server:
+        recognizer = make_recognizer(server, engine='vosk')
+        recognizer.parallel_recognizers = {'ar': "مرحبا", 'en': "hello"}
+        recognizer._decode_vosk_memory = lambda text, audio_data, cancel: (
+            text, [{'word': text, 'conf': 0.9 if text == "hello" else 0.5}]
+        )
+        try:
+            assert recognizer._recognize_with_vosk_parallel(SPEECH) == "hello"
+            recognizer.close()
+            assert recognizer._parallel_executor is None
+            assert recognizer._recognize_with_vosk_parallel(SPEECH) == "hello"
+            assert recognizer.last_language == 'en'
+        finally:
+            recognizer.close()
+
+
+class FakeStream:
+    """بث PyAudio بديل: خيط يضع كتل صمت في طابور القارئ كما يفعل callback البث"""
+
+    def __init__(self, recognizer, feed=True):
+        self.active = True
+        self._thread = None
+        if feed:
+            self._thread = threading.Thread(target=self._feed, args=(recognizer,), daemon=True)
+            self._thread.start()
+
+    def _feed(self, recognizer):
+        silence = b'\x00\x00' * 2000
+        while self.active:
+            recognizer._audio_blocks.put(silence)
+            time.sleep(0.01)
+
+    def is_active(self):
+        return self.active
+
+    def stop_stream(self):
+        self.active = False
+
+    def close(self):
+        self.active = False
+
+
+def start_listening(recognizer, feed=True):
+    """بدء حلقة الاستماع على بث بديل (ما يفعله start_recording بعد فتح الجهاز)"""
+    results = []
+    recognizer.is_listening = True
+    recognizer._stop_event.clear()
+    recognizer._stop_requested_at = None
+    recognizer._idle_event.clear()
+    stream = recognizer.audio_stream = FakeStream(recognizer, feed)
+    # مهلة صمت طويلة: الجمل تُبدأ صراحة من الاختبار عبر _start_recognition
+    thread = threading.Thread(
+        target=recognizer.listen_continuous, args=(results.append,),
+        kwargs={'pause_threshold': 60}, daemon=True
+    )
+    thread.start()
+    time.sleep(0.05)
+    return thread, stream, results
+
+
+def stop_and_measure(recognizer, timeout=3.0):
+    """request_stop ثم wait_until_idle، ويعيد الزمن حتى الخمول بالثواني"""
+    started = time.perf_counter()
+    recognizer.request_stop()
+    assert recognizer.wait_until_idle(timeout), "لم يصل المحرك للخمول"
+    return time.perf_counter() - started
+
+
+def test_stop_wakes_blocked_reader_immediately():
+    """القارئ ينتظر كتلة لا تصل: علامة الإيقاف توقظه فيصل للخمول بلا تصريف ولا إلغاء"""
+    with LocalGoogleStandIn() as server:
+        recognizer = make_recognizer(server)
+        thread, stream, results = start_listening(recognizer, feed=False)
+        try:
+            stop_and_measure(recognizer)
+            thread.join(1.0)
+        finally:
+            recognizer.close()
+
+    assert not thread.is_alive()
+    assert not stream.active and recognizer.audio_stream is None
+    assert recognizer.last_stop_stats['drained'] == 0
+    assert recognizer.last_stop_stats['cancelled'] == 0
+
+
+def test_stop_while_streaming_is_immediate():
+    """أثناء تدفق الكتل وبلا تعرف جارٍ: الخمول خلال أجزاء من الثانية"""
+    with LocalGoogleStandIn() as server:
+        recognizer = make_recognizer(server)
+        thread, stream, results = start_listening(recognizer)
+        try:
+            time.sleep(0.1)
+            stop_and_measure(recognizer)
+            thread.join(1.0)
+        finally:
+            recognizer.close()
+
+    assert not thread.is_alive()
+    assert results == []
+    assert recognizer.last_stop_stats['drained'] == 0
+    assert recognizer.last_stop_stats['cancelled'] == 0
+
+
+def test_stop_drains_inflight_recognition():
+    """جملة قيد التعرف تكتمل خلال مهلة التصريف وتصل نتيجتها قبل الخمول"""
+    with LocalGoogleStandIn(transcript="آخر جملة", latency=0.2) as server:
+        # مهلة تصريف أطول بكثير من الطلب حتى لا يُلغى على جهاز مُحمّل
+        recognizer = make_recognizer(server, drain_timeout=5.0)
+        thread, stream, results = start_listening(recognizer)
+        try:
+            recognizer._start_recognition([SPEECH])
+            time.sleep(0.05)
+            stop_and_measure(recognizer, timeout=10.0)
+            # النتيجة وصلت قبل عودة wait_until_idle لا بعدها
+            delivered = [result.text for result in results]
+        finally:
+            recognizer.close()
+
+    assert delivered == ["آخر جملة"]
+    assert recognizer.last_stop_stats['drained'] == 1
+    assert recognizer.last_stop_stats['cancelled'] == 0
+
+
+def test_stop_cancels_recognition_after_drain_timeout():
+    """طلب أبطأ من مهلة التصريف يُلغى: الخمول قبل رد الخادم ونتيجته المتأخرة لا تصل"""
+    with LocalGoogleStandIn(transcript="متأخرة", latency=2.0) as server:
+        recognizer = make_recognizer(server, drain_timeout=0.2)
+        thread, stream, results = start_listening(recognizer)
+        try:
+            recognizer._start_recognition([SPEECH])
+            time.sleep(0.05)
+            latency = stop_and_measure(recognizer)
+            time.sleep(max(0.0, 2.5 - latency))  # الطلب يكتمل على الخادم بعد الخمول
+        finally:
+            recognizer.close()
+
+    # الإيقاف انتظر مهلة التصريف كاملة، وعاد قبل رد الخادم بهامش واسع
+    assert recognizer.drain_timeout <= latency < server.latency
+    assert recognizer.last_stop_stats['cancelled'] == 1
+    assert recognizer.last_stop_stats['drained'] == 0
+    assert server.requests == 1
+    assert results == [], "نتيجة ملغاة وصلت بعد الإيقاف"
+
+
+def test_stop_cancels_hedged_race_before_remote_starts():
+    """الإيقاف أثناء سباق متحوّط: المحلي يُلغى وطلب Google لا يُرسل بعد الإيقاف"""
+    with LocalGoogleStandIn(transcript="بعد الإيقاف") as server:
+        recognizer = make_recognizer(server, engine='vosk', hedged=True,
+                                     hedge_delay=0.5, drain_timeout=0.1)
+        local = FakeVosk(recognizer, "متأخرة", duration=3.0)
+        recognizer.vosk_recognizer = object()
+        recognizer._recognize_with_vosk_memory = lambda audio_data, race: local(race)
+        thread, stream, results = start_listening(recognizer)
+        try:
+            recognizer._start_recognition([SPEECH])
+            time.sleep(0.05)
+            stop_and_measure(recognizer)
+            assert local.finished.wait(1.0), "فك الترميز المحلي لم يُلغَ"
+            time.sleep(0.6)  # بعد hedge_delay: طلب Google كان سيبدأ لو لم يُلغَ السباق
+        finally:
+            recognizer.close()
+
+    assert local.cancelled
+    assert server.requests == 0, "أُرسل صوت إلى Google بعد الإيقاف"
+    assert recognizer.last_stop_stats['cancelled'] == 1
+    assert results == []
+
+
+def test_result_cache_skips_fallback_and_separates_options():
+    """نتيجة Google الاحتياطية لا تُخزّن باسم Whisper، وتغيير خيارات فك الترميز يغيّر المفتاح"""
+    with tempfile.TemporaryDirectory() as directory, LocalGoogleStandIn() as server:
+        path = os.path.join(directory, "utterance.wav")
+        with wave.open(path, 'wb') as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(16000)
+            wf.writeframes(SPEECH)
+
+        recognizer = make_recognizer(server, engine='whisper', hedged=False)
+        recognizer.result_cache = RecognitionCache(os.path.join(directory, "cache.db"))
+        calls = []
+
+        def decode(engine):
+            def recognize_file(audio_file_path):
+                calls.append(engine)
+                recognizer.last_engine = engine
+                return f"من {engine}"
+            return recognize_file
+
+        try:
+            recognizer._recognize_file = decode('google')  # Whisper فشل فأجاب الاحتياطي
+            assert recognizer.recognize_audio_file(path) == "من google"
+            recognizer._recognize_file = decode('whisper')
+            assert recognizer.recognize_audio_file(path) == "من whisper"
+            assert recognizer.recognize_audio_file(path) == "من whisper"
+            assert calls == ['google', 'whisper'], "النتيجة المحلية وحدها تُعاد من الذاكرة"
+            assert recognizer.last_engine == 'whisper'
+
+            recognizer.dynamic_padding = not recognizer.dynamic_padding
+            recognizer.recognize_audio_file(path)
+            assert calls == ['google', 'whisper', 'whisper']
+        finally:
+            recognizer.result_cache.close()
+            recognizer.close()
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+اختبارات AhoCorasickReplacer: حدود الكلمات والإضافة بعد البناء دون إعادة بناء في خيط المستدعي
+
+التشغيل:
+    python -m pytest -q test_text_replacer.py
+    أو: python test_text_replacer.py
+"""
+
+import time
+
+from text_replacer import AhoCorasickReplacer
+
+LARGE = {f"كلمة{i}": f"بديل{i}" for i in range(20000)}
+
+
+def wait_for_rebuild(replacer, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while replacer._rebuilding and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return not replacer._rebuilding
+
+
+def test_replace_respects_word_boundaries_and_longest_match():
+    replacer = AhoCorasickReplacer({"وين": "أين", "شو": "ما هو", "شو اسمك": "ما اسمك", "اش": ""})
+    assert replacer.replace("وين تكوين") == "أين تكوين"
+    assert replacer.replace("شو اسمك وشو") == "ما اسمك وشو"
+    assert replacer.replace("اش هذا") == "هذا"
+
+
+def test_add_after_compile_applies_immediately_without_blocking():
+    """الإضافة تُطبق من أول استبدال، والآلة الجديدة تُبنى في الخلفية ثم تُبدّل"""
+    replacer = AhoCorasickReplacer(LARGE).compile()
+    built = replacer._automaton
+    replacer.add("وين", "أين")
+
+    started = time.perf_counter()
+    assert replacer.replace("وين كلمة7 تكوين") == "أين بديل7 تكوين"
+    assert time.perf_counter() - started < 0.02, "find أعاد البناء في خيط المستدعي"
+
+    assert wait_for_rebuild(replacer)
+    assert replacer._automaton is not built
+    assert replacer._automaton[4] == len(replacer)
+    assert replacer.replace("وين كلمة7 تكوين") == "أين بديل7 تكوين"
+
+
+def test_pending_patterns_match_like_the_automaton():
+    """العبارة المنتظرة تتبع نفس قواعد الحدود وأطول تطابق"""
+    replacer = AhoCorasickReplacer({"شو": "ما هو"}).compile()
+    replacer.add("شو اسمك", "ما اسمك")
+    replacer.add("ين", "X")
+    text = "شو اسمك وين شو"
+    pending = replacer.replace(text)
+    assert wait_for_rebuild(replacer)
+    assert pending == replacer.replace(text) == "ما اسمك وين ما هو"
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
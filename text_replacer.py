@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+استبدال آلاف العبارات في مرور واحد (Aho-Corasick) مع احترام حدود الكلمات
+
+كلفة النص الواحد تتناسب مع طوله وعدد التطابقات فقط، لا مع حجم القاموس،
+والعبارة لا تُستبدل داخل كلمة أطول ("وين" لا تُطابق في "تكوين").
+"""
+
+import threading
+import unicodedata
+
+
+def is_word_char(char):
+    """حرف من الكلمة: حرف أو رقم أو _ أو حركة تشكيل ملحقة بالحرف"""
+    return char.isalnum() or char == '_' or unicodedata.combining(char) != 0
+
+
+class AhoCorasickReplacer:
+    """
+    مستبدل متعدد العبارات بآلة Aho-Corasick
+
+    - أطول تطابق من أقصى اليسار، بدون تداخل
+    - التطابق مقبول فقط إذا لم يكن ملاصقاً لحرف كلمة من الجهتين
+    - add() يضيف العبارة للشجرة فوراً (O(طولها)). قبل أول استبدال تُبنى الآلة مرة
+      واحدة؛ بعده تبقى الآلة الحالية صالحة وتُبحث العبارات الجديدة مباشرة في النص
+      حتى تنتهي إعادة البناء في خيط خلفي وتُبدّل الآلة الجديدة، فلا يدفع المستدعي
+      كلفة البناء. تغيير قيمة عبارة موجودة لا يحتاج إعادة بناء
+    """
+
+    # أقصى عدد عبارات تُبحث مباشرة قبل أن يبني find() الآلة بنفسه (إضافات بالجملة)
+    PENDING_LIMIT = 256
+
+    def __init__(self, mapping=None):
+        """
+        Args:
+            mapping: قاموس {العبارة: البديل} (البديل "" يحذف العبارة)
+        """
+        self._lock = threading.Lock()        # الشجرة وقائمة العبارات
+        self._build_lock = threading.Lock()  # بناء واحد في كل مرة
+        self._children = [{}]   # انتقالات كل عقدة: {حرف: عقدة}
+        self._pattern = [None]  # العبارة المنتهية عند العقدة (أو None)
+        self._order = []        # العبارات بترتيب إضافتها (الآلة تغطي أول count منها)
+        self.replacements = {}
+        # (انتقالات، فشل، رابط المخرجات، العبارات، count) بعد البناء، يُبدّل كمرجع واحد
+        self._automaton = None
+        self._rebuilding = False
+        for pattern, replacement in (mapping or {}).items():
+            self.add(pattern, replacement)
+
+    def __len__(self):
+        return len(self.replacements)
+
+    def add(self, pattern, replacement):
+        """إضافة عبارة أو تغيير بديلها"""
+        if not pattern:
+            return
+        with self._lock:
+            if pattern in self.replacements:
+                self.replacements[pattern] = replacement
+                return
+            node = 0
+            for char in pattern:
+                next_node = self._children[node].get(char)
+                if next_node is None:
+                    next_node = len(self._children)
+                    self._children[node][char] = next_node
+                    self._children.append({})
+                    self._pattern.append(None)
+                node = next_node
+            self._pattern[node] = pattern
+            self.replacements[pattern] = replacement
+            self._order.append(pattern)
+            # قبل أول بناء لا آلة تُحدّث: البناء الأول يتم عند أول استبدال كالمعتاد
+            start = self._automaton is not None and not self._rebuilding
+            if start:
+                self._rebuilding = True
+        if start:
+            threading.Thread(target=self._rebuild_in_background,
+                             name='aho-corasick-rebuild', daemon=True).start()
+
+    def _rebuild_in_background(self):
+        """إعادة البناء حتى تغطي الآلة كل العبارات (الإضافات أثناء البناء تُلحق بدورة تالية)"""
+        try:
+            while True:
+                with self._lock:
+                    if self._automaton[4] == len(self._order):
+                        self._rebuilding = False
+                        return
+                self._compiled()
+        except Exception as e:
+            with self._lock:
+                self._rebuilding = False
+            print(f"⚠️ فشل بناء آلة الاستبدال في الخلفية: {e}")
+
+    def _build(self):
+        """بناء روابط الفشل وروابط المخرجات بالعرض (BFS)"""
+        # نسخة من الانتقالات: الآلة المبنية لا تتغير بعدها، فـ add() المتزامن
+        # مع find() في خيط آخر لا يكشف عقداً بلا روابط فشل
+        with self._lock:
+            children = [dict(transitions) for transitions in self._children]
+            patterns = list(self._pattern)
+            count = len(self._order)
+        fail = [0] * len(children)
+        output = [0] * len(children)  # أقرب عقدة نهاية عبارة على سلسلة الفشل
+        queue = list(children[0].values())
+        for node in queue:
+            for char, child in children[node].items():
+                state = fail[node]
+                while state and char not in children[state]:
+                    state = fail[state]
+                target = children[state].get(char, 0)
+                fail[child] = target if target != child else 0
+                output[child] = fail[child] if patterns[fail[child]] else output[fail[child]]
+                queue.append(child)
+        return children, fail, output, patterns, count
+
+    def compile(self):
+        """بناء روابط الفشل الآن بدلاً من أول استبدال (للبناء في خيط خلفي قبل التبديل)"""
+        self._compiled()
+        return self
+
+    def _compiled(self):
+        """آلة تغطي كل العبارات المضافة حتى الآن (تُبنى إذا لزم)"""
+        automaton = self._automaton
+        if automaton is None or automaton[4] != len(self._order):
+            with self._build_lock:
+                automaton = self._automaton
+                if automaton is None or automaton[4] != len(self._order):
+                    automaton = self._automaton = self._build()
+        return automaton
+
+    def find(self, text):
+        """
+        التطابقات المقبولة بحدود الكلمات، أطولها من أقصى اليسار وبدون تداخل
+
+        Returns:
+            [(البداية, النهاية, العبارة), ...] مرتبة
+        """
+        automaton = self._automaton
+        pending = self._order[automaton[4]:] if automaton is not None else None
+        if pending is None or len(pending) > self.PENDING_LIMIT:
+            automaton = self._compiled()
+            pending = ()
+        children, fail, output, patterns, _count = automaton
+        best = {}  # البداية → (النهاية, العبارة) لأطول تطابق يبدأ عندها
+        length = len(text)
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in children[node]:
+                node = fail[node]
+            node = children[node].get(char, 0)
+            end = index + 1
+            # سلسلة المخرجات تُفحص فقط عند نهاية كلمة (أغلب المواضع داخل كلمات)
+            if end < length and is_word_char(text[end]):
+                continue
+            match = node if patterns[node] else output[node]
+            while match:
+                pattern = patterns[match]
+                start = end - len(pattern)
+                if ((start == 0 or not is_word_char(text[start - 1]))
+                        and (start not in best or best[start][0] < end)):
+                    best[start] = (end, pattern)
+                match = output[match]
+
+        # العبارات المضافة بعد بناء الآلة الحالية: بحث مباشر حتى تُبدّل الآلة الجديدة
+        for pattern in pending:
+            start = text.find(pattern)
+            while start != -1:
+                end = start + len(pattern)
+                if ((start == 0 or not is_word_char(text[start - 1]))
+                        and (end == length or not is_word_char(text[end]))
+                        and (start not in best or best[start][0] < end)):
+                    best[start] = (end, pattern)
+                start = text.find(pattern, start + 1)
+
+        matches = []
+        position = 0
+        for start in sorted(best):
+            if start >= position:
+                end, pattern = best[start]
+                matches.append((start, end, pattern))
+                position = end
+        return matches
+
+    def replace(self, text):
+        """استبدال كل العبارات في النص (حذف العبارة يحذف معها المسافة التي تليها)"""
+        if not text or not self.replacements:
+            return text
+        pieces = []
+        position = 0
+        for start, end, pattern in self.find(text):
+            if start < position:
+                continue  # المسافة التي تلي عبارة محذوفة قد تكون بداية تطابق سابق
+            replacement = self.replacements[pattern]
+            pieces.append(text[position:start])
+            pieces.append(replacement)
+            position = end
+            if not replacement and text[end:end + 1].isspace():
+                position += 1
+        pieces.append(text[position:])
+        return ''.join(pieces)
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+واجهات حقن المفاتيح التي يستخدمها AutoTyper
+
+AutoTyper يقرر ماذا يُكتب وكيف (ضغطات أو لصق)، والواجهة تنفذ الأحداث فقط:
+كتابة نص، ضغط مفتاح، مجموعة مفاتيح، ونسخ الحافظة وقراءتها. keyboard و
+pyautogui يحتاجان سطح مكتب حقيقياً، أما RecordingBackend فيسجل كل حدث
+بزمنه في الذاكرة ويحاكي الحقل المركّز، لقياس الكتابة واختبارها بدون شاشة.
+"""
+
+import time
+from abc import ABC, abstractmethod
+
+try:
+    import keyboard
+    KEYBOARD_AVAILABLE = True
+except ImportError:
+    KEYBOARD_AVAILABLE = False
+
+try:
+    import pyautogui
+    PYAUTOGUI_AVAILABLE = True
+except ImportError:
+    PYAUTOGUI_AVAILABLE = False
+
+try:
+    import pyperclip
+    PYPERCLIP_AVAILABLE = True
+except ImportError:
+    PYPERCLIP_AVAILABLE = False
+
+
+class TypingBackend(ABC):
+    """
+    الواجهة المشتركة لمكتبات حقن المفاتيح
+
+    unicode_write: هل write() يكتب أي نص (False = ASCII فقط، والباقي يُلصق)
+    has_clipboard: هل copy()/paste() متاحان
+    """
+
+    name = None
+    unicode_write = True
+    has_clipboard = PYPERCLIP_AVAILABLE
+
+    @abstractmethod
+    def write(self, text, delay=0.0):
+        """كتابة النص بضغطات مفاتيح، مع delay ثانية بين الأحرف"""
+
+    @abstractmethod
+    def press(self, key, presses=1, delay=0.0):
+        """الضغط على مفتاح واحد presses مرة، مع delay ثانية بين الضغطات"""
+
+    @abstractmethod
+    def hotkey(self, *keys):
+        """الضغط على مجموعة مفاتيح معاً (مثل ctrl+v)"""
+
+    def copy(self, text):
+        """وضع نص في الحافظة"""
+        pyperclip.copy(text)
+
+    def paste(self):
+        """نص الحافظة الحالي"""
+        return pyperclip.paste()
+
+
+class KeyboardBackend(TypingBackend):
+    """مكتبة keyboard (تكتب Unicode والعربية مباشرة)"""
+
+    name = 'keyboard'
+
+    def write(self, text, delay=0.0):
+        keyboard.write(text, delay=delay)
+
+    def press(self, key, presses=1, delay=0.0):
+        for index in range(presses):
+            if index and delay:
+                time.sleep(delay)
+            keyboard.send(key)
+
+    def hotkey(self, *keys):
+        keyboard.send('+'.join(keys))
+
+
+class PyAutoGUIBackend(TypingBackend):
+    """مكتبة pyautogui (write تكتب ASCII فقط وتتجاهل غيره بصمت)"""
+
+    name = 'pyautogui'
+    unicode_write = False
+
+    def __init__(self):
+        pyautogui.FAILSAFE = True
+
+    def write(self, text, delay=0.0):
+        pyautogui.write(text, interval=delay)
+
+    def press(self, key, presses=1, delay=0.0):
+        pyautogui.press(key, presses=presses, interval=delay)
+
+    def hotkey(self, *keys):
+        pyautogui.hotkey(*keys)
+
+
+class RecordingBackend(TypingBackend):
+    """
+    واجهة في الذاكرة: تسجل كل حدث بزمنه وتحاكي الحقل المركّز وحافظة خاصة بها
+
+    events: [(الزمن, النوع, القيمة), ...] بترتيب الإرسال، والأنواع:
+    'write' (نص) و'key' (مفتاح) و'hotkey' (tuple مفاتيح) و'copy' و'paste'.
+    write تنتظر delay بين الأحرف كما تفعل المكتبات الحقيقية، وevent_latency
+    تحاكي كلفة إرسال كل حدث للنظام، فتبقى المقارنة بين الطرق واقعية.
+    """
+
+    name = 'recording'
+    has_clipboard = True
+
+    PASTE_KEYS = {('ctrl', 'v'), ('command', 'v')}
+
+    def __init__(self, event_latency=0.0, unicode_write=True):
+        """
+        Args:
+            event_latency: ثوانٍ تستغرقها كل عملية حقن (0 = بلا انتظار)
+            unicode_write: False لمحاكاة pyautogui (ASCII فقط في write)
+        """
+        self.event_latency = event_latency
+        self.unicode_write = unicode_write
+        self.events = []
+        self.text = ""       # محتوى الحقل المركّز
+        self.clipboard = ""
+        self.clipboard_writes = 0
+
+    def _emit(self, kind, value):
+        if self.event_latency:
+            time.sleep(self.event_latency)
+        self.events.append((time.perf_counter(), kind, value))
+
+    def write(self, text, delay=0.0):
+        if delay:
+            time.sleep(delay * len(text))
+        if not self.unicode_write:
+            text = ''.join(char for char in text if char.isascii())
+        self._emit('write', text)
+        self.text += text
+
+    def press(self, key, presses=1, delay=0.0):
+        for _ in range(presses):
+            self._emit('key', key)
+            if key == 'backspace':
+                self.text = self.text[:-1]
+            elif key == 'enter':
+                self.text += '\n'
+            elif key == 'tab':
+                self.text += '\t'
+            if delay:
+                time.sleep(delay)
+
+    def hotkey(self, *keys):
+        self._emit('hotkey', keys)
+        if keys in self.PASTE_KEYS:
+            self.text += self.clipboard
+
+    def copy(self, text):
+        self._emit('copy', text)
+        self.clipboard = text
+        self.clipboard_writes += 1
+
+    def paste(self):
+        self._emit('paste', None)
+        return self.clipboard
+
+    def clear(self):
+        """مسح الأحداث والحقل (الحافظة تبقى كما هي)"""
+        self.events = []
+        self.text = ""
+
+
+BACKENDS = {
+    'keyboard': (KeyboardBackend, KEYBOARD_AVAILABLE),
+    'pyautogui': (PyAutoGUIBackend, PYAUTOGUI_AVAILABLE),
+    'recording': (RecordingBackend, True),
+}
+
+
+def create_backend(method):
+    """
+    إنشاء واجهة الحقن بالاسم، مع الرجوع للمكتبة الأخرى إذا لم تكن مثبتة
+
+    Raises:
+        ValueError: اسم غير معروف
+        ImportError: لا keyboard ولا pyautogui مثبتة
+    """
+    method = method.lower()
+    if method not in BACKENDS:
+        raise ValueError(f"طريقة كتابة غير معروفة: {method} (المتاح: {', '.join(BACKENDS)})")
+
+    backend_class, available = BACKENDS[method]
+    if available:
+        return backend_class()
+
+    other = 'pyautogui' if method == 'keyboard' else 'keyboard'
+    other_class, other_available = BACKENDS[other]
+    if other_available:
+        print(f"⚠️ {method} غير متاح، استخدام {other}")
+        return other_class()
+    raise ImportError("يجب تثبيت keyboard أو pyautogui")
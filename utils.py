@@ -13,6 +13,18 @@ from typing import List, Dict, Optional
 class HistoryManager:
     """مدير سجل النصوص المحولة"""
     
+    # أعمدة النتائج المنظمة (تُضاف تلقائياً لقواعد البيانات القديمة)
+    RESULT_COLUMNS = {
+        "engine": "TEXT",
+        "language": "TEXT",
+        "confidence": "REAL",
+        "processing_time": "REAL",
+        "words": "TEXT",  # JSON: [[الكلمة, البداية, النهاية, الثقة], ...]
+        "channel": "TEXT",  # اسم قناة الميكروفون عند الالتقاط من عدة أجهزة
+        "improved_text": "TEXT",  # إعادة التعرف بنموذج أكبر في الخمول (retranscriber.py)
+        "improved_engine": "TEXT",
+    }
+    
     def __init__(self, db_path="voice_history.db"):
         """تهيئة مدير السجل"""
         self.db_path = db_path
@@ -30,6 +42,10 @@ class HistoryManager:
                 length INTEGER
             )
         """)
+        existing = {row[1] for row in cursor.execute("PRAGMA table_info(history)")}
+        for column, column_type in self.RESULT_COLUMNS.items():
+            if column not in existing:
+                cursor.execute(f"ALTER TABLE history ADD COLUMN {column} {column_type}")
         conn.commit()
         conn.close()
     
@@ -47,9 +63,60 @@ class HistoryManager:
         conn.commit()
         conn.close()
     
+    def save_result(self, result, text: Optional[str] = None) -> Optional[int]:
+        """
+        حفظ نتيجة تعرف منظمة (RecognitionResult) في السجل
+        
+        Args:
+            result: نتيجة التعرف
+            text: النص النهائي إن اختلف عن نص النتيجة (بعد التصحيح مثلاً)
+            
+        Returns:
+            رقم السجل أو None إذا كان النص فارغاً
+        """
+        text = text if text is not None else result.text
+        if not text or not text.strip():
+            return None
+        
+        words = None
+        if result.words:
+            words = json.dumps([
+                [word,
+                 result.starts[i] if result.starts else None,
+                 result.ends[i] if result.ends else None,
+                 result.confidences[i] if result.confidences else None]
+                for i, word in enumerate(result.words)
+            ], ensure_ascii=False)
+        
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO history (text, timestamp, length, engine, language, "
+            "confidence, processing_time, words, channel) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (text.strip(), datetime.now().isoformat(), len(text), result.engine,
+             result.language, result.confidence, result.processing_time, words,
+             result.channel)
+        )
+        row_id = cursor.lastrowid
+        conn.commit()
+        conn.close()
+        return row_id
+    
+    def save_improved_text(self, row_id: int, text: str, engine: str):
+        """حفظ نص محسّن بجانب النص الأصلي لسجل موجود"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(
+            "UPDATE history SET improved_text = ?, improved_engine = ? WHERE id = ?",
+            (text.strip(), engine, row_id)
+        )
+        conn.commit()
+        conn.close()
+    
     def get_history(self, limit: int = 50) -> List[Dict]:
         """الحصول على السجل"""
         conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         cursor.execute(
             "SELECT * FROM history ORDER BY timestamp DESC LIMIT ?",
@@ -58,15 +125,7 @@ class HistoryManager:
         rows = cursor.fetchall()
         conn.close()
         
-        return [
-            {
-                "id": row[0],
-                "text": row[1],
-                "timestamp": row[2],
-                "length": row[3]
-            }
-            for row in rows
-        ]
+        return [dict(row) for row in rows]
     
     def clear_history(self):
         """مسح السجل"""
@@ -147,6 +206,7 @@ def check_dependencies() -> dict:
     """التحقق من المكتبات المثبتة"""
     dependencies = {
         "whisper": False,
+        "faster_whisper": False,
         "vosk": False,
         "keyboard": False,
         "pyautogui": False,
@@ -165,6 +225,13 @@ def check_dependencies() -> dict:
     except (ImportError, TypeError, AttributeError):
         dependencies["whisper"] = False
     
+    # التحقق من faster-whisper
+    try:
+        from faster_whisper import WhisperModel
+        dependencies["faster_whisper"] = True
+    except ImportError:
+        pass
+    
     # التحقق من Vosk
     try:
         from vosk import Model
@@ -217,6 +284,11 @@ def print_dependency_status():
     else:
         print("  ❌ Whisper - غير متاح (pip install openai-whisper)")
     
+    if deps["faster_whisper"]:
+        print("  ✅ faster-whisper - متاح")
+    else:
+        print("  ⚠️ faster-whisper - غير متاح (pip install faster-whisper)")
+    
     if deps["vosk"]:
         print("  ✅ Vosk - متاح")
     else:
@@ -251,7 +323,7 @@ def print_dependency_status():
     print("=" * 60)
     
     # توصيات
-    if not deps["whisper"] and not deps["vosk"]:
+    if not deps["whisper"] and not deps["faster_whisper"] and not deps["vosk"]:
         print("\n⚠️ تحذير: لا يوجد محرك تعرف على الصوت!")
         print("   يجب تثبيت Whisper أو Vosk على الأقل")
     
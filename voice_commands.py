@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+محلل الأوامر الصوتية: يمسح النص مرة واحدة ويحوّله إلى مقاطع نص وضغطات مفاتيح
+
+كل الأوامر تُجمع في تعبير نمطي واحد (الأطول أولاً) بحدود كلمات، فـ "فاصلة منقوطة"
+تُطابق قبل "فاصلة"، و"نقطة" لا تُطابق داخل كلمة أخرى، والكلفة خطية في طول النص
+بدلاً من str.replace لكل أمر.
+"""
+
+import platform
+import re
+from collections import namedtuple
+
+try:
+    import config
+    CONFIG_AVAILABLE = True
+except ImportError:
+    CONFIG_AVAILABLE = False
+
+
+# kind: 'text' (نص يُكتب) أو 'key' (مفتاح واحد) أو 'hotkey' (مجموعة مفاتيح)
+# value: النص، أو اسم المفتاح، أو tuple أسماء المفاتيح
+CommandToken = namedtuple('CommandToken', ['kind', 'value'])
+
+DEFAULT_COMMANDS = {
+    "سطر جديد": "\n",
+    "نقطة": ".",
+    "فاصلة": "،",
+    "فاصلة منقوطة": "؛",
+    "نقطتان": ":",
+    "علامة استفهام": "؟",
+    "علامة تعجب": "!",
+    "قوس مفتوح": "(",
+    "قوس مغلق": ")",
+    "مسافة": " ",
+    "تاب": {"key": "tab"},
+}
+
+# المفتاح المعدِّل لاختصارات التحرير والنسخ: command على macOS و ctrl على غيره
+MOD_KEY = 'command' if platform.system() == 'Darwin' else 'ctrl'
+
+# علامات تلتصق بالكلمة السابقة (تُحذف المسافة قبلها) أو باللاحقة (تُحذف المسافة بعدها)
+ATTACH_LEFT = set(".,،؛;:؟?!)]}")
+ATTACH_RIGHT = set("([{")
+
+
+def _resolve_key(key):
+    return MOD_KEY if key == 'mod' else key
+
+
+def _parse_action(action):
+    """
+    تحويل قيمة أمر من الإعدادات إلى CommandToken
+
+    "،" → نص | {"key": "enter"} → مفتاح | {"hotkey": ["mod", "z"]} → مجموعة مفاتيح
+    ("mod" يصبح MOD_KEY حتى يعمل نفس الأمر على macOS وغيره)
+    """
+    if isinstance(action, str):
+        return CommandToken('text', action)
+    if isinstance(action, dict):
+        if 'key' in action:
+            return CommandToken('key', _resolve_key(action['key']))
+        if 'hotkey' in action:
+            return CommandToken('hotkey', tuple(_resolve_key(key) for key in action['hotkey']))
+    raise ValueError(f"قيمة أمر صوتي غير مدعومة: {action!r}")
+
+
+def _config_commands():
+    commands = getattr(config, 'VOICE_COMMANDS', None) if CONFIG_AVAILABLE else None
+    return DEFAULT_COMMANDS if commands is None else commands
+
+
+class VoiceCommandTokenizer:
+    """محلل أوامر مُجمّع: أطول تطابق عند كل موضع، بحدود كلمات، في مرور واحد"""
+
+    def __init__(self, commands=None):
+        """
+        Args:
+            commands: قاموس {عبارة الأمر: الإجراء} (None = DEFAULT_COMMANDS)
+        """
+        commands = DEFAULT_COMMANDS if commands is None else commands
+        self.commands = {}
+        for phrase, action in commands.items():
+            phrase = " ".join(phrase.split())
+            if phrase:
+                self.commands[phrase] = _parse_action(action)
+
+        # البديل الأطول أولاً: re يختار أول بديل يطابق، فيفوز الأطول عند نفس الموضع
+        alternatives = [
+            r'\s+'.join(re.escape(word) for word in phrase.split())
+            for phrase in sorted(self.commands, key=len, reverse=True)
+        ]
+        self.pattern = (
+            re.compile(r'(?<!\w)(?:' + '|'.join(alternatives) + r')(?!\w)')
+            if alternatives else None
+        )
+
+    @classmethod
+    def from_config(cls):
+        """إنشاء المحلل من config.VOICE_COMMANDS (أو الأوامر الافتراضية)"""
+        return cls(_config_commands())
+
+    def tokenize(self, text):
+        """
+        تحويل النص إلى قائمة CommandToken بالترتيب
+
+        المقاطع النصية المتجاورة تُدمج، وعلامات الترقيم تلتصق بالكلمة
+        المجاورة (بدون المسافة التي تفصلها في الكلام المنطوق).
+        """
+        if self.pattern is None:
+            return [CommandToken('text', text)] if text else []
+
+        tokens = []
+        parts = []  # أجزاء المقطع النصي الجاري (تُجمع مرة واحدة عند إغلاقه)
+        position = 0
+        for match in self.pattern.finditer(text):
+            self._append_text(tokens, parts, text[position:match.start()])
+            token = self.commands[" ".join(match.group().split())]
+            if token.kind == 'text':
+                if token.value and (token.value[0] in ATTACH_LEFT or token.value == '\n'):
+                    self._strip_trailing_space(parts)
+                parts.append(token.value)
+            else:
+                self._strip_trailing_space(parts)
+                if parts:
+                    tokens.append(CommandToken('text', ''.join(parts)))
+                    parts.clear()
+                tokens.append(token)
+            position = match.end()
+        self._append_text(tokens, parts, text[position:])
+        if parts:
+            tokens.append(CommandToken('text', ''.join(parts)))
+        return tokens
+
+    @staticmethod
+    def _append_text(tokens, parts, text):
+        # بعد علامة تلتصق باللاحق أو سطر جديد أو أمر مفتاح لا تُبقى المسافة الفاصلة
+        if parts:
+            if parts[-1][-1] in ATTACH_RIGHT or parts[-1][-1] == '\n':
+                text = text.lstrip(' ')
+        elif tokens:
+            text = text.lstrip(' ')
+        if text:
+            parts.append(text)
+
+    @staticmethod
+    def _strip_trailing_space(parts):
+        while parts:
+            stripped = parts[-1].rstrip(' ')
+            if stripped:
+                parts[-1] = stripped
+                return
+            parts.pop()
+
+    def apply(self, typer, text):
+        """
+        تنفيذ النص على AutoTyper: كتابة المقاطع والضغط على المفاتيح بالترتيب
+
+        Returns:
+            قائمة المقاطع المنفذة
+        """
+        tokens = self.tokenize(text)
+        for token in tokens:
+            if token.kind == 'text':
+                typer.type_raw(token.value)
+            elif token.kind == 'key':
+                typer.press_key(token.value)
+            else:
+                typer.press_hotkey(*token.value)
+        return tokens
+
+
+def create_commands_watcher():
+    """
+    مراقب ملف الأوامر config.VOICE_COMMANDS_FILE: المحلل يُعاد بناؤه في الخلفية
+    عند تعديل الملف (يُنشأ الملف من config.VOICE_COMMANDS إن لم يوجد)
+
+    Returns:
+        DictionaryWatcher (current هو VoiceCommandTokenizer)، أو None إذا لم يُحدد ملف
+    """
+    from dictionary_files import create_watcher_from_config
+    return create_watcher_from_config(
+        'VOICE_COMMANDS_FILE', 'commands', VoiceCommandTokenizer, _config_commands()
+    )
+
+
+def test_voice_commands():
+    """اختبار المحلل على أمثلة وقياس سرعته مقابل str.replace لكل أمر"""
+    import time
+
+    print("🧪 اختبار محلل الأوامر الصوتية")
+    print("=" * 50)
+
+    commands = dict(DEFAULT_COMMANDS, **{"أمر تراجع": {"hotkey": ["mod", "z"]}})
+    tokenizer = VoiceCommandTokenizer(commands)
+    examples = [
+        "مرحبا فاصلة منقوطة كيف الحال علامة استفهام",
+        "السلام عليكم فاصلة كيف حالك نقطة سطر جديد شكرا",
+        "النقطة الأولى قوس مفتوح مهم قوس مغلق",
+        "اكتب هذا تاب ثم أمر تراجع",
+    ]
+    for example in examples:
+        print(f"🗣️ {example}")
+        print(f"   → {tokenizer.tokenize(example)}")
+
+    assert tokenizer.tokenize(examples[0]) == [CommandToken('text', "مرحبا؛ كيف الحال؟")]
+    assert tokenizer.tokenize("النقطة")[0].value == "النقطة", "تطابق داخل كلمة"
+    assert tokenizer.tokenize(examples[3])[-1] == CommandToken('hotkey', (MOD_KEY, 'z'))
+    assert tokenizer.tokenize("لا تراجع")[0] == CommandToken('text', "لا تراجع"), "كلمة يومية نُفذت كأمر"
+
+    text = " ".join(examples) * 50
+    repeats = 20
+    started = time.perf_counter()
+    for _ in range(repeats):
+        tokenizer.tokenize(text)
+    tokenize_ms = (time.perf_counter() - started) * 1000 / repeats
+
+    started = time.perf_counter()
+    for _ in range(repeats):
+        replaced = text
+        for phrase, action in DEFAULT_COMMANDS.items():
+            if isinstance(action, str):
+                replaced = replaced.replace(phrase, action)
+    replace_ms = (time.perf_counter() - started) * 1000 / repeats
+
+    print(f"\n⏱️ {len(text)} حرف: المحلل {tokenize_ms:.2f} ms، str.replace {replace_ms:.2f} ms")
+    print("✅ أطول تطابق وحدود الكلمات تعمل")
+
+
+if __name__ == "__main__":
+    test_voice_commands()